@@ -0,0 +1,110 @@
+"""Vista: Agenda Semanal"""
+
+import streamlit as st
+from datetime import datetime, timedelta
+
+from admin_pages.common import db
+
+st.markdown("## 📊 Vista Semanal")
+
+# Calcular rango de la semana
+selected_date = st.session_state.selected_date
+start_of_week = selected_date - timedelta(days=selected_date.weekday())
+week_dates = [start_of_week + timedelta(days=i) for i in range(7)]
+
+# Crear columnas para cada día
+day_cols = st.columns(7)
+
+weekdays_es = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
+
+for idx, date in enumerate(week_dates):
+    with day_cols[idx]:
+        date_str = date.strftime('%Y-%m-%d')
+        bookings = db.get_daily_bookings(date_str)
+        
+        is_today = date == datetime.now().date()
+        bg_color = "#DBEAFE" if is_today else "#F3F4F6"
+        
+        st.markdown(f"""
+        <div style='background: {bg_color}; padding: 1rem; border-radius: 10px; text-align: center; margin-bottom: 1rem;'>
+            <div style='font-weight: bold; color: #1F2937;'>{weekdays_es[idx]}</div>
+            <div style='font-size: 1.5rem; font-weight: bold; color: #3B82F6;'>{date.day}</div>
+            <div style='font-size: 0.8rem; color: #6B7280;'>{len(bookings)} citas</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        if bookings:
+            # Mostrar TODAS las citas del día (no solo 3)
+            for booking in sorted(bookings, key=lambda x: x['start_time']):
+                # Obtener servicios de la cita
+                with db.get_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        SELECT s.name, s.duration
+                        FROM booking_services bs
+                        JOIN services s ON bs.service_id = s.id
+                        WHERE bs.booking_id = %s
+                        ORDER BY s.name
+                    ''', (booking['id'],))
+                    services = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+                
+                # Crear string de servicios
+                services_str = ", ".join([s['name'] for s in services]) if services else "Sin servicios"
+                
+                # Determinar color según estado
+                status_colors = {
+                    'confirmed': '#D1FAE5',  # Verde
+                    'pending': '#FEF3C7',    # Amarillo
+                    'cancelled': '#FEE2E2'   # Rojo
+                }
+                status_color = status_colors.get(booking['status'], '#F3F4F6')
+                
+                st.markdown(f"""
+                <div style='background: {status_color}; padding: 0.75rem; border-radius: 8px; margin-bottom: 0.5rem; font-size: 0.75rem; border-left: 3px solid #3B82F6;'>
+                    <div style='font-weight: bold; margin-bottom: 0.25rem;'>{booking['start_time']}</div>
+                    <div style='margin-bottom: 0.25rem;'><strong>👤</strong> {booking['client_name']}</div>
+                    <div style='margin-bottom: 0.25rem;'><strong>💅</strong> {services_str}</div>
+                    <div style='color: #666;'><strong>👥</strong> {booking['professional_name']}</div>
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.info("Sin citas")
+
+st.markdown("---")
+
+# Resumen de la semana
+st.markdown("### 📊 Resumen Semanal")
+
+week_stats = {
+    'total_bookings': 0,
+    'confirmed': 0,
+    'pending': 0,
+    'total_revenue': 0,
+    'deposits_collected': 0
+}
+
+for date in week_dates:
+    date_str = date.strftime('%Y-%m-%d')
+    bookings = db.get_daily_bookings(date_str)
+    week_stats['total_bookings'] += len(bookings)
+    week_stats['confirmed'] += len([b for b in bookings if b['status'] == 'confirmed'])
+    week_stats['pending'] += len([b for b in bookings if b['status'] == 'pending'])
+    week_stats['total_revenue'] += sum(b['total_price'] for b in bookings)
+    week_stats['deposits_collected'] += sum(b['deposit_paid'] for b in bookings)
+
+col1, col2, col3, col4, col5 = st.columns(5)
+
+with col1:
+    st.metric("Total Citas", week_stats['total_bookings'])
+
+with col2:
+    st.metric("Confirmadas", week_stats['confirmed'])
+
+with col3:
+    st.metric("Pendientes", week_stats['pending'])
+
+with col4:
+    st.metric("Ingresos", f"${week_stats['total_revenue']:,.0f}")
+
+with col5:
+    st.metric("Anticipos", f"${week_stats['deposits_collected']:,.0f}")
@@ -0,0 +1,238 @@
+"""Vista: Calendario del Día (citas, métricas y ocupación por profesional)"""
+
+import streamlit as st
+import pandas as pd
+
+from src import demand, utilization
+from admin_pages.common import (
+    db, get_filters, calculate_stats, convert_to_native, format_time_range,
+    get_payment_badge_from_amounts, get_payment_status, get_status_badge
+)
+
+filter_professional, filter_status, filter_payment = get_filters()
+
+st.markdown("## 📅 Calendario del Día - Dashboard Mejorado")
+
+selected_date_str = st.session_state.selected_date.strftime('%Y-%m-%d')
+
+# Obtener todas las reservas del día
+with db.get_connection() as conn:
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT b.*, p.name as professional_name
+        FROM bookings b
+        LEFT JOIN professionals p ON b.professional_id = p.id
+        WHERE b.date = %s
+        ORDER BY b.start_time
+    """, (selected_date_str,))
+    bookings = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+
+# Calcular estadísticas
+stats = calculate_stats(bookings)
+
+# Mostrar métricas principales
+col1, col2, col3, col4, col5, col6 = st.columns(6)
+
+with col1:
+    st.metric("Total Citas", stats['total_bookings'])
+
+with col2:
+    st.metric("Confirmadas", stats['confirmed'])
+
+with col3:
+    st.metric("Pendientes", stats['pending'])
+
+with col4:
+    st.metric("Ingresos", f"${stats['total_revenue']:,.0f}")
+
+with col5:
+    st.metric("Anticipos", f"${stats['deposits_collected']:,.0f}")
+
+with col6:
+    st.metric("Pendiente", f"${stats['pending_payments']:,.0f}")
+
+st.markdown("---")
+
+# Agrupar por profesional
+professionals_data = {}
+for booking in bookings:
+    prof_name = booking['professional_name'] or 'Sin asignar'
+    if prof_name not in professionals_data:
+        professionals_data[prof_name] = []
+    professionals_data[prof_name].append(booking)
+
+# Aplicar filtros
+if filter_professional != "Todos":
+    professionals_data = {k: v for k, v in professionals_data.items() if k == filter_professional}
+
+if filter_status != "Todos":
+    status_map = {'Confirmada': 'confirmed', 'Pendiente': 'pending', 'Cancelada': 'cancelled'}
+    for prof in professionals_data:
+        professionals_data[prof] = [b for b in professionals_data[prof] if b['status'] == status_map[filter_status]]
+
+if filter_payment != "Todos":
+    payment_map = {'Pagado': 'paid', 'Anticipo pagado': 'partial', 'Pendiente': 'pending'}
+    for prof in professionals_data:
+        filtered_bookings = []
+        for b in professionals_data[prof]:
+            _, payment_status = get_payment_status(b['total_price'], b['deposit_paid'])
+            status_key = 'paid' if b['deposit_paid'] >= b['total_price'] else ('partial' if b['deposit_paid'] > 0 else 'pending')
+            if status_key == payment_map[filter_payment]:
+                filtered_bookings.append(b)
+        professionals_data[prof] = filtered_bookings
+
+# === NUEVA SECCIÓN: ANÁLISIS DE OCUPACIÓN ===
+st.markdown("### 📊 Análisis de Ocupación")
+
+# Inicializar variable ✅ IMPORTANTE
+df_occupation = None
+
+# Ocupación real: minutos reservados / minutos con horario (ver src/utilization.py)
+day_utilization = utilization.summary(
+    utilization.load_utilization(db, selected_date_str, selected_date_str)
+).set_index('professional_name')['utilization']
+
+# Calcular ocupación por profesional
+occupation_data = []
+for prof_name, prof_bookings in professionals_data.items():
+    if not prof_bookings:
+        continue
+    
+    total_bookings = len(prof_bookings)
+    confirmed_bookings = len([b for b in prof_bookings if b['status'] == 'confirmed'])
+    
+    # Conversión segura de precios
+    try:
+        prices = []
+        for b in prof_bookings:
+            price = b.get('total_price', 0)
+            prices.append(convert_to_native(price))
+        total_revenue = sum(float(p) if p else 0 for p in prices)
+    except Exception as e:
+        st.error(f"❌ Error procesando precios: {e}")
+        total_revenue = 0
+    
+    # Sin horario ese día no hay capacidad contra la cual medir
+    occupation_rate = day_utilization.get(prof_name, 0)
+    if pd.isna(occupation_rate):
+        occupation_rate = 0
+    
+    occupation_data.append({
+        'Profesional': convert_to_native(prof_name),
+        'Citas': convert_to_native(total_bookings),
+        'Confirmadas': convert_to_native(confirmed_bookings),
+        'Ocupación %': convert_to_native(occupation_rate),
+        'Ingresos': convert_to_native(total_revenue)
+    })
+
+if occupation_data:
+    try:
+        # Convertir lista completa de datos
+        occupation_data_clean = [convert_to_native(row) for row in occupation_data]
+        
+        # Crear DataFrame
+        df_occupation = pd.DataFrame(occupation_data_clean)
+        
+        # Gráfico de ocupación por profesional
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 👥 Citas por Profesional")
+            chart_data = df_occupation.set_index('Profesional')['Citas'].to_dict()
+            st.bar_chart(chart_data)
+        
+        with col2:
+            st.markdown("#### 📈 Tasa de Ocupación (%)")
+            chart_data = df_occupation.set_index('Profesional')['Ocupación %'].to_dict()
+            st.bar_chart(chart_data)
+        
+        st.markdown("---")
+        
+        # Tabla de resumen de ocupación
+        st.markdown("#### 📋 Resumen de Ocupación")
+        st.dataframe(
+            df_occupation.sort_values('Ingresos', ascending=False),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    except Exception as e:
+        st.error(f"❌ Error creando gráficos de ocupación: {e}")
+        st.write("**Detalles del error:**")
+        st.write(str(e))
+        st.write("**Datos problemáticos:**")
+        for i, row in enumerate(occupation_data):
+            st.write(f"Fila {i}: {row}")
+        df_occupation = None
+
+else:
+    st.info("📊 No hay datos de ocupación para mostrar")
+
+
+# === NUEVA SECCIÓN: HORAS PICO ===
+st.markdown("### ⏰ Análisis de Horas")
+
+# Citas por hora agrupadas en la BD (ver src/demand.py)
+day_demand = demand.load_demand(db, selected_date_str, selected_date_str)
+hours_df = pd.DataFrame({
+    'Citas': demand.hourly_profile(day_demand, 'bookings'),
+    'Canceladas': demand.hourly_profile(day_demand, 'cancellations')
+}).fillna(0).astype(int)
+
+if not hours_df.empty:
+    hours_df.index = [f"{hour:02d}" for hour in hours_df.index]
+    
+    st.markdown("#### 🕐 Distribución de Citas por Hora")
+    st.bar_chart(hours_df)
+else:
+    st.info("No hay citas para este día")
+
+st.markdown("---")
+
+# === DETALLE POR PROFESIONAL ===
+st.markdown("### 👤 Detalle por Profesional")
+
+for professional, bookings_list in professionals_data.items():
+    with st.expander(f"👤 {professional} ({len(bookings_list)} citas)"):
+        if bookings_list:
+            # Timeline view
+            st.markdown("#### ⏰ Horario del Día")
+            
+            for booking in sorted(bookings_list, key=lambda x: x['start_time']):
+                col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 2, 2])
+                
+                with col1:
+                    st.markdown(f"**{format_time_range(booking['start_time'], booking['end_time'])}**")
+                
+                with col2:
+                    st.markdown(f"👤 {booking['client_name']}")
+                
+                with col3:
+                    st.markdown(get_status_badge(booking['status']), unsafe_allow_html=True)
+                
+                with col4:
+                    # Calcular y mostrar estado de pago
+                    badge_html = get_payment_badge_from_amounts(booking['total_price'], booking['deposit_paid'])
+                    st.markdown(badge_html, unsafe_allow_html=True)
+                
+                with col5:
+                    if st.button("👁️", key=f"view_{booking['id']}"):
+                        st.write(f"Detalles de {booking['booking_code']}")
+            
+            st.markdown("---")
+            
+            # Resumen del profesional
+            prof_revenue = sum(b['total_price'] for b in bookings_list)
+            prof_deposits = sum(b['deposit_paid'] for b in bookings_list)
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Total Citas", len(bookings_list))
+            with col2:
+                st.metric("Ingresos", f"${prof_revenue:,.0f}")
+            with col3:
+                st.metric("Anticipos", f"${prof_deposits:,.0f}")
+            with col4:
+                st.metric("Pendiente", f"${prof_revenue - prof_deposits:,.0f}")
+        else:
+            st.info("Sin citas para este día")
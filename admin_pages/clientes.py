@@ -0,0 +1,221 @@
+"""Vista: Clientes (perfiles con estadísticas acumuladas, ver src/clients.py)"""
+
+import streamlit as st
+import pandas as pd
+
+from admin_pages.common import db
+from src import cache, contact_lookup, waitlist
+
+# Límite de búsquedas por usuario del panel
+ADMIN_MAX_LOOKUPS = 30
+ADMIN_WINDOW_SECONDS = 60
+
+st.markdown("## 👥 Clientes")
+
+# ==================== BÚSQUEDA RÁPIDA ====================
+st.markdown("### ⚡ Búsqueda Rápida")
+
+KIND_LABELS = {'client': "👤 Cliente", 'service': "💅 Servicio", 'category': "📁 Categoría"}
+
+quick_query = st.text_input("Nombre de cliente, servicio o categoría (tolera errores de dedo)",
+                            key="quick_search")
+if quick_query.strip():
+    results = cache.load_search(quick_query, limit=20)
+    if not results:
+        st.info("ℹ️ Sin resultados")
+    else:
+        st.dataframe(
+            pd.DataFrame(results).assign(kind=lambda df: df['kind'].map(KIND_LABELS))[
+                ['kind', 'label', 'detail', 'score']
+            ],
+            column_config={
+                'kind': "Tipo",
+                'label': "Nombre",
+                'detail': "Detalle",
+                'score': st.column_config.ProgressColumn("Similitud", min_value=0, max_value=1, format="%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+st.markdown("---")
+
+# ==================== BUSCAR CLIENTE ====================
+st.markdown("### 🔎 Buscar Cliente")
+
+with st.form("client_lookup"):
+    col1, col2 = st.columns(2)
+    with col1:
+        lookup_phone = st.text_input("Teléfono", key="client_lookup_phone")
+    with col2:
+        lookup_email = st.text_input("Email", key="client_lookup_email")
+    submitted = st.form_submit_button("🔎 Buscar")
+
+def render_contact_bookings(results):
+    """Tablas de próximas citas y recientes del cliente buscado"""
+    for title, bookings in (("📅 Próximas citas", results['upcoming']), ("🕘 Citas recientes", results['recent'])):
+        st.markdown(f"#### {title}")
+        if not bookings:
+            st.caption("Sin citas")
+            continue
+        st.dataframe(
+            pd.DataFrame(bookings)[['booking_code', 'date', 'start_time', 'professional_name',
+                                    'services', 'status', 'total_price', 'deposit_paid']],
+            column_config={
+                'booking_code': "Código",
+                'date': "Fecha",
+                'start_time': "Hora",
+                'professional_name': "Profesional",
+                'services': "Servicios",
+                'status': "Estado",
+                'total_price': st.column_config.NumberColumn("Total", format="$%.2f"),
+                'deposit_paid': st.column_config.NumberColumn("Anticipo", format="$%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+if submitted:
+    if not lookup_phone.strip() and not lookup_email.strip():
+        st.warning("⚠️ Ingresa un teléfono o un email")
+    else:
+        allowed, message = contact_lookup.check_rate(
+            db, [f"admin:{st.session_state.get('username')}"], ADMIN_MAX_LOOKUPS, ADMIN_WINDOW_SECONDS
+        )
+        if not allowed:
+            st.warning(message)
+        else:
+            client = db.get_client(phone=lookup_phone, email=lookup_email)
+            if not client:
+                st.info("ℹ️ No hay un cliente con esos datos")
+            else:
+                st.markdown(f"#### {client['name'] or 'Sin nombre'}")
+                st.caption(f"📱 {client['phone'] or '—'} · 📧 {client['email'] or '—'}")
+                
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Citas", client['bookings'])
+                col2.metric("Canceladas", client['cancellations'])
+                col3.metric("Valor de por vida", f"${client['lifetime_value']:,.2f}")
+                col4.metric("Anticipos pagados", f"${client['deposits_paid']:,.2f}")
+                st.caption(f"Primera cita: {client['first_booking_date'] or '—'} · "
+                           f"Última cita: {client['last_booking_date'] or '—'}")
+                
+                balance = db.get_loyalty_balance(client['id'])
+                col1, col2 = st.columns(2)
+                col1.metric("⭐ Puntos", f"{balance['points']:,}")
+                col2.metric("Puntos ganados", f"{balance['lifetime_points']:,}")
+                ledger = db.get_loyalty_ledger(client['id'], limit=10)
+                if ledger:
+                    with st.expander("Movimientos de puntos"):
+                        st.dataframe(
+                            pd.DataFrame(ledger)[['created_at', 'entry_type', 'points', 'booking_code', 'note']],
+                            column_config={
+                                'created_at': "Fecha",
+                                'entry_type': "Tipo",
+                                'points': "Puntos",
+                                'booking_code': "Cita",
+                                'note': "Nota"
+                            },
+                            hide_index=True,
+                            use_container_width=True
+                        )
+            
+            render_contact_bookings(cache.load_bookings_by_contact(lookup_phone, lookup_email))
+
+st.markdown("---")
+
+# ==================== LISTA DE CLIENTES ====================
+st.markdown("### 📋 Lista de Clientes")
+
+ORDER_LABELS = {
+    'last_booking_date': "Última cita",
+    'lifetime_value': "Valor de por vida",
+    'bookings': "Citas",
+    'cancellations': "Cancelaciones"
+}
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    order_by = st.radio("Ordenar por", list(ORDER_LABELS), format_func=ORDER_LABELS.get,
+                        horizontal=True, key="clients_order")
+with col2:
+    limit = st.selectbox("Mostrar", [25, 50, 100, 250], index=1, key="clients_limit")
+
+clients = db.get_clients(order_by, limit)
+
+if not clients:
+    st.info("No hay clientes registrados")
+else:
+    st.dataframe(
+        pd.DataFrame(clients)[['name', 'phone', 'email', 'bookings', 'cancellations',
+                               'lifetime_value', 'deposits_paid', 'first_booking_date', 'last_booking_date']],
+        column_config={
+            'name': "Cliente",
+            'phone': "Teléfono",
+            'email': "Email",
+            'bookings': "Citas",
+            'cancellations': "Canceladas",
+            'lifetime_value': st.column_config.NumberColumn("Valor de por vida", format="$%.2f"),
+            'deposits_paid': st.column_config.NumberColumn("Anticipos", format="$%.2f"),
+            'first_booking_date': "Primera cita",
+            'last_booking_date': "Última cita"
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+st.markdown("---")
+
+# ==================== LISTA DE ESPERA ====================
+st.markdown("### 📝 Lista de Espera")
+
+OFFER_LABELS = {
+    'pending': "Pendientes",
+    'sent': "Enviadas",
+    'expired': "Expiradas",
+    'failed': "Fallidas"
+}
+
+offer_stats = waitlist.get_offer_stats(db)
+cols = st.columns(len(OFFER_LABELS))
+for col, (status, label) in zip(cols, OFFER_LABELS.items()):
+    col.metric(f"Ofertas {label.lower()}", offer_stats.get(status, 0))
+
+entries = waitlist.get_entries(db)
+
+if not entries:
+    st.info("No hay clientes en lista de espera")
+else:
+    st.dataframe(
+        pd.DataFrame(entries)[['client_name', 'client_phone', 'client_email', 'services', 'professional_name',
+                               'date_from', 'date_to', 'duration_minutes', 'offers']],
+        column_config={
+            'client_name': "Cliente",
+            'client_phone': "Teléfono",
+            'client_email': "Email",
+            'services': "Servicios",
+            'professional_name': "Profesional",
+            'date_from': "Desde",
+            'date_to': "Hasta",
+            'duration_minutes': "Minutos",
+            'offers': "Ofertas"
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    entry_id = st.selectbox(
+        "Dar de baja",
+        [e['id'] for e in entries],
+        format_func=lambda eid: next(f"{e['client_name']} · {e['services']} ({e['date_from']} a {e['date_to']})"
+                                     for e in entries if e['id'] == eid),
+        key="waitlist_cancel_entry"
+    )
+    if st.button("🗑️ Dar de baja", key="waitlist_cancel_btn"):
+        success, msg = waitlist.cancel_entry(db, entry_id)
+        if success:
+            st.success(msg)
+            st.rerun()
+        else:
+            st.error(msg)
@@ -0,0 +1,146 @@
+"""
+Utilidades compartidas por las páginas del panel de administración
+
+Las páginas de `admin_pages/` se ejecutan con `st.navigation` desde admin.py;
+este módulo les da la base de datos compartida, los filtros del sidebar y
+los helpers de formato.
+"""
+
+import streamlit as st
+import numpy as np
+from datetime import date, time
+from decimal import Decimal
+
+from src import cache
+
+# Base de datos compartida por el proceso (st.cache_resource)
+db = cache.get_db_or_stop()
+
+# TTL de la lista de profesionales del sidebar
+PROFESSIONALS_TTL = 300
+
+
+@st.cache_data(ttl=PROFESSIONALS_TTL, show_spinner=False)
+def load_active_professionals():
+    """Profesionales activos (id, name) para filtros y selectores"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM professionals WHERE active = TRUE")
+        return [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+
+
+def get_filters():
+    """Valores actuales de los filtros del sidebar (profesional, estado, pago)"""
+    return (
+        st.session_state.get('filter_professional', 'Todos'),
+        st.session_state.get('filter_status', 'Todos'),
+        st.session_state.get('filter_payment', 'Todos')
+    )
+
+
+def convert_to_native(obj):
+    """Convierte CUALQUIER tipo a tipos nativos Python"""
+    if obj is None:
+        return None
+    if isinstance(obj, np.ndarray):
+        if obj.size == 1:
+            return convert_to_native(obj.item())
+        else:
+            return obj.tolist()
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return [convert_to_native(item) for item in obj]
+    if isinstance(obj, dict):
+        return {k: convert_to_native(v) for k, v in obj.items()}
+    return str(obj)
+
+def _row_to_dict(cursor, row):
+    """Convierte una fila de PostgreSQL a diccionario, manejando tipos problemáticos."""
+    if isinstance(row, dict):
+        return row
+        
+    columns = [desc[0] for desc in cursor.description]
+    data_dict = dict(zip(columns, row))
+    
+    # NUEVA LÓGICA: Iterar y convertir tipos problemáticos
+    for key, value in data_dict.items():
+        if isinstance(value, Decimal):
+            # Convierte Decimal de DB a float nativo de Python
+            data_dict[key] = float(value)
+        elif isinstance(value, (date, time)):
+            # Convierte objetos date/time de DB a string (para evitar conflictos de NumPy)
+            data_dict[key] = str(value)
+        # Puedes añadir más conversiones aquí si es necesario
+        
+    return data_dict
+
+
+# Funciones auxiliares
+def get_status_badge(status):
+    """Retorna badge HTML según el estado"""
+    badges = {
+        'pending': '<span class="badge badge-pending">⏳ Pendiente</span>',
+        'confirmed': '<span class="badge badge-confirmed">✅ Confirmada</span>',
+        'cancelled': '<span class="badge badge-pending">❌ Cancelada</span>',
+        'completed': '<span class="badge badge-confirmed">✓ Completada</span>'
+    }
+    return badges.get(status, status)
+
+def get_payment_badge(payment_status):
+    """Retorna badge HTML según el estado de pago"""
+    badges = {
+        'pending': '<span class="badge badge-pending">💳 Anticipo pendiente</span>',
+        'partial': '<span class="badge badge-paid">💰 Anticipo pagado</span>',
+        'paid': '<span class="badge badge-confirmed">✅ Pagado completo</span>'
+    }
+    return badges.get(payment_status, payment_status)
+
+def format_time_range(start, end):
+    """Formatea rango de tiempo"""
+    return f"{start} - {end}"
+
+def calculate_stats(bookings):
+    """Calcula estadísticas del día"""
+    total_bookings = len(bookings)
+    total_revenue = sum(b['total_price'] for b in bookings)
+    deposits_collected = sum(b['deposit_paid'] for b in bookings)
+    pending_payments = total_revenue - deposits_collected
+    
+    confirmed = len([b for b in bookings if b['status'] == 'confirmed'])
+    pending = len([b for b in bookings if b['status'] == 'pending'])
+    
+    return {
+        'total_bookings': total_bookings,
+        'confirmed': confirmed,
+        'pending': pending,
+        'total_revenue': total_revenue,
+        'deposits_collected': deposits_collected,
+        'pending_payments': pending_payments
+    }
+
+def get_payment_status(total_price, deposit_paid):
+    """Calcula el estado de pago basado en los montos"""
+    if deposit_paid <= 0:
+        return 'pending', '💳 Anticipo pendiente'
+    elif deposit_paid >= total_price:
+        return 'paid', '✅ Pagado completo'
+    else:
+        return 'partial', '💰 Anticipo pagado'
+
+def get_payment_badge_from_amounts(total_price, deposit_paid):
+    """Retorna badge HTML del estado de pago"""
+    if deposit_paid <= 0:
+        return '<span class="badge badge-pending">💳 Anticipo pendiente</span>'
+    elif deposit_paid >= total_price:
+        return '<span class="badge badge-confirmed">✅ Pagado completo</span>'
+    else:
+        return '<span class="badge badge-paid">💰 Anticipo pagado</span>'
@@ -0,0 +1,1391 @@
+"""
+Vista: Configuración del sistema
+
+Cada sección es una función; solo se ejecuta la seleccionada. Los widgets
+que escriben al hacer clic viven en `st.fragment` para que el clic vuelva a
+ejecutar únicamente ese bloque.
+"""
+
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+
+from src import auth, cache, resources, search
+from admin_pages.common import db
+
+
+def render_usuarios():
+    """Gestión de usuarios del panel"""
+    st.markdown("### 🛡️ Gestión de Usuarios")
+    
+    # --- Formulario de nuevo usuario ---
+    with st.expander("➕ Crear Nuevo Usuario"):
+        new_username = st.text_input("Username (Ej: admin)", key="new_user_username")
+        new_user_name = st.text_input("Nombre Completo", key="new_user_name")
+        new_password = st.text_input("Contraseña", type="password", key="new_user_password")
+        
+        if st.button("✅ Guardar Usuario", use_container_width=True):
+            if new_username and new_user_name and new_password:
+                success, message = auth.create_user(db, new_username, new_password, new_user_name)
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
+            else:
+                st.error("❌ Todos los campos son requeridos")
+    
+    st.markdown("---")
+    
+    # --- Listar y gestionar usuarios ---
+    st.markdown("#### 📋 Usuarios del Sistema")
+    
+    users = auth.load_users(db)
+    
+    if users:
+        for user in users:
+            col1, col2 = st.columns([4, 1])
+            
+            with col1:
+                st.markdown(f"**{user['name']}**")
+                st.caption(f"👤 Username: `{user['username']}` | ID: `{user['id']}`")
+            
+            with col2:
+                if st.button("🔑", key=f"reset_pass_{user['id']}", help="Cambiar Contraseña"):
+                    st.session_state.show_reset_pass_form = user['id']
+            
+            # Formulario para cambiar contraseña
+            if st.session_state.get('show_reset_pass_form') == user['id']:
+                st.markdown("##### 🔑 Cambiar Contraseña")
+                reset_pass = st.text_input("Nueva Contraseña", type="password", key=f"new_pass_{user['id']}")
+                
+                col1_r, col2_r = st.columns(2)
+                
+                with col1_r:
+                    if st.button("💾 Guardar Contraseña", use_container_width=True, key=f"save_pass_{user['id']}"):
+                        if reset_pass:
+                            success, message = auth.update_password(db, user['username'], reset_pass)
+                            if success:
+                                st.success(message)
+                                st.session_state.show_reset_pass_form = None
+                                st.rerun()
+                            else:
+                                st.error(message)
+                        else:
+                            st.error("❌ La contraseña no puede estar vacía")
+                
+                with col2_r:
+                    # Botón de eliminación
+                    if st.button("🗑️ Eliminar Usuario", use_container_width=True, key=f"delete_user_{user['id']}"):
+                        st.session_state.confirm_delete_user = user['id']
+
+                    if st.session_state.get('confirm_delete_user') == user['id']:
+                        st.warning(f"⚠️ ¿Eliminar a {user['name']}? Esta acción no se puede deshacer.")
+                        col1_d, col2_d = st.columns(2)
+                        with col1_d:
+                            if st.button("✅ Sí, eliminar", key=f"confirm_del_user_{user['id']}"):
+                                success, message = auth.delete_user(db, user['id'])
+                                if success:
+                                    st.success(message)
+                                    st.session_state.confirm_delete_user = None
+                                    st.session_state.show_reset_pass_form = None
+                                    st.rerun()
+                                else:
+                                    st.error(message)
+                        with col2_d:
+                            if st.button("❌ Cancelar", key=f"cancel_del_user_{user['id']}"):
+                                st.session_state.confirm_delete_user = None
+            
+            st.markdown("---")
+    else:
+        st.info("No hay usuarios registrados. Crea el primer usuario administrador.")
+
+
+def render_profesionales():
+    """Alta, edición y baja de profesionales"""
+    st.markdown("### 👥 Gestión de Profesionales")
+    
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        if st.button("➕ Nuevo Profesional", use_container_width=True):
+            st.session_state.show_new_professional_form = True
+    
+    # Formulario para nuevo profesional
+    if st.session_state.get('show_new_professional_form', False):
+        st.markdown("#### ➕ Agregar Nuevo Profesional")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            new_name = st.text_input("Nombre Completo", key="new_prof_name")
+            new_specialization = st.text_input("Especialización", key="new_prof_specialization")
+            new_phone = st.text_input("Teléfono", key="new_prof_phone")
+        
+        with col2:
+            new_email = st.text_input("Email", key="new_prof_email")
+            new_active = st.checkbox("Activo", value=True, key="new_prof_active")
+        
+        col1, col2, col3 = st.columns([1, 1, 2])
+        
+        with col1:
+            if st.button("✅ Guardar", use_container_width=True, key="save_new_prof"):
+                if new_name and new_specialization:
+                    with db.get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute('''
+                            INSERT INTO professionals (name, specialization, phone, email, active)
+                            VALUES (%s, %s, %s, %s, %s)
+                        ''', (new_name, new_specialization, new_phone, new_email, new_active))
+                        conn.commit()
+                    st.success("✅ Profesional creado exitosamente")
+                    st.session_state.show_new_professional_form = False
+                    st.rerun()
+                else:
+                    st.error("❌ Nombre y Especialización son requeridos")
+        
+        with col2:
+            if st.button("❌ Cancelar", use_container_width=True, key="cancel_new_prof"):
+                st.session_state.show_new_professional_form = False
+                st.rerun()
+    
+    st.markdown("---")
+    
+    # Listar profesionales
+    st.markdown("#### 📋 Profesionales Registrados")
+    
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM professionals ORDER BY name")
+        professionals = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+    
+    if professionals:
+        for prof in professionals:
+            col1, col2 = st.columns([4, 1])
+            
+            with col1:
+                st.markdown(f"**{prof['name']}**")
+                st.caption(f"🎓 {prof['specialization']} | 📱 {prof['phone']} | 📧 {prof['email']}")
+                status = "✅ Activo" if prof['active'] else "⭕ Inactivo"
+                st.caption(f"Estado: {status}")
+            
+            with col2:
+                if st.button("✏️", key=f"edit_prof_{prof['id']}", help="Editar"):
+                    st.session_state.selected_prof_id = prof['id']
+                    st.session_state.show_edit_prof_form = True
+            
+            # Formulario de edición
+            if st.session_state.get('show_edit_prof_form') and st.session_state.get('selected_prof_id') == prof['id']:
+                st.markdown("##### ✏️ Editar Profesional")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    edit_name = st.text_input("Nombre", prof['name'], key=f"edit_name_{prof['id']}")
+                    edit_specialization = st.text_input("Especialización", prof['specialization'], key=f"edit_spec_{prof['id']}")
+                    edit_phone = st.text_input("Teléfono", prof['phone'], key=f"edit_phone_{prof['id']}")
+                
+                with col2:
+                    edit_email = st.text_input("Email", prof['email'], key=f"edit_email_{prof['id']}")
+                    edit_active = st.checkbox("Activo", value=prof['active'], key=f"edit_active_{prof['id']}")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    if st.button("💾 Guardar", use_container_width=True, key=f"save_edit_{prof['id']}"):
+                        with db.get_connection() as conn:
+                            cursor = conn.cursor()
+                            cursor.execute('''
+                                UPDATE professionals 
+                                SET name=%s, specialization=%s, phone=%s, email=%s, active=%s
+                                WHERE id=%s
+                            ''', (edit_name, edit_specialization, edit_phone, edit_email, edit_active, prof['id']))
+                            conn.commit()
+                        st.success("✅ Cambios guardados")
+                        st.session_state.show_edit_prof_form = False
+                        st.rerun()
+                
+                with col2:
+                    if st.button("❌ Cancelar", use_container_width=True, key=f"cancel_edit_{prof['id']}"):
+                        st.session_state.show_edit_prof_form = False
+                        st.rerun()
+                
+                with col3:
+                    if st.button("🗑️ Eliminar", use_container_width=True, key=f"delete_prof_{prof['id']}"):
+                        st.session_state.confirm_delete_prof = prof['id']
+                
+                # Confirmación de eliminación
+                if st.session_state.get('confirm_delete_prof') == prof['id']:
+                    st.warning(f"⚠️ ¿Eliminar a {prof['name']}? Esta acción no se puede deshacer.")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("✅ Sí, eliminar", key=f"confirm_delete_{prof['id']}"):
+                            with db.get_connection() as conn:
+                                cursor = conn.cursor()
+                                cursor.execute("DELETE FROM professionals WHERE id=%s", (prof['id'],))
+                                conn.commit()
+                            st.success("✅ Profesional eliminado")
+                            st.session_state.confirm_delete_prof = None
+                            st.session_state.show_edit_prof_form = False
+                            st.rerun()
+                    with col2:
+                        if st.button("❌ Cancelar", key=f"cancel_delete_{prof['id']}"):
+                            st.session_state.confirm_delete_prof = None
+            
+            st.markdown("---")
+    else:
+        st.info("No hay profesionales registrados. Crea uno para comenzar.")
+
+
+def render_servicios():
+    """Gestión de servicios y categorías"""
+    st.markdown("### 🧴 Gestión de Servicios")
+    
+    service_mode = st.radio(
+        "Elige una opción",
+        ["➕ Agregar Servicio", "✏️ Editar Servicio", "📋 Ver Servicios", "🔧 Gestionar Categorías"],
+        horizontal=True,
+        key="service_mode"
+    )
+    
+    # ===== MODO 1: AGREGAR SERVICIO =====
+    if service_mode == "➕ Agregar Servicio":
+        st.markdown("#### ➕ Nuevo Servicio")
+        
+        # PASO 1: Seleccionar o crear categoría
+        st.markdown("**Paso 1: Categoría**")
+        
+        existing_categories = db.get_active_categories()
+        category_options = {cat['name']: cat['id'] for cat in existing_categories}
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            selected_category_name = st.selectbox(
+                "Selecciona una categoría existente",
+                options=list(category_options.keys()),
+                key="select_category"
+            )
+            selected_category_id = category_options[selected_category_name]
+        
+        with col2:
+            if st.button("➕ Nueva Categoría", key="new_category_btn"):
+                st.session_state.show_new_category = True
+        
+        # Formulario para nueva categoría (si se activa)
+        if st.session_state.get('show_new_category', False):
+            st.markdown("---")
+            st.markdown("**Crear Nueva Categoría**")
+            
+            new_cat_col1, new_cat_col2, new_cat_col3 = st.columns(3)
+            
+            with new_cat_col1:
+                new_category_name = st.text_input(
+                    "Nombre de la categoría",
+                    placeholder="ej: Uñas",
+                    key="new_cat_name"
+                )
+            
+            with new_cat_col2:
+                new_category_icon = st.selectbox(
+                    "Ícono",
+                    ["💅", "💇", "💆", "✨", "🎨", "🪮", "📋", "💄"],
+                    key="new_cat_icon"
+                )
+            
+            with new_cat_col3:
+                new_category_color = st.color_picker(
+                    "Color",
+                    value="#EC4899",
+                    key="new_cat_color"
+                )
+            
+            new_category_desc = st.text_area(
+                "Descripción (opcional)",
+                placeholder="Describe los servicios en esta categoría",
+                key="new_cat_desc"
+            )
+            
+            col_create, col_cancel = st.columns(2)
+            
+            with col_create:
+                if st.button("✅ Crear Categoría", key="create_cat_btn"):
+                    success, message, cat_id = db.create_category(
+                        name=new_category_name,
+                        description=new_category_desc,
+                        icon=new_category_icon,
+                        color=new_category_color
+                    )
+                    
+                    if success:
+                        st.success(message)
+                        st.session_state.show_new_category = False
+                        selected_category_id = cat_id
+                        st.rerun()
+                    else:
+                        st.error(message)
+            
+            with col_cancel:
+                if st.button("❌ Cancelar", key="cancel_cat_btn"):
+                    st.session_state.show_new_category = False
+                    st.rerun()
+        
+        # PASO 2: Datos del servicio
+        st.markdown("---")
+        st.markdown("**Paso 2: Datos del Servicio**")
+        
+        service_col1, service_col2 = st.columns(2)
+        
+        with service_col1:
+            service_name = st.text_input(
+                "Nombre del servicio",
+                placeholder="ej: Manicura completa",
+                key="service_name"
+            )
+            service_duration = st.number_input(
+                "Duración (minutos)",
+                min_value=15,
+                step=15,
+                value=60,
+                key="service_duration"
+            )
+            service_price = st.number_input(
+                "Precio (MXN)",
+                min_value=0.0,
+                step=50.0,
+                value=200.0,
+                key="service_price"
+            )
+        
+        with service_col2:
+            service_description = st.text_area(
+                "Descripción",
+                placeholder="Describe el servicio",
+                key="service_description"
+            )
+            service_deposit = st.number_input(
+                "Anticipo requerido (MXN)",
+                min_value=0.0,
+                step=50.0,
+                value=100.0,
+                key="service_deposit"
+            )
+        
+        # PASO 3: Asignar profesionales
+        st.markdown("---")
+        st.markdown("**Paso 3: Profesionales (Opcional)**")
+        
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name FROM professionals WHERE active = TRUE ORDER BY name")
+            professionals = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+        
+        if professionals:
+            selected_professionals = st.multiselect(
+                "Selecciona profesionales que pueden realizar este servicio",
+                options=[p['name'] for p in professionals],
+                key="service_professionals"
+            )
+            selected_prof_ids = [p['id'] for p in professionals if p['name'] in selected_professionals]
+        else:
+            st.info("ℹ️ No hay profesionales registrados aún")
+            selected_prof_ids = []
+        
+        # BOTÓN CREAR
+        st.markdown("---")
+        if st.button("✅ Crear Servicio", use_container_width=True, type="primary", key="create_service"):
+            if not service_name:
+                st.error("⚠️ El nombre del servicio es obligatorio")
+            else:
+                try:
+                    with db.get_connection() as conn:
+                        cursor = conn.cursor()
+                        
+                        # Insertar servicio
+                        cursor.execute("""
+                            INSERT INTO services (name, description, price, duration, category_id, deposit, active)
+                            VALUES (%s, %s, %s, %s, %s, %s, TRUE)
+                            RETURNING id
+                        """, (
+                            service_name,
+                            service_description,
+                            service_price,
+                            service_duration,
+                            selected_category_id,
+                            service_deposit
+                        ))
+                        
+                        service_id = cursor.fetchone()[0]
+                        
+                        # Asignar profesionales si los hay
+                        if selected_prof_ids:
+                            for prof_id in selected_prof_ids:
+                                cursor.execute("""
+                                    INSERT INTO professional_services (professional_id, service_id, active)
+                                    VALUES (%s, %s, TRUE)
+                                """, (prof_id, service_id))
+                        
+                        conn.commit()
+                    
+                    st.success(f"✅ Servicio '{service_name}' creado exitosamente")
+                    
+                    # Limpiar formulario
+                    st.session_state.show_new_category = False
+                    st.rerun()
+                
+                except Exception as e:
+                    st.error(f"❌ Error al crear servicio: {str(e)}")
+    
+    # ===== MODO 2: EDITAR SERVICIO =====
+    elif service_mode == "✏️ Editar Servicio":
+        st.markdown("#### ✏️ Editar Servicio")
+        
+        # Obtener servicios
+        services = db.get_services()
+        
+        if services:
+            service_options = {s['name']: s for s in services}
+            selected_service_name = st.selectbox(
+                "Selecciona un servicio",
+                options=list(service_options.keys()),
+                key="edit_service_select"
+            )
+            
+            selected_service = service_options[selected_service_name]
+            
+            st.markdown("---")
+            
+            # Obtener categoría actual
+            categories = db.get_active_categories()
+            category_options = {cat['name']: cat['id'] for cat in categories}
+            
+            edit_col1, edit_col2 = st.columns(2)
+            
+            with edit_col1:
+                edit_name = st.text_input(
+                    "Nombre",
+                    value=selected_service['name'],
+                    key="edit_name"
+                )
+                edit_category = st.selectbox(
+                    "Categoría",
+                    options=list(category_options.keys()),
+                    index=list(category_options.values()).index(selected_service.get('category_id')) 
+                        if selected_service.get('category_id') in category_options.values() else 0,
+                    key="edit_category"
+                )
+                edit_duration = st.number_input(
+                    "Duración (minutos)",
+                    value=selected_service['duration'],
+                    min_value=15,
+                    step=15,
+                    key="edit_duration"
+                )
+            
+            with edit_col2:
+                edit_description = st.text_area(
+                    "Descripción",
+                    value=selected_service.get('description', ''),
+                    key="edit_description"
+                )
+                edit_price = st.number_input(
+                    "Precio (MXN)",
+                    value=selected_service['price'],
+                    min_value=0.0,
+                    step=50.0,
+                    key="edit_price"
+                )
+                edit_deposit = st.number_input(
+                    "Anticipo (MXN)",
+                    value=selected_service.get('deposit', 0),
+                    min_value=0.0,
+                    step=50.0,
+                    key="edit_deposit"
+                )
+            
+            st.markdown("---")
+            
+            if st.button("✅ Actualizar Servicio", use_container_width=True, type="primary"):
+                try:
+                    with db.get_connection() as conn:
+                        cursor = conn.cursor()
+                        cursor.execute("""
+                            UPDATE services 
+                            SET name = %s, description = %s, price = %s, duration = %s, 
+                                category_id = %s, deposit = %s
+                            WHERE id = %s
+                        """, (
+                            edit_name,
+                            edit_description,
+                            edit_price,
+                            edit_duration,
+                            category_options[edit_category],
+                            edit_deposit,
+                            selected_service['id']
+                        ))
+                        conn.commit()
+                    
+                    st.success(f"✅ Servicio '{edit_name}' actualizado")
+                    st.rerun()
+                
+                except Exception as e:
+                    st.error(f"❌ Error: {str(e)}")
+        else:
+            st.info("ℹ️ No hay servicios registrados")
+    
+    # ===== MODO 3: VER SERVICIOS =====
+    elif service_mode == "📋 Ver Servicios":
+        st.markdown("#### 📋 Lista de Servicios")
+        
+        # Filtrar por categoría
+        categories = db.get_active_categories()
+        
+        if categories:
+            selected_cat_filter = st.selectbox(
+                "Filtrar por categoría",
+                options=["Todas"] + [cat['name'] for cat in categories],
+                key="filter_category"
+            )
+            
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                if selected_cat_filter == "Todas":
+                    query = """
+                        SELECT id, name, description, price, duration, category_id, deposit
+                        FROM services
+                        WHERE active = TRUE
+                        ORDER BY category_id, name
+                    """
+                    cursor.execute(query)
+                else:
+                    cat_id = [cat['id'] for cat in categories if cat['name'] == selected_cat_filter][0]
+                    query = """
+                        SELECT id, name, description, price, duration, category_id, deposit
+                        FROM services
+                        WHERE active = TRUE AND category_id = %s
+                        ORDER BY name
+                    """
+                    cursor.execute(query, (cat_id,))
+                
+                services_list = [
+                    dict(zip([desc[0] for desc in cursor.description], row))
+                    for row in cursor.fetchall()
+                ]
+            
+            if services_list:
+                # Mostrar tabla
+                df = pd.DataFrame(services_list)
+                df = df.rename(columns={
+                    'id': 'ID',
+                    'name': 'Servicio',
+                    'description': 'Descripción',
+                    'price': 'Precio',
+                    'duration': 'Duración (min)',
+                    'category_id': 'Cat ID',
+                    'deposit': 'Anticipo'
+                })
+                
+                st.dataframe(df, use_container_width=True)
+            else:
+                st.info("ℹ️ No hay servicios en esta categoría")
+    
+    # ===== MODO 4: GESTIONAR CATEGORÍAS =====
+    elif service_mode == "🔧 Gestionar Categorías":
+        st.markdown("#### 🔧 Gestión de Categorías")
+        
+        cat_action = st.radio(
+            "Elige una acción",
+            ["➕ Agregar Categoría", "📊 Ver Categorías", "✏️ Editar Categoría", "🔍 Detectar Duplicadas"],
+            horizontal=True,
+            key="cat_action"
+        )
+        
+        # ===== NUEVA SECCIÓN: AGREGAR CATEGORÍA =====
+        if cat_action == "➕ Agregar Categoría":
+            st.markdown("#### ➕ Crear Nueva Categoría")
+            
+            with st.form("form_new_category", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    new_cat_name = st.text_input(
+                        "Nombre de la categoría *",
+                        placeholder="ej: Cabello, Uñas, Masaje",
+                        max_chars=100
+                    )
+                    new_cat_icon = st.selectbox(
+                        "Ícono 🎨",
+                        ["💅", "💇", "💆", "✨", "🎨", "🪮", "📋", "💄", "🧖", "💆‍♀️", "👄", "🏖️"],
+                        index=0
+                    )
+                
+                with col2:
+                    new_cat_desc = st.text_area(
+                        "Descripción",
+                        placeholder="Describe brevemente esta categoría de servicios",
+                        max_chars=200
+                    )
+                    new_cat_color = st.color_picker("Color de la categoría", value="#EC4899")
+                
+                # Botón para crear
+                submitted = st.form_submit_button("✅ Crear Categoría", use_container_width=True)
+                
+                if submitted:
+                    # Validar que no esté vacío
+                    if not new_cat_name.strip():
+                        st.error("❌ El nombre de la categoría no puede estar vacío")
+                    else:
+                        # Intentar crear
+                        success, msg, cat_id = db.create_category(
+                            name=new_cat_name.strip(),
+                            description=new_cat_desc.strip(),
+                            icon=new_cat_icon,
+                            color=new_cat_color
+                        )
+                        
+                        if success:
+                            st.success(f"✅ {msg}")
+                            st.info(f"ID de la categoría: {cat_id}")
+                            st.balloons()
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {msg}")
+        
+        # ===== VER CATEGORÍAS =====
+        elif cat_action == "📊 Ver Categorías":
+            categories = db.get_active_categories()
+            
+            if categories:
+                df_cats = pd.DataFrame([
+                    {
+                        'Icon': cat['icon'],
+                        'Nombre': cat['name'],
+                        'Servicios': cat['service_count'],
+                        'Descripción': cat.get('description', '')
+                    }
+                    for cat in categories
+                ])
+                
+                st.dataframe(df_cats, use_container_width=True)
+            else:
+                st.info("ℹ️ No hay categorías")
+        
+        # ===== EDITAR CATEGORÍA =====
+        elif cat_action == "✏️ Editar Categoría":
+            categories = db.get_active_categories()
+            
+            if categories:
+                selected_cat_edit = st.selectbox(
+                    "Selecciona categoría",
+                    options=[cat['name'] for cat in categories],
+                    key="cat_edit_select"
+                )
+                
+                selected_cat = [c for c in categories if c['name'] == selected_cat_edit][0]
+                
+                st.markdown("---")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    edit_cat_name = st.text_input("Nombre", value=selected_cat['name'])
+                    edit_cat_icon = st.selectbox("Ícono", ["💅", "💇", "💆", "✨", "🎨", "🪮", "📋", "💄"], 
+                                                index=["💅", "💇", "💆", "✨", "🎨", "🪮", "📋", "💄"].index(selected_cat['icon']))
+                
+                with col2:
+                    edit_cat_desc = st.text_area("Descripción", value=selected_cat.get('description', ''))
+                    edit_cat_color = st.color_picker("Color", value=selected_cat.get('color', '#EC4899'))
+                
+                if st.button("✅ Actualizar Categoría", use_container_width=True):
+                    success, msg = db.update_category(
+                        selected_cat['id'],
+                        name=edit_cat_name,
+                        description=edit_cat_desc,
+                        icon=edit_cat_icon,
+                        color=edit_cat_color
+                    )
+                    
+                    if success:
+                        st.success(msg)
+                        st.rerun()
+                    else:
+                        st.error(msg)
+        
+        # ===== DETECTAR DUPLICADAS =====
+        elif cat_action == "🔍 Detectar Duplicadas":
+            st.markdown("---")
+            
+            use_similarity = st.toggle("Incluir nombres parecidos (acentos y errores de dedo)", value=True,
+                                       key="duplicates_use_similarity")
+            if use_similarity:
+                threshold = st.slider("Similitud mínima", 0.3, 0.9, search.DUPLICATE_THRESHOLD, 0.05,
+                                      key="duplicates_threshold")
+                duplicates = search.find_duplicate_categories(db, threshold)
+            else:
+                duplicates = db.get_duplicate_categories()
+            
+            if duplicates:
+                st.warning(f"⚠️ Se encontraron {len(duplicates)} categorías con variaciones:")
+                
+                for dup in duplicates:
+                    st.markdown(f"""
+                    **Nombre limpio:** `{dup['clean_name']}`
+                    - Total servicios: {dup['total_services']}
+                    - Variaciones encontradas: {dup['num_variations']}
+                    - Ejemplos: {', '.join(dup['variations'][:3])}
+                    """)
+                    if 'similarity' in dup:
+                        st.caption(f"Similitud mínima del grupo: {dup['similarity']:.2f}")
+                
+                st.info("Para normalizar manualmente, edita cada servicio y asigna la categoría correcta")
+            else:
+                st.success("✅ No se encontraron categorías duplicadas")
+
+
+def build_assignment_pivot(matrix_rows):
+    """
+    Pivotea la matriz profesional × servicio
+
+    Returns:
+        tuple: (DataFrame booleano con índice professional_id y columnas
+                service_id, dict de nombres de profesionales,
+                dict de nombres de servicios)
+    """
+    matrix_df = pd.DataFrame(matrix_rows)
+    pivot = matrix_df.pivot(index='professional_id', columns='service_id', values='assigned')
+    
+    # Conservar el orden de la consulta (por nombre)
+    pivot = pivot.loc[matrix_df['professional_id'].unique(), matrix_df['service_id'].unique()].astype(bool)
+    
+    prof_names = dict(zip(matrix_df['professional_id'], matrix_df['professional_name']))
+    service_names = dict(zip(matrix_df['service_id'], matrix_df['service_name']))
+    return pivot, prof_names, service_names
+
+
+def diff_assignments(original, edited):
+    """
+    Compara dos matrices de asignación con el mismo índice y columnas
+
+    Returns:
+        tuple: (additions, removals) como listas de (professional_id, service_id)
+    """
+    before = original.to_numpy(dtype=bool)
+    after = edited[original.columns].to_numpy(dtype=bool)
+    
+    added_rows, added_cols = (after & ~before).nonzero()
+    removed_rows, removed_cols = (before & ~after).nonzero()
+    
+    def to_pairs(rows, cols):
+        return [(int(original.index[r]), int(original.columns[c])) for r, c in zip(rows, cols)]
+    
+    return to_pairs(added_rows, added_cols), to_pairs(removed_rows, removed_cols)
+
+
+def render_profesional_servicio():
+    """Vincular profesionales con servicios"""
+    st.markdown("### 🔗 Vincular Profesionales con Servicios")
+    st.markdown("Marca en la matriz qué servicios puede ofrecer cada profesional y guarda todos los cambios juntos")
+    
+    matrix_rows = db.get_assignment_matrix()
+    
+    if not matrix_rows:
+        st.error("❌ Se necesita al menos un profesional y un servicio. Créalos en las secciones Profesionales y Servicios.")
+        return
+    
+    pivot, prof_names, service_names = build_assignment_pivot(matrix_rows)
+    
+    # Columnas como texto para el editor; la etiqueta muestra el nombre del servicio
+    editor_df = pivot.copy()
+    editor_df.columns = [str(sid) for sid in pivot.columns]
+    editor_df.insert(0, 'Profesional', [prof_names[pid] for pid in pivot.index])
+    editor_df.insert(1, 'Servicios', pivot.sum(axis=1).astype(int).to_numpy())
+    
+    column_config = {
+        'Profesional': st.column_config.TextColumn("Profesional", disabled=True),
+        'Servicios': st.column_config.NumberColumn("Servicios", disabled=True, help="Asignados al cargar la matriz")
+    }
+    for sid in pivot.columns:
+        column_config[str(sid)] = st.column_config.CheckboxColumn(service_names[sid])
+    
+    # El formulario evita un rerun por cada casilla: se envía todo al guardar
+    with st.form("assignment_matrix_form"):
+        edited_df = st.data_editor(
+            editor_df,
+            column_config=column_config,
+            hide_index=True,
+            use_container_width=True,
+            num_rows="fixed",
+            key="assignment_matrix"
+        )
+        submitted = st.form_submit_button("💾 Guardar Asignaciones", use_container_width=True)
+    
+    if submitted:
+        edited = edited_df.drop(columns=['Profesional', 'Servicios'])
+        edited.index = pivot.index
+        edited.columns = pivot.columns
+        additions, removals = diff_assignments(pivot, edited)
+        
+        if not additions and not removals:
+            st.info("ℹ️ No hay cambios por guardar")
+        else:
+            success, message = db.apply_professional_service_changes(additions, removals)
+            if success:
+                cache.clear_catalog()
+                st.success(message)
+                st.rerun()
+            else:
+                st.error(message)
+
+
+def render_recursos():
+    """Recursos compartidos (cabinas, sillas, equipos) y los que requiere cada servicio"""
+    st.markdown("### 🪑 Recursos Compartidos")
+    st.markdown("Un horario solo se ofrece si el profesional **y** los recursos del servicio están libres")
+    
+    with st.form("add_resource_form", clear_on_submit=True):
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            name = st.text_input("Nombre", placeholder="Ej: Sillón de pedicure")
+        with col2:
+            kind = st.text_input("Tipo", placeholder="Ej: Cabina, Equipo")
+        with col3:
+            capacity = st.number_input("Capacidad", min_value=1, value=1, step=1,
+                                       help="Citas que pueden usarlo al mismo tiempo")
+        
+        if st.form_submit_button("➕ Agregar Recurso", use_container_width=True):
+            success, message = resources.add_resource(db, name, kind, capacity)
+            if success:
+                cache.clear_catalog()
+                st.success(message)
+            else:
+                st.error(message)
+    
+    resource_list = resources.get_resources(db)
+    if not resource_list:
+        st.info("ℹ️ No hay recursos registrados")
+        return
+    
+    st.markdown("#### 📋 Recursos")
+    resources_df = pd.DataFrame(resource_list).set_index('id')
+    with st.form("resources_form"):
+        edited_df = st.data_editor(
+            resources_df[['name', 'kind', 'capacity', 'active', 'services']],
+            column_config={
+                'name': st.column_config.TextColumn("Nombre", required=True),
+                'kind': st.column_config.TextColumn("Tipo"),
+                'capacity': st.column_config.NumberColumn("Capacidad", min_value=1, step=1, required=True),
+                'active': st.column_config.CheckboxColumn("Activo"),
+                'services': st.column_config.NumberColumn("Servicios", disabled=True)
+            },
+            hide_index=True,
+            use_container_width=True,
+            num_rows="fixed",
+            key="resources_editor"
+        )
+        submitted = st.form_submit_button("💾 Guardar Recursos", use_container_width=True)
+    
+    if submitted:
+        changed = [
+            (resource_id, row) for resource_id, row in edited_df.iterrows()
+            if not row[['name', 'kind', 'capacity', 'active']].equals(
+                resources_df.loc[resource_id, ['name', 'kind', 'capacity', 'active']]
+            )
+        ]
+        if not changed:
+            st.info("ℹ️ No hay cambios por guardar")
+        else:
+            errors = []
+            for resource_id, row in changed:
+                success, message = resources.update_resource(
+                    db, int(resource_id), row['name'], row['kind'], int(row['capacity']), bool(row['active'])
+                )
+                if not success:
+                    errors.append(message)
+            cache.clear_catalog()
+            if errors:
+                for message in errors:
+                    st.error(message)
+            else:
+                st.success(f"✅ {len(changed)} recurso(s) actualizado(s)")
+                st.rerun()
+    
+    st.markdown("---")
+    st.markdown("#### 💅 Recursos por Servicio")
+    
+    services = db.get_services()
+    if not services:
+        st.info("ℹ️ No hay servicios activos")
+        return
+    
+    service = st.selectbox(
+        "Servicio",
+        services,
+        format_func=lambda s: f"{s['name']} ({s.get('category') or 'Sin categoría'})",
+        key="resource_service"
+    )
+    current = resources.get_catalog(db)['requirements'].get(service['id'], {})
+    active_resources = [r for r in resource_list if r['active']]
+    
+    with st.form(f"service_resources_form_{service['id']}"):
+        st.caption("Cantidad de cada recurso que ocupa el servicio durante la cita (0 = no lo requiere)")
+        quantities = {}
+        cols = st.columns(3)
+        for idx, resource in enumerate(active_resources):
+            with cols[idx % 3]:
+                quantities[resource['id']] = st.number_input(
+                    f"{resource['name']} (cap. {resource['capacity']})",
+                    min_value=0,
+                    max_value=int(resource['capacity']),
+                    value=min(current.get(resource['id'], 0), int(resource['capacity'])),
+                    step=1,
+                    key=f"service_resource_{service['id']}_{resource['id']}"
+                )
+        
+        if st.form_submit_button("💾 Guardar Recursos del Servicio", use_container_width=True):
+            success, message = resources.set_service_requirements(db, service['id'], quantities)
+            if success:
+                cache.clear_catalog()
+                st.success(message)
+            else:
+                st.error(message)
+
+
+@st.fragment
+def render_schedule_list(professional_id, start_date, end_date):
+    """
+    Horarios de un profesional en un rango, con botones para eliminarlos
+
+    Corre como fragmento: eliminar un horario solo vuelve a ejecutar el
+    listado en lugar de toda la página de configuración.
+    """
+    # Obtener horarios
+    schedules = db.get_professional_schedules(
+        professional_id=professional_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    if schedules:
+        st.markdown("---")
+
+        # Agrupar por fecha
+        schedules_by_date = {}
+        for sched in schedules:
+            date = sched['date']
+            if date not in schedules_by_date:
+                schedules_by_date[date] = []
+            schedules_by_date[date].append(sched)
+
+        # Mostrar horarios agrupados
+        for date in sorted(schedules_by_date.keys()):
+            day_schedules = schedules_by_date[date]
+
+            # Convertir fecha a nombre del día
+            date_obj = datetime.strptime(date, '%Y-%m-%d')
+            day_name = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo'][date_obj.weekday()]
+
+            with st.expander(f"📅 {date} ({day_name})"):
+                col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+
+                with col1:
+                    st.markdown("**Hora**")
+                with col2:
+                    st.markdown("**Estado**")
+                with col3:
+                    st.markdown("**Acciones**")
+
+                st.markdown("---")
+
+                for sched in day_schedules:
+                    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+
+                    with col1:
+                        st.text(sched['start_time'])
+
+                    with col2:
+                        status = "✅ Disponible" if sched['available'] else "❌ Ocupado"
+                        st.text(status)
+
+                    with col3:
+                        if sched['available']:
+                            if st.button("🗑️ Eliminar", key=f"del_sched_{sched['id']}"):
+                                with db.get_connection() as conn:
+                                    cursor = conn.cursor()
+                                    cursor.execute("DELETE FROM schedules WHERE id = %s", (sched['id'],))
+                                    conn.commit()
+                                st.success("✅ Horario eliminado")
+                                st.rerun(scope="fragment")
+
+                    with col4:
+                        st.text("")
+
+        # Botón para eliminar todos los horarios de este período
+        st.markdown("---")
+        if st.button("🗑️ Eliminar todos los horarios de este período", use_container_width=True):
+            success, message = db.delete_professional_schedules(
+                professional_id=professional_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+            if success:
+                st.success(message)
+                st.rerun(scope="fragment")
+            else:
+                st.error(message)
+    else:
+        st.info("No hay horarios registrados para este período")
+
+
+def render_horarios():
+    """Creación, consulta y estadísticas de horarios"""
+    st.markdown("### ⏰ Gestión de Horarios")
+    
+    # Subtabs para Crear/Ver horarios
+    horario_mode = st.radio(
+        "Modo de Horarios",
+        ["📅 Crear Horarios Masivos", "👁️ Ver Horarios", "📊 Estadísticas"],
+        horizontal=True
+    )
+    
+    # ===== MODO 1: CREAR HORARIOS MASIVOS =====
+    if horario_mode == "📅 Crear Horarios Masivos":
+        st.markdown("#### ➕ Crear Horarios para un Profesional")
+        st.markdown("Genera bloques de disponibilidad para asignar citas")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Seleccionar profesional
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, name FROM professionals WHERE active = TRUE ORDER BY name")
+                professionals = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+            
+            if professionals:
+                prof_options = {p['name']: p['id'] for p in professionals}
+                selected_prof_name = st.selectbox(
+                    "📌 Selecciona Profesional",
+                    list(prof_options.keys()),
+                    key="schedule_prof_select"
+                )
+                selected_prof_id = prof_options[selected_prof_name]
+            else:
+                st.error("❌ No hay profesionales. Crea uno primero.")
+                selected_prof_id = None
+        
+        with col2:
+            st.markdown("")  # Espaciador
+        
+        if selected_prof_id:
+            st.markdown("---")
+            
+            # Parámetros para crear horarios
+            st.markdown("#### ⚙️ Configuración de Horarios")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                start_date = st.date_input(
+                    "📅 Fecha Inicio",
+                    value=datetime.now().date(),
+                    key="schedule_start_date"
+                )
+            
+            with col2:
+                end_date = st.date_input(
+                    "📅 Fecha Fin",
+                    value=datetime.now().date() + timedelta(days=30),
+                    key="schedule_end_date"
+                )
+            
+            with col3:
+                st.markdown("")  # Espaciador
+            
+            st.markdown("---")
+            
+            # Horarios
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                start_time = st.time_input(
+                    "🕐 Hora Inicio",
+                    value=datetime.strptime("08:00", "%H:%M").time(),
+                    key="schedule_start_time"
+                )
+            
+            with col2:
+                end_time = st.time_input(
+                    "🕐 Hora Fin",
+                    value=datetime.strptime("18:00", "%H:%M").time(),
+                    key="schedule_end_time"
+                )
+            
+            st.markdown("---")
+            
+            # Seleccionar días de la semana
+            st.markdown("#### 📆 Días de la Semana")
+            
+            col1, col2, col3, col4 = st.columns(4)
+            
+            days_names = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+            days_selected = []
+            
+            for idx, day_name in enumerate(days_names):
+                if idx < 4:
+                    col = [col1, col2, col3, col4][idx]
+                else:
+                    col = [col1, col2, col3][idx - 4]
+                
+                with col:
+                    if st.checkbox(day_name, value=(idx < 5), key=f"day_{idx}"):
+                        days_selected.append(idx)
+            
+            st.markdown("---")
+            
+            # Botón para crear horarios
+            if st.button("✅ Crear Horarios", use_container_width=True, key="create_schedules_btn", type="primary"):
+                if not days_selected:
+                    st.error("❌ Selecciona al menos un día de la semana")
+                elif start_date > end_date:
+                    st.error("❌ La fecha inicio debe ser menor a la fecha fin")
+                elif start_time >= end_time:
+                    st.error("❌ La hora inicio debe ser menor a la hora fin")
+                else:
+                    # Mostrar información de lo que se va a crear
+                    with st.spinner("⏳ Creando horarios..."):
+                        success, message = db.create_professional_schedules(
+                            professional_id=selected_prof_id,
+                            start_date=start_date.strftime('%Y-%m-%d'),
+                            end_date=end_date.strftime('%Y-%m-%d'),
+                            start_time=start_time.strftime('%H:%M'),
+                            end_time=end_time.strftime('%H:%M'),
+                            days_of_week=days_selected
+                        )
+                    
+                    if success:
+                        # Extraer el número de horarios creados del mensaje
+                        import re
+                        match = re.search(r'(\d+)', message)
+                        num_horarios = int(match.group(1)) if match else 0
+                        
+                        dias_nombres_selected = [days_names[i] for i in days_selected]
+                        
+                        # Mostrar mensaje de éxito detallado
+                        st.success("✅ ¡Horarios creados exitosamente!")
+                        
+                        # Crear un contenedor con detalles
+                        col1, col2, col3 = st.columns(3)
+                        
+                        with col1:
+                            st.metric(
+                                "📊 Horarios Creados",
+                                num_horarios,
+                                delta="bloques de 1 hora"
+                            )
+                        
+                        with col2:
+                            st.metric(
+                                "📅 Rango de Fechas",
+                                f"{start_date.strftime('%d/%m')} - {end_date.strftime('%d/%m/%y')}"
+                            )
+                        
+                        with col3:
+                            st.metric(
+                                "⏰ Horario",
+                                f"{start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}"
+                            )
+                        
+                        # Mostrar resumen en una caja
+                        st.info(
+                            f"""
+                            **📋 Resumen de Horarios Creados:**
+                            
+                            • **Profesional:** {selected_prof_name}
+                            • **Días:** {', '.join(dias_nombres_selected)}
+                            • **Período:** {start_date.strftime('%d de %B de %Y')} → {end_date.strftime('%d de %B de %Y')}
+                            • **Horario Diario:** {start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}
+                            • **Total de Bloques:** {num_horarios} horas
+                            """
+                        )
+                        
+                        st.balloons()
+                    else:
+                        st.error(f"❌ Error al crear horarios: {message}")
+    
+    
+    # ===== MODO 2: VER HORARIOS =====
+    elif horario_mode == "👁️ Ver Horarios":
+        st.markdown("#### 📋 Horarios por Profesional")
+        
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name FROM professionals ORDER BY name")
+            professionals = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+        
+        if professionals:
+            # Seleccionar profesional
+            prof_options = {p['name']: p['id'] for p in professionals}
+            selected_prof_name = st.selectbox(
+                "📌 Profesional",
+                list(prof_options.keys()),
+                key="view_schedule_prof"
+            )
+            selected_prof_id = prof_options[selected_prof_name]
+            
+            # Rango de fechas para visualizar
+            col1, col2 = st.columns(2)
+            with col1:
+                view_start_date = st.date_input(
+                    "Desde",
+                    value=datetime.now().date(),
+                    key="view_start_date"
+                )
+            with col2:
+                view_end_date = st.date_input(
+                    "Hasta",
+                    value=datetime.now().date() + timedelta(days=30),
+                    key="view_end_date"
+                )
+            
+            render_schedule_list(
+                selected_prof_id,
+                view_start_date.strftime('%Y-%m-%d'),
+                view_end_date.strftime('%Y-%m-%d')
+            )
+        else:
+            st.error("No hay profesionales registrados")
+    
+    # ===== MODO 3: ESTADÍSTICAS =====
+    elif horario_mode == "📊 Estadísticas":
+        st.markdown("#### 📊 Estadísticas de Disponibilidad")
+        
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name FROM professionals ORDER BY name")
+            professionals = [dict(zip([desc[0] for desc in cursor.description], row)) for row in cursor.fetchall()]
+        
+        if professionals:
+            # Seleccionar profesional
+            prof_options = {p['name']: p['id'] for p in professionals}
+            selected_prof_name = st.selectbox(
+                "📌 Profesional",
+                list(prof_options.keys()),
+                key="stats_schedule_prof"
+            )
+            selected_prof_id = prof_options[selected_prof_name]
+            
+            # Rango de fechas
+            col1, col2 = st.columns(2)
+            with col1:
+                stats_start_date = st.date_input(
+                    "Desde",
+                    value=datetime.now().date(),
+                    key="stats_start_date"
+                )
+            with col2:
+                stats_end_date = st.date_input(
+                    "Hasta",
+                    value=datetime.now().date() + timedelta(days=30),
+                    key="stats_end_date"
+                )
+            
+            # Obtener estadísticas
+            stats = db.get_schedule_statistics(
+                professional_id=selected_prof_id,
+                start_date=stats_start_date.strftime('%Y-%m-%d'),
+                end_date=stats_end_date.strftime('%Y-%m-%d')
+            )
+            
+            # Mostrar métricas
+            st.markdown("---")
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Total Horarios", stats['total'])
+            
+            with col2:
+                st.metric("Disponibles", stats['available'], delta=f"{stats['utilization_rate']:.1f}% ocupado")
+            
+            with col3:
+                st.metric("Ocupados", stats['occupied'])
+            
+            with col4:
+                st.metric("Tasa Utilización", f"{stats['utilization_rate']:.1f}%")
+            
+            # Gráfico de ocupación
+            st.markdown("---")
+            st.markdown("#### 📈 Gráfico de Ocupación")
+            
+            chart_data = {
+                'Estado': ['Disponibles', 'Ocupados'],
+                'Cantidad': [stats['available'], stats['occupied']]
+            }
+            
+            df_chart = pd.DataFrame(chart_data)
+            st.bar_chart(df_chart.set_index('Estado'))
+        else:
+            st.error("No hay profesionales registrados")
+
+
+def render_respaldo():
+    """Estadísticas del sistema y respaldo"""
+    st.markdown("### 📋 Respaldo y Mantenimiento")
+    
+    st.markdown("#### 📊 Estadísticas del Sistema")
+    
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT COUNT(*) as count FROM professionals WHERE active = TRUE")
+        prof_count = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT COUNT(*) as count FROM services WHERE active = TRUE")
+        svc_count = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT COUNT(*) as count FROM bookings")
+        booking_count = cursor.fetchone()[0]
+        
+        cursor.execute("SELECT COUNT(*) as count FROM professional_services")
+        prof_svc_count = cursor.fetchone()[0]
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Profesionales Activos", prof_count)
+    
+    with col2:
+        st.metric("Servicios Activos", svc_count)
+    
+    with col3:
+        st.metric("Citas Totales", booking_count)
+    
+    with col4:
+        st.metric("Asignaciones Prof-Svc", prof_svc_count)
+    
+    st.markdown("---")
+    st.markdown("#### 💾 Funciones de Respaldo")
+    st.info("Funciones de exportación próximamente disponibles")
+
+
+# Solo se ejecuta la sección elegida (st.tabs ejecutaría todas en cada rerun)
+SECTIONS = {
+    "🛡️ Gestión de Usuarios": render_usuarios,
+    "👥 Profesionales": render_profesionales,
+    "💅 Servicios": render_servicios,
+    "🔗 Profesional-Servicio": render_profesional_servicio,
+    "🪑 Recursos": render_recursos,
+    "⏰ Horarios": render_horarios,
+    "📋 Respaldo": render_respaldo
+}
+
+st.markdown("## ⚙️ Centro de Control - Configuración del Sistema")
+
+section = st.radio(
+    "Sección",
+    list(SECTIONS.keys()),
+    horizontal=True,
+    key="config_section",
+    label_visibility="collapsed"
+)
+
+st.markdown("---")
+
+SECTIONS[section]()
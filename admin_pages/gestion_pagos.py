@@ -0,0 +1,281 @@
+"""
+Vista: Gestión de Pagos
+
+Los totales se calculan en SQL sobre todas las citas filtradas y la tabla
+muestra una página de tamaño fijo (paginación por llave), con una fila por
+cita y su pago más reciente.
+"""
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+
+from admin_pages.common import db
+
+# Citas por página
+PAGE_SIZE = 50
+
+# Filtro de estado → payment_state de Database._booking_payments_filter
+PAYMENT_STATES = {
+    "Todos": None,
+    "Pendiente": 'pending',
+    "Anticipo Pagado": 'confirmed',
+    "Pagado Completo": 'paid'
+}
+
+
+def get_date_bounds(date_range):
+    """Convierte el período seleccionado en (start_date, end_date) YYYY-MM-DD"""
+    today = datetime.now().date()
+    
+    if date_range == "Hoy":
+        return str(today), str(today)
+    if date_range == "Esta Semana":
+        return str(today - timedelta(days=7)), None
+    if date_range == "Este Mes":
+        first_day = today.replace(day=1)
+        next_month = (first_day + timedelta(days=32)).replace(day=1)
+        return str(first_day), str(next_month - timedelta(days=1))
+    if date_range == "Últimos 30 días":
+        return str(today - timedelta(days=30)), None
+    if date_range == "Personalizado":
+        col1, col2 = st.columns(2)
+        with col1:
+            start = st.date_input("Desde", value=today - timedelta(days=30), key="payments_start_date")
+        with col2:
+            end = st.date_input("Hasta", value=today, key="payments_end_date")
+        return str(start), str(end)
+    return None, None
+
+
+def build_payments_frame(rows):
+    """DataFrame numérico de la página; el estado se deriva del monto pendiente"""
+    df = pd.DataFrame(rows)
+    for column in ('total_price', 'deposit_paid', 'pending'):
+        df[column] = pd.to_numeric(df[column]).fillna(0.0)
+    df['professional_name'] = df['professional_name'].fillna('N/A')
+    df['estado'] = np.where(df['pending'] > 0, "⏳ Pendiente", "✅ Pagado")
+    return df
+
+
+def close_payment_form():
+    """Oculta el formulario y limpia la selección de la tabla"""
+    st.session_state.show_payment_form = False
+    st.session_state.payments_table_version = st.session_state.get('payments_table_version', 0) + 1
+
+
+st.markdown("## 💳 Gestión de Pagos")
+
+# Filtros
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    payment_status_filter = st.selectbox(
+        "Estado de Pago",
+        list(PAYMENT_STATES.keys())
+    )
+
+with col2:
+    date_range = st.selectbox(
+        "Período",
+        ["Hoy", "Esta Semana", "Este Mes", "Últimos 30 días", "Personalizado"]
+    )
+
+with col3:
+    min_amount = st.number_input("Monto Mínimo ($)", min_value=0.0, value=0.0)
+
+start_date, end_date = get_date_bounds(date_range)
+
+filters = {
+    'payment_state': PAYMENT_STATES[payment_status_filter],
+    'start_date': start_date,
+    'end_date': end_date,
+    'min_pending': min_amount
+}
+
+# Reiniciar la paginación si cambian los filtros
+filters_key = tuple(filters.values())
+if st.session_state.get('payments_filters_key') != filters_key:
+    st.session_state.payments_filters_key = filters_key
+    st.session_state.payments_cursors = [None]
+    st.session_state.show_payment_form = False
+
+# Calcular estadísticas (en SQL, sobre todas las citas filtradas)
+totals = db.get_booking_payments_totals(**filters)
+
+# Métricas
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric("Total Citas", totals['total_bookings'])
+
+with col2:
+    st.metric("Pendiente de Cobro", f"${totals['total_pending']:,.2f}")
+
+with col3:
+    st.metric("Cobrado", f"${totals['total_collected']:,.2f}")
+
+with col4:
+    st.metric("Valor Total", f"${totals['total_value']:,.2f}")
+
+st.markdown("---")
+
+# Página actual (se pide una fila extra para saber si hay siguiente)
+cursors = st.session_state.payments_cursors
+page_number = len(cursors)
+rows = db.get_booking_payments_page(after=cursors[-1], limit=PAGE_SIZE + 1, **filters)
+has_next = len(rows) > PAGE_SIZE
+payments = rows[:PAGE_SIZE]
+
+# Tabla de pagos
+if payments:
+    st.markdown("### 📋 Detalle de Pagos")
+    
+    df = build_payments_frame(payments)
+    
+    event = st.dataframe(
+        df[['booking_code', 'client_name', 'professional_name', 'date', 'start_time',
+            'total_price', 'deposit_paid', 'pending', 'estado']],
+        column_config={
+            'booking_code': "Cita",
+            'client_name': "Cliente",
+            'professional_name': "Profesional",
+            'date': "Fecha",
+            'start_time': "Hora",
+            'total_price': st.column_config.NumberColumn("Total", format="$%.2f"),
+            'deposit_paid': st.column_config.NumberColumn("Pagado", format="$%.2f"),
+            'pending': st.column_config.NumberColumn("Pendiente", format="$%.2f"),
+            'estado': "Estado"
+        },
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"payments_table_{page_number}_{st.session_state.get('payments_table_version', 0)}"
+    )
+    
+    # Navegación entre páginas
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("⬅️ Anterior", use_container_width=True, disabled=page_number == 1):
+            cursors.pop()
+            st.session_state.show_payment_form = False
+            st.rerun()
+    
+    with col2:
+        first_row = (page_number - 1) * PAGE_SIZE + 1
+        st.caption(f"Página {page_number} · citas {first_row}–{first_row + len(payments) - 1} de {totals['total_bookings']}")
+    
+    with col3:
+        if st.button("Siguiente ➡️", use_container_width=True, disabled=not has_next):
+            last = payments[-1]
+            cursors.append((last['date'], last['start_time'], last['id']))
+            st.session_state.show_payment_form = False
+            st.rerun()
+    
+    # La fila seleccionada abre el formulario de validación
+    selected_rows = event.selection.rows
+    if selected_rows:
+        st.session_state.selected_payment_id = int(df.iloc[selected_rows[0]]['id'])
+        st.session_state.show_payment_form = True
+    else:
+        st.session_state.show_payment_form = False
+    
+    st.markdown("---")
+    
+    # Formulario para validar pago manualmente
+    if 'show_payment_form' in st.session_state and st.session_state.show_payment_form:
+        st.markdown("### ✏️ Validar Pago Manualmente")
+        
+        selected_payment = next((p for p in payments if p['id'] == st.session_state.selected_payment_id), None)
+        
+        if selected_payment:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown(f"**Cita:** {selected_payment['booking_code']}")
+                st.markdown(f"**Cliente:** {selected_payment['client_name']}")
+                st.markdown(f"**Total:** ${selected_payment['total_price']:,.2f}")
+            
+            with col2:
+                st.markdown(f"**Fecha:** {selected_payment['date']}")
+                st.markdown(f"**Hora:** {selected_payment['start_time']}")
+                st.markdown(f"**Pagado:** ${selected_payment['deposit_paid']:,.2f}")
+            
+            st.markdown("---")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                operation_number = st.text_input(
+                    "Número de Operación (Mercado Pago)",
+                    placeholder="Ej: 12345678901",
+                    key=f"operation_{selected_payment['id']}"
+                )
+            
+            with col2:
+                amount_paid = st.number_input(
+                    "Monto Pagado ($)",
+                    min_value=0.0,
+                    value=float(selected_payment['pending']),
+                    key=f"amount_{selected_payment['id']}"
+                )
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                if st.button("✅ Validar Pago", use_container_width=True, key=f"validate_{selected_payment['id']}"):
+                    if operation_number:
+                        # Obtener access token
+                        try:
+                            access_token = st.secrets["mercadopago"]["access_token"]
+                        except (KeyError, TypeError):
+                            st.error("Token de Mercado Pago no configurado")
+                            access_token = None
+                        
+                        if access_token:
+                            # Validar pago
+                            is_valid, payment_data, error = db.validate_mercadopago_payment(
+                                operation_number,
+                                selected_payment['booking_code'],
+                                access_token
+                            )
+                            
+                            if is_valid:
+                                # Confirmar pago
+                                success, msg = db.confirm_payment_with_operation(
+                                    selected_payment['booking_code'],
+                                    operation_number,
+                                    payment_data
+                                )
+                                
+                                if success:
+                                    st.success(f"✅ {msg}")
+                                    close_payment_form()
+                                    st.rerun()
+                                else:
+                                    st.error(f"❌ Error: {msg}")
+                            else:
+                                st.error(f"❌ {error}")
+                    else:
+                        st.error("Por favor ingresa el número de operación")
+            
+            with col2:
+                if st.button("📝 Registrar Manual", use_container_width=True, key=f"manual_{selected_payment['id']}"):
+                    # Registrar pago manual sin validar con MP
+                    if amount_paid > 0:
+                        st.info(f"Pago de ${amount_paid:,.2f} registrado manualmente")
+                        close_payment_form()
+                        st.rerun()
+                    else:
+                        st.error("El monto debe ser mayor a 0")
+            
+            with col3:
+                if st.button("❌ Cancelar", use_container_width=True, key=f"cancel_{selected_payment['id']}"):
+                    close_payment_form()
+                    st.rerun()
+
+else:
+    st.info("No hay pagos que coincidan con los filtros seleccionados")
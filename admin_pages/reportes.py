@@ -0,0 +1,286 @@
+"""Vista: Reportes y Estadísticas"""
+
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+
+import altair as alt
+
+from src import analytics_mirror, cache, demand, revenue_matrix, utilization
+from admin_pages.common import db, load_active_professionals
+
+st.markdown("## 📈 Reportes y Estadísticas")
+
+# Selector de rango de fechas
+col1, col2 = st.columns(2)
+with col1:
+    start_date = st.date_input("Fecha inicial", datetime.now() - timedelta(days=30))
+with col2:
+    end_date = st.date_input("Fecha final", datetime.now())
+
+st.markdown("---")
+
+# Totales por día desde el resumen diario (ver src/rollups.py)
+results = db.get_daily_booking_totals(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+
+if results:
+    # Convertir a DataFrame
+    df = pd.DataFrame(results)
+    
+    # Renombrar columnas
+    df.rename(columns={
+        'booking_date': 'Fecha',
+        'total_bookings': 'Citas',
+        'total_revenue': 'Ingresos',
+        'deposits_collected': 'Anticipos'
+    }, inplace=True)
+    
+    # Asegurar tipos de datos
+    df['Fecha'] = pd.to_datetime(df['Fecha']).dt.strftime('%Y-%m-%d')
+    df['Citas'] = df['Citas'].astype(int)
+    df['Ingresos'] = df['Ingresos'].astype(float)
+    df['Anticipos'] = df['Anticipos'].astype(float)
+    
+    # Métricas generales
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        total_bookings = df['Citas'].sum()
+        st.metric("Total de Citas", f"{int(total_bookings)}")
+    
+    with col2:
+        total_revenue = df['Ingresos'].sum()
+        st.metric("Ingresos Totales", f"${total_revenue:,.2f}")
+    
+    with col3:
+        avg_ticket = total_revenue / total_bookings if total_bookings > 0 else 0
+        st.metric("Ticket Promedio", f"${avg_ticket:,.2f}")
+    
+    st.markdown("---")
+    
+    # Gráfico de ingresos
+    st.markdown("### 💰 Ingresos por Día")
+    st.line_chart(df.set_index('Fecha')['Ingresos'])
+    
+    st.markdown("### 📊 Citas por Día")
+    st.bar_chart(df.set_index('Fecha')['Citas'])
+    
+    # Tabla detallada
+    st.markdown("### 📋 Detalle por Fecha")
+    st.dataframe(df, use_container_width=True)
+else:
+    st.info("No hay datos para el rango seleccionado")
+
+# ==================== UTILIZACIÓN ====================
+# Minutos reservados contra minutos con horario (ver src/utilization.py)
+st.markdown("---")
+st.markdown("### ⏱️ Utilización")
+
+minutes = utilization.load_utilization(db, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+
+if minutes.empty:
+    st.info("No hay horarios ni citas en el rango seleccionado")
+else:
+    st.dataframe(
+        utilization.summary(minutes).drop(columns='professional_id'),
+        column_config={
+            'professional_name': "Profesional",
+            'capacity_minutes': "Minutos con horario",
+            'booked_minutes': "Minutos reservados",
+            'utilization': st.column_config.NumberColumn("Utilización", format="%.1f%%")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    st.markdown("#### 📅 Utilización por Día (%)")
+    st.line_chart(utilization.day_matrix(minutes).T)
+
+    st.markdown("#### 🕐 Utilización por Hora (%)")
+    st.dataframe(
+        utilization.hour_matrix(minutes).round(1),
+        use_container_width=True
+    )
+
+# ==================== DEMANDA POR DÍA Y HORA ====================
+# Matriz día de la semana × hora agrupada en la BD (ver src/demand.py)
+st.markdown("---")
+st.markdown("### 🗓️ Demanda por Día de la Semana y Hora")
+
+professionals = {p['name']: p['id'] for p in load_active_professionals()}
+col1, col2 = st.columns(2)
+with col1:
+    selected_professionals = st.multiselect(
+        "Profesionales", list(professionals), placeholder="Todos", key="demand_professionals"
+    )
+with col2:
+    metric_labels = {'bookings': "Citas", 'revenue': "Ingresos", 'cancellations': "Cancelaciones"}
+    demand_metric = st.radio(
+        "Métrica", list(metric_labels), format_func=metric_labels.get, horizontal=True, key="demand_metric"
+    )
+
+grids = demand.load_demand(
+    db, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'),
+    [professionals[name] for name in selected_professionals]
+)
+
+if not grids['bookings'].values.any() and not grids['cancellations'].values.any():
+    st.info("No hay citas en el rango seleccionado")
+else:
+    label = metric_labels[demand_metric]
+    heatmap = alt.Chart(demand.to_long(grids[demand_metric], label)).mark_rect().encode(
+        x=alt.X('Hora:O'),
+        y=alt.Y('Día:N', sort=demand.WEEKDAYS),
+        color=alt.Color(f'{label}:Q', scale=alt.Scale(scheme='blues')),
+        tooltip=['Día', 'Hora', f'{label}:Q']
+    )
+    st.altair_chart(heatmap, use_container_width=True)
+
+# ==================== COMPARATIVO DE PERIODOS ====================
+# Rango actual vs periodo anterior vs mismo rango del año pasado, en una
+# consulta sobre el resumen diario y en caché por (rango, filtros)
+st.markdown("---")
+st.markdown("### 🔁 Comparativo de Periodos")
+
+PERIOD_LABELS = {'current': "Actual", 'previous': "Periodo anterior", 'last_year': "Año anterior"}
+DIMENSION_LABELS = {'day': "Día", 'professional': "Profesional", 'category': "Categoría"}
+
+categories = {c['name']: c['id'] for c in cache.load_active_categories()}
+col1, col2, col3 = st.columns(3)
+with col1:
+    comparison_dimension = st.radio(
+        "Agrupar por", list(DIMENSION_LABELS), format_func=DIMENSION_LABELS.get,
+        horizontal=True, key="comparison_dimension"
+    )
+with col2:
+    comparison_professionals = st.multiselect(
+        "Profesionales", list(professionals), placeholder="Todos", key="comparison_professionals"
+    )
+with col3:
+    comparison_categories = st.multiselect(
+        "Categorías", list(categories), placeholder="Todas", key="comparison_categories"
+    )
+
+comparison = pd.DataFrame(cache.load_period_comparison(
+    start_date, end_date, comparison_dimension,
+    [professionals[name] for name in comparison_professionals],
+    [categories[name] for name in comparison_categories]
+))
+
+if comparison.empty:
+    st.info("No hay datos para comparar en el rango seleccionado")
+else:
+    comparison['period'] = comparison['period'].map(PERIOD_LABELS)
+    wide = comparison.pivot_table(
+        index=['key', 'label'], columns='period', values=['revenue', 'bookings'], aggfunc='sum'
+    ).reindex(columns=list(PERIOD_LABELS.values()), level=1).fillna(0)
+    wide.index = wide.index.droplevel('key')
+    
+    # Totales y variaciones del rango completo
+    totals = wide['revenue'].sum()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Ingresos (actual)", f"${totals['Actual']:,.2f}")
+    for column, period in ((col2, "Periodo anterior"), (col3, "Año anterior")):
+        delta = (totals['Actual'] - totals[period]) / totals[period] * 100 if totals[period] else None
+        column.metric(f"Ingresos ({period.lower()})", f"${totals[period]:,.2f}",
+                      f"{delta:+.1f}%" if delta is not None else None)
+    
+    if comparison_dimension == 'day':
+        st.line_chart(wide['revenue'])
+    else:
+        st.bar_chart(wide['revenue'], stack=False)
+    
+    table = wide['revenue'].rename(columns=lambda period: f"Ingresos {period.lower()}")
+    table['Citas actual'] = wide['bookings']['Actual'].astype(int)
+    for period in ("Periodo anterior", "Año anterior"):
+        previous = wide['revenue'][period]
+        table[f"Var. vs {period.lower()} %"] = ((wide['revenue']['Actual'] - previous) / previous * 100).where(previous > 0).round(1)
+    st.dataframe(table.rename_axis(DIMENSION_LABELS[comparison_dimension]), use_container_width=True)
+
+# ==================== PROFESIONAL × SERVICIO ====================
+# Una agregación en caché; cambiar valor u orden solo reacomoda la matriz
+st.markdown("---")
+st.markdown("### 💼 Ingresos por Profesional y Servicio")
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    matrix_by = st.radio(
+        "Columnas", ['service', 'category'], format_func={'service': "Servicio", 'category': "Categoría"}.get,
+        horizontal=True, key="matrix_by"
+    )
+with col2:
+    matrix_value = st.radio(
+        "Valor", list(revenue_matrix.VALUES), format_func={'revenue': "Ingresos", 'services': "Servicios"}.get,
+        horizontal=True, key="matrix_value"
+    )
+
+matrix_rows = cache.load_professional_service_revenue(start_date, end_date, matrix_by)
+
+if not matrix_rows:
+    st.info("No hay servicios realizados en el rango seleccionado")
+else:
+    matrix = revenue_matrix.build_matrix(matrix_rows, matrix_value)
+    with col3:
+        matrix_sort = st.selectbox("Ordenar por", list(matrix.columns[::-1]), key="matrix_sort")
+    matrix = revenue_matrix.sort_matrix(matrix, matrix_sort)
+    
+    number_format = "$%.2f" if matrix_value == 'revenue' else "%d"
+    st.dataframe(
+        matrix,
+        column_config={column: st.column_config.NumberColumn(str(column), format=number_format) for column in matrix.columns},
+        use_container_width=True
+    )
+
+# ==================== ESPEJO ANALÍTICO ====================
+# Desgloses sobre la copia en DuckDB (ver src/analytics_mirror.py) para no
+# escanear las tablas transaccionales
+st.markdown("---")
+st.markdown("### 🦆 Desglose desde el Espejo Analítico")
+
+if not analytics_mirror.is_available():
+    st.info("ℹ️ Instala DuckDB para habilitar el espejo analítico: pip install duckdb")
+else:
+    mirror = analytics_mirror.get_mirror()
+    
+    # El panel solo lee el espejo; lo sincroniza un proceso aparte
+    try:
+        last_synced = mirror.last_synced()
+        if last_synced:
+            range_args = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            professional_data = mirror.professional_breakdown(*range_args)
+            service_data = mirror.service_breakdown(*range_args)
+    except analytics_mirror.MirrorBusy:
+        st.info("ℹ️ El espejo analítico se está sincronizando. Recarga la página en unos segundos.")
+        last_synced = None
+    else:
+        if last_synced:
+            st.caption(f"Última sincronización: {last_synced:%Y-%m-%d %H:%M}")
+        else:
+            st.info("ℹ️ El espejo aún no se ha sincronizado. Ejecuta: python -m src.analytics_mirror --interval 10")
+    
+    if last_synced:
+        st.markdown("#### 👥 Por Profesional")
+        st.dataframe(
+            professional_data,
+            column_config={
+                'professional': "Profesional",
+                'status': "Estado",
+                'bookings': "Citas",
+                'revenue': st.column_config.NumberColumn("Ingresos", format="$%.2f"),
+                'deposits': st.column_config.NumberColumn("Anticipos", format="$%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        st.markdown("#### 💅 Por Servicio")
+        st.dataframe(
+            service_data,
+            column_config={
+                'service': "Servicio",
+                'times_booked': "Veces",
+                'revenue': st.column_config.NumberColumn("Ingresos", format="$%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
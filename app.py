@@ -3,8 +3,9 @@ import requests
 import json
 import os
 import src.notifications
+import uuid
 from datetime import datetime, timedelta
-from src.database import Database
+from src import cache, clients, contact_lookup, loyalty, payments_service, resources, waitlist
 
 # Configuración de la página
 st.set_page_config(
@@ -84,11 +85,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Inicializar base de datos
-def init_db():
-    return Database()
+# Inicializar base de datos (compartida entre sesiones, ver src/cache.py)
+db = cache.get_db_or_stop()
 
-db = init_db()
+# Espera máxima por el enlace de pago en cada ejecución del botón
+PAYMENT_LINK_WAIT_SECONDS = 3
 
 # Inicializar session state
 if 'cart' not in st.session_state:
@@ -101,8 +102,6 @@ if 'selected_slot' not in st.session_state:
     st.session_state.selected_slot = None
 if 'client_info' not in st.session_state:
     st.session_state.client_info = {}
-if 'user_points' not in st.session_state:
-    st.session_state.user_points = 250
 if 'selected_category' not in st.session_state:
     st.session_state.selected_category = None
 if 'current_booking_code' not in st.session_state:
@@ -149,10 +148,8 @@ def calculate_available_slots(date, services):
     
     all_professionals = []
     for service in services:
-        profs = db.get_professionals_for_service(service['id'])
-        for prof_id in profs:
-            prof_info = db.get_professional_by_id(prof_id)
-            if prof_info and prof_info not in all_professionals:
+        for prof_info in cache.load_professionals_for_service(service['id']):
+            if prof_info not in all_professionals:
                 all_professionals.append(prof_info)
     
     if not all_professionals:
@@ -161,14 +158,19 @@ def calculate_available_slots(date, services):
     slots = []
     total_duration = get_total_duration()
     
+    # Recursos compartidos (cabinas, equipos) que ocupa la cita
+    needed = resources.requirements_for(cache.load_resource_catalog()['requirements'], service_ids)
+    occupancy = cache.load_day_occupancy(date) if needed else None
+    
     for prof in all_professionals:
-        schedule = db.get_professional_schedule(prof['id'], date)
+        availability = cache.load_day_availability(prof['id'], date)
+        schedule = availability['schedule']
         
         if not schedule:
             continue
         
         # Obtener citas confirmadas del profesional para esa fecha
-        booked_slots = db.get_professional_bookings_by_date(prof['id'], date)
+        booked_slots = availability['bookings']
         
         for start_time in schedule:
             start_hour, start_min = map(int, start_time.split(':'))
@@ -198,6 +200,10 @@ def calculate_available_slots(date, services):
                         is_available = False
                         break
                 
+                # Validar que los recursos requeridos estén libres
+                if is_available and needed and not occupancy.fits(needed, start_minutes, end_minutes):
+                    is_available = False
+                
                 if is_available:
                     slots.append({
                         'start_time': start_time,
@@ -236,93 +242,51 @@ def send_webhook_to_n8n(booking_data):
         st.warning(f"⚠️ No se pudo enviar notificación: {str(e)}")
         return False
 
-def create_mercadopago_preference(booking_data):
+@st.fragment
+def render_payment_button(booking_data, label):
     """
-    Crea preferencia de pago en Mercado Pago
-    
-    CONFIGURACIÓN REQUERIDA:
-    1. Obtén tu Access Token en: https://www.mercadopago.com/developers/panel
-    2. Reemplaza 'TU_ACCESS_TOKEN_AQUI' con tu token real
-    3. La URL de retorno se configurará automáticamente
+    Muestra el botón de pago con el enlace de Mercado Pago
+
+    El enlace se genera en segundo plano (src.payments_service) para el monto
+    del anticipo de `booking_data`; aquí se espera unos segundos como máximo.
+    Si sigue pendiente o falla, el botón de actualizar/reintentar vuelve a
+    ejecutar solo este fragmento (sin sondeo periódico).
     """
-    
-    try:
-        from mercadopago.sdk import SDK
-    except ImportError:
-        st.error("❌ Mercado Pago SDK no está instalado. Ejecuta: pip install mercado-pago")
-        return None
-    
-    # ⚠️ IMPORTANTE: Reemplaza esto con tu Access Token real
-    # Obtén tu token en: https://www.mercadopago.com/developers/panel/credentials
-    ACCESS_TOKEN = os.getenv("MERCADOPAGO_ACCESS_TOKEN")
-    
-    # Validar que el token sea válido
-    if ACCESS_TOKEN == "ACCESS_TOKEN":
-        st.warning("""
-        ⚠️ **MERCADO PAGO NO CONFIGURADO**
-        
-        Para activar los pagos:
-        1. Ve a: https://www.mercadopago.com/developers/panel/credentials
-        2. Copia tu Access Token
-        3. En app.py, línea ~199, reemplaza: `ACCESS_TOKEN = "TU_ACCESS_TOKEN_AQUI"`
-        4. Pegua tu token real
-        5. Guarda y reinicia la app
-        """)
-        # Retornar URL de prueba para demostración
-        booking_code = booking_data.get('booking_code', 'unknown')
-        return f"https://www.mercadopago.com.mx/checkout/v1/redirect?preference-id=demo&reference={booking_code}"
-    
-    try:
-        # Inicializar cliente de Mercado Pago
-        sdk = SDK(ACCESS_TOKEN)
-        
-        booking_code = booking_data.get('booking_code', 'unknown')
-        deposit = booking_data.get('payment', {}).get('deposit', 0)
-        
-        # Crear datos de la preferencia
-        preference_data = {
-            "items": [{
-                "title": f"Anticipo - {booking_data['client']['name']}",
-                "description": f"Servicios: {', '.join([s['name'] for s in booking_data['services']])}",
-                "quantity": 1,
-                "currency_id": "MXN",
-                "unit_price": float(deposit)
-            }],
-            "payer": {
-                "name": booking_data['client']['name'],
-                "email": booking_data['client']['email'],
-                "phone": {
-                    "area_code": "52",
-                    "number": booking_data['client']['phone']
-                }
-            },
-            "external_reference": booking_code,
-            "back_urls": {
-                "success": "https://tu-dominio.com/success",
-                "failure": "https://tu-dominio.com/failure",
-                "pending": "https://tu-dominio.com/pending"
-            },
-            "auto_return": "approved",
-            "notification_url": "https://tu-dominio.com/webhook/mercadopago"
-        }
-        
-        # Crear la preferencia
-        preference_response = sdk.preference().create(preference_data)
-        preference = preference_response["response"]
-        
-        if preference and "id" in preference:
-            # Retornar el init_point (enlace de pago)
-            init_point = preference.get("init_point")
-            st.session_state.last_payment_preference_id = preference.get("id")
-            return init_point
-        else:
-            st.error("❌ Error al crear preferencia de Mercado Pago")
-            return None
-            
-    except Exception as e:
-        st.error(f"❌ Error de Mercado Pago: {str(e)}")
-        return None
-    
+    booking_code = booking_data['booking_code']
+    amount = booking_data['payment']['deposit']
+    
+    payment_url, error = payments_service.get_payment_link(db, booking_code, amount)
+    if not payment_url and not error:
+        # Reutiliza la creación en curso o crea la preferencia para este monto
+        payments_service.submit_preference(db, booking_data)
+        payment_url, error = payments_service.get_payment_link(
+            db, booking_code, amount, timeout=PAYMENT_LINK_WAIT_SECONDS
+        )
+
+    if error:
+        st.error(f"❌ {error}")
+        st.button("🔄 Reintentar", key=f"retry_payment_{booking_code}")
+        return
+
+    if not payment_url:
+        st.info("⏳ Generando tu enlace de pago...")
+        st.button("🔄 Actualizar", key=f"refresh_payment_{booking_code}")
+        return
+
+    if not payments_service.is_configured():
+        st.warning("⚠️ **MERCADO PAGO NO CONFIGURADO** - Configura MERCADOPAGO_ACCESS_TOKEN para activar los pagos. Se muestra un enlace de prueba.")
+
+    st.markdown(f"""
+    <a href='{payment_url}' target='_blank'>
+        <button style='background: linear-gradient(135deg, #EC4899 0%, #A855F7 100%);
+                       color: white; padding: 1rem 2rem; border: none; border-radius: 12px;
+                       font-size: 1.1rem; font-weight: bold; cursor: pointer; width: 100%;
+                       margin-top: 1rem;'>
+            {label}
+        </button>
+    </a>
+    """, unsafe_allow_html=True)
+
 
 # ==================== VISTAS ====================
 
@@ -357,6 +321,42 @@ def render_home():
 # REEMPLAZAR en app.py: función render_services()
 # ============================================
 
+def render_service_search(query):
+    """Resultados de búsqueda de servicios y categorías"""
+    results = cache.load_search(query, kinds=('service', 'category'), limit=12)
+    
+    if not results:
+        st.info("📭 No encontramos servicios con esa búsqueda")
+        return
+    
+    matched_categories = [r for r in results if r['kind'] == 'category']
+    if matched_categories:
+        cols = st.columns(min(len(matched_categories), 4))
+        for idx, result in enumerate(matched_categories):
+            with cols[idx % len(cols)]:
+                if st.button(f"{result['detail'] or '📁'} {result['label']}", key=f"search_category_{result['id']}",
+                             use_container_width=True):
+                    st.session_state.selected_category = result['id']
+                    st.rerun()
+    
+    # Los datos completos del servicio vienen del catálogo en caché
+    for result in results:
+        if result['kind'] != 'service' or not result['category_id']:
+            continue
+        service = next((s for s in cache.load_services_by_category(result['category_id'])
+                        if s['id'] == result['id']), None)
+        if not service:
+            continue
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown(f"**{service['name']}** · ${service['price']} · ⏱️ {service['duration']} min")
+            st.caption(result['detail'] or '')
+        with col2:
+            if st.button("✅ Agregar", key=f"search_add_{service['id']}", use_container_width=True):
+                add_to_cart(service)
+                st.rerun()
+
 def render_services():
     """Vista de servicios con categorías desde tabla de BD"""
     if st.button("← Volver", key="back_to_home"):
@@ -371,12 +371,19 @@ def render_services():
         st.session_state.selected_category = None
     
     # CAMBIO 1: Obtener categorías desde tabla
-    categories = db.get_active_categories()
+    categories = cache.load_active_categories()
     
     if not categories:
         st.warning("⚠️ No hay categorías disponibles")
         return
     
+    # Búsqueda difusa (tolera errores de dedo y acentos)
+    query = st.text_input("🔎 Buscar servicio", placeholder="Ej: manicure, tinte, facial...",
+                          key="service_search")
+    if query.strip():
+        render_service_search(query)
+        st.markdown("---")
+    
     # Mostrar botones de categorías
     st.markdown("### 📁 Selecciona una Categoría")
     
@@ -415,7 +422,7 @@ def render_services():
         
         if selected_category:
             # CAMBIO 4: Obtener servicios de la categoría
-            category_services = db.get_services_by_category(selected_cat_id)
+            category_services = cache.load_services_by_category(selected_cat_id)
             
             st.markdown(f"### {selected_category['icon']} Servicios en {selected_category['name']}")
             st.markdown("---")
@@ -521,6 +528,19 @@ def render_cart():
             if st.button("❌ Eliminar", key=f"remove_{service['id']}", use_container_width=True):
                 remove_from_cart(service['id'])
     
+    # Sugerencias precalculadas (ver src/combos.py)
+    suggestions = cache.load_combo_suggestions([s['id'] for s in st.session_state.cart])
+    if suggestions:
+        st.markdown("---")
+        st.markdown("#### 💡 Frecuentemente reservados juntos")
+        cols = st.columns(len(suggestions))
+        for col, service in zip(cols, suggestions):
+            with col:
+                st.markdown(f"**{service['name']}** - ${service['price']} | ⏱️ {service['duration']} min")
+                if st.button("➕ Agregar", key=f"suggest_{service['id']}", use_container_width=True):
+                    add_to_cart(service)
+                    st.rerun()
+    
     st.markdown("---")
     st.markdown(f"### Total: ${get_total_price()} MXN")
     st.markdown(f"### Duración total: {get_total_duration()} minutos")
@@ -530,6 +550,55 @@ def render_cart():
         st.session_state.current_view = 'calendar'
         st.rerun()
 
+def render_waitlist_form(selected_date):
+    """Formulario para anotarse en la lista de espera (ver src/waitlist.py)"""
+    # Profesionales que pueden hacer todos los servicios del carrito
+    professionals = None
+    for service in st.session_state.cart:
+        options = {p['id']: p['name'] for p in cache.load_professionals_for_service(service['id'])}
+        professionals = options if professionals is None else {
+            pid: name for pid, name in professionals.items() if pid in options
+        }
+    professionals = professionals or {}
+    
+    with st.expander("📝 Avísame si se libera un espacio", expanded=True):
+        st.caption("Te enviaremos un correo cuando se cancele una cita que te acomode")
+        with st.form("waitlist_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                name = st.text_input("Nombre", key="waitlist_name")
+                phone = st.text_input("Teléfono", key="waitlist_phone")
+                email = st.text_input("Email", key="waitlist_email")
+            with col2:
+                date_range = st.date_input(
+                    "Fechas que te acomodan",
+                    value=waitlist.default_range(selected_date),
+                    min_value=datetime.now().date(),
+                    key="waitlist_dates"
+                )
+                professional_id = st.selectbox(
+                    "Profesional",
+                    [None] + list(professionals),
+                    format_func=lambda pid: "Cualquiera" if pid is None else professionals[pid],
+                    key="waitlist_professional"
+                )
+            submitted = st.form_submit_button("📝 Anotarme", use_container_width=True)
+        
+        if submitted:
+            if not name.strip() or len(date_range) != 2:
+                st.error("❌ Completa tu nombre y el rango de fechas")
+                return
+            
+            success, result = waitlist.add_entry(
+                db, name.strip(), phone, email,
+                [s['id'] for s in st.session_state.cart],
+                date_range[0], date_range[1], professional_id
+            )
+            if success:
+                st.success("✅ ¡Listo! Te avisaremos por correo si se libera un espacio")
+            else:
+                st.error(result)
+
 def render_calendar():
     """Vista de selección de fecha y hora"""
     # Agregar CSS para mejorar responsive
@@ -591,6 +660,7 @@ def render_calendar():
         
         if not slots:
             st.warning("⚠️ No hay horarios disponibles para esta fecha con estos servicios.")
+            render_waitlist_form(st.session_state.selected_date['date'])
         else:
             st.markdown("### 🕐 Horarios disponibles")
             
@@ -740,6 +810,8 @@ def render_checkout():
             if not success_schedule:
                 st.warning(f"⚠️ Aviso: {msg_schedule}")
         
+        cache.invalidate_availability(prof.get('id'), st.session_state.selected_date['date'])
+        
         booking_data = {
             'booking_id': booking_id,
             'booking_code': booking_code,
@@ -764,14 +836,13 @@ def render_checkout():
             }
         }
         
-        payment_url = create_mercadopago_preference(booking_data)
+        # La preferencia de Mercado Pago se crea en segundo plano
+        payments_service.submit_preference(db, booking_data)
         #send_webhook_to_n8n(booking_data)
         
         #Test de correo en Python
         src.notifications.enviar_confirmacion_cita(booking_data=booking_data)
 
-        st.session_state.user_points += int(total)
-        
         st.success("✅ ¡Reserva creada exitosamente!")
         
         st.markdown(f"""
@@ -787,16 +858,9 @@ def render_checkout():
         💡 **Guarda tu código de cita** - lo necesitarás para cancelar o cambiar tu cita.
         """)
         
-        st.markdown(f"""
-        <a href='{payment_url}' target='_blank'>
-            <button style='background: linear-gradient(135deg, #EC4899 0%, #A855F7 100%);
-                           color: white; padding: 1rem 2rem; border: none; border-radius: 12px;
-                           font-size: 1.1rem; font-weight: bold; cursor: pointer; width: 100%;
-                           margin-top: 1rem;'>
-                💳 Pagar Anticipo de ${deposit:.0f} MXN
-            </button>
-        </a>
-        """, unsafe_allow_html=True)
+        st.caption(f"⭐ Ganarás {loyalty.points_for(total):,} puntos cuando se confirme tu cita")
+        
+        render_payment_button(booking_data, f"💳 Pagar Anticipo de ${deposit:.0f} MXN")
         
         st.caption("Serás redirigido a Mercado Pago para completar el pago de forma segura")
         
@@ -805,6 +869,63 @@ def render_checkout():
         st.session_state.selected_date = None
         st.session_state.selected_slot = None
 
+def select_booking_code(booking_code):
+    """Callback: carga el código encontrado en el campo de búsqueda"""
+    st.session_state.booking_code_input = booking_code
+
+def render_forgot_code():
+    """Búsqueda de citas por teléfono + email para quien perdió su código"""
+    with st.expander("🤔 ¿Olvidaste tu código?"):
+        st.caption("Ingresa el teléfono y el email con los que reservaste")
+        with st.form("forgot_code_form"):
+            phone = st.text_input("Teléfono", key="forgot_code_phone")
+            email = st.text_input("Email", key="forgot_code_email")
+            submitted = st.form_submit_button("🔎 Buscar mis citas")
+        
+        if submitted:
+            if not phone.strip() or not email.strip():
+                st.error("❌ Necesitamos ambos datos para buscar tus citas")
+                return
+            
+            if 'lookup_session_id' not in st.session_state:
+                st.session_state.lookup_session_id = uuid.uuid4().hex
+            # El contacto cuenta ligado a quien busca (IP o, si no hay, la
+            # sesión): nadie más puede agotar el límite de un cliente
+            session_key = f"session:{st.session_state.lookup_session_id}"
+            ip_address = st.context.ip_address
+            keys = contact_lookup.lookup_keys(
+                f"ip:{ip_address}" if ip_address else session_key, session_key,
+                phone=clients.normalize_phone(phone), email=clients.normalize_email(email)
+            )
+            allowed, message = contact_lookup.check_rate(db, keys)
+            if not allowed:
+                st.warning(message)
+                return
+            
+            st.session_state.forgot_code_results = cache.load_bookings_by_contact(phone, email, require_both=True)
+        
+        results = st.session_state.get('forgot_code_results')
+        if results is None:
+            return
+        if not results['upcoming'] and not results['recent']:
+            st.info("No encontramos citas con esos datos")
+            return
+        
+        for title, bookings in (("📅 Próximas", results['upcoming']), ("🕘 Recientes", results['recent'])):
+            if not bookings:
+                continue
+            st.markdown(f"**{title}**")
+            for booking in bookings:
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.caption(
+                        f"`{booking['booking_code']}` · {booking['date']} {str(booking['start_time'])[:5]} · "
+                        f"{booking['services'] or ''} · {booking['status'].upper()}"
+                    )
+                with col2:
+                    st.button("Ver", key=f"forgot_code_{booking['booking_code']}",
+                              on_click=select_booking_code, args=(booking['booking_code'],))
+
 def render_manage_booking():
     """Vista para gestionar cita (cancelar, cambiar, ver estado)"""
     if st.button("← Volver al Inicio", key="back_to_home_manage"):
@@ -815,6 +936,7 @@ def render_manage_booking():
     st.markdown("---")
     
     st.markdown("### Ingresa tu código de cita")
+    render_forgot_code()
     booking_code = st.text_input(
         "Código de cita (ejemplo: BC-202501-A7K3M)",
         placeholder="BC-XXXXXX-XXXXX",
@@ -837,6 +959,9 @@ def render_manage_booking():
             **Estado:** {booking['status'].upper()}
             """)
             
+            balance = db.get_loyalty_balance(booking.get('client_id'))
+            st.caption(f"⭐ Tienes **{balance['points']:,}** puntos acumulados")
+            
             # Mostrar detalles de servicios
             services = db.get_booking_services(booking['id'])
             
@@ -977,38 +1102,23 @@ def render_pay_deposit():
         }
     }
     
-    # Crear preferencia de Mercado Pago
-    payment_url = create_mercadopago_preference(booking_data)
+    st.markdown("### 💳 Proceder al Pago")
+    st.markdown(f"""
+    Haz clic en el botón para ir a Mercado Pago y confirmar tu pago de **${required_deposit:.2f} MXN**
+    """)
     
-    if payment_url:
-        st.markdown("### 💳 Proceder al Pago")
-        st.markdown(f"""
-        Haz clic en el botón para ir a Mercado Pago y confirmar tu pago de **${required_deposit:.2f} MXN**
-        """)
-        
-        # Botón personalizado hacia Mercado Pago (igual que en checkout)
-        st.markdown(f"""
-        <a href='{payment_url}' target='_blank'>
-            <button style='background: linear-gradient(135deg, #EC4899 0%, #A855F7 100%);
-                           color: white; padding: 1rem 2rem; border: none; border-radius: 12px;
-                           font-size: 1.1rem; font-weight: bold; cursor: pointer; width: 100%;
-                           margin-top: 1rem;'>
-                💳 Pagar ${required_deposit:.2f} MXN en Mercado Pago
-            </button>
-        </a>
-        """, unsafe_allow_html=True)
-        
-        st.markdown("---")
-        st.info("""
-        **Después de pagar:**
-        
-        1. Recibirás confirmación en Mercado Pago
-        2. Tu depósito será registrado automáticamente
-        3. Recibirás confirmación por email
-        4. En caso de dudas, ingresa tu código de cita en "Gestiona tu Cita"
-        """)
-    else:
-        st.error("❌ No se pudo procesar el pago. Intenta más tarde.")
+    # Botón hacia Mercado Pago; si el enlace guardado es de otro monto se crea uno nuevo
+    render_payment_button(booking_data, f"💳 Pagar ${required_deposit:.2f} MXN en Mercado Pago")
+    
+    st.markdown("---")
+    st.info("""
+    **Después de pagar:**
+    
+    1. Recibirás confirmación en Mercado Pago
+    2. Tu depósito será registrado automáticamente
+    3. Recibirás confirmación por email
+    4. En caso de dudas, ingresa tu código de cita en "Gestiona tu Cita"
+    """)
 
 
 
@@ -1162,6 +1272,8 @@ def render_cancel_booking():
                     )
                     if not success_schedule:
                         st.warning(f"⚠️ Aviso al liberar horario: {msg_schedule}")
+                    
+                    cache.invalidate_availability(booking['professional_id'], booking['date'])
                 
                 # ========== NUEVO: Preparar datos para el correo ==========
                 booking_data = {
@@ -1280,14 +1392,16 @@ def render_reschedule_booking():
             # Obtener profesional de la cita actual
             professional_id = booking['professional_id']
             
+            availability = cache.load_day_availability(professional_id, new_date)
+            
             # Obtener citas confirmadas del profesional para esa fecha (EXCLUIR la cita actual)
-            booked_slots = db.get_professional_bookings_by_date(professional_id, new_date)
+            booked_slots = availability['bookings']
             
             # Filtrar para excluir la cita actual del usuario
             booked_slots = [slot for slot in booked_slots if slot['booking_code'] != booking_code]
             
             # Obtener horarios disponibles del profesional
-            available_times = db.get_professional_schedule(professional_id, new_date)
+            available_times = availability['schedule']
             
             if available_times:
                 # Filtrar horarios que no tengan conflicto con otras citas
@@ -1304,6 +1418,13 @@ def render_reschedule_booking():
                 current_end_minutes = current_end_h * 60 + current_end_m
                 duration = current_end_minutes - current_start_minutes
                 
+                # Recursos de la cita; su propio uso no cuenta como ocupado
+                needed = resources.requirements_for(
+                    cache.load_resource_catalog()['requirements'],
+                    [service['service_id'] for service in db.get_booking_services(booking['id'])]
+                )
+                occupancy = cache.load_day_occupancy(new_date, exclude_booking_id=booking['id']) if needed else None
+                
                 for time_slot in available_times:
                     # Convertir hora propuesta a minutos
                     slot_h, slot_m = map(int, time_slot.split(':'))
@@ -1328,6 +1449,9 @@ def render_reschedule_booking():
                             is_available = False
                             break
                     
+                    if is_available and needed and not occupancy.fits(needed, slot_start_minutes, slot_end_minutes):
+                        is_available = False
+                    
                     if is_available:
                         filtered_times.append(time_slot)
                 
@@ -1378,6 +1502,9 @@ def render_reschedule_booking():
                             )
 
                             if success:
+                                cache.invalidate_availability(professional_id, booking['date'])
+                                cache.invalidate_availability(professional_id, new_date)
+                                
                                 st.success(f"""
                                 ✅ {message}
                                 
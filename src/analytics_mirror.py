@@ -0,0 +1,506 @@
+"""
+Espejo analítico local (DuckDB) para reportes pesados
+
+Copia de forma incremental `bookings`, `booking_services`, `payments` y
+`schedules` a un archivo DuckDB columnar, usando `updated_at` como marca de
+agua por tabla, y replica los borrados desde `analytics_deletions`. Los
+reportes del panel consultan el espejo, así que los escaneos grandes no
+compiten con las escrituras de reservas en PostgreSQL.
+
+DuckDB admite un solo proceso escritor por archivo y ningún lector mientras
+escribe: solo este comando sincroniza, y el panel de admin abre el archivo
+en modo de solo lectura. Ambos abren el archivo solo mientras lo usan, así
+que el panel no puede leer durante una sincronización (ver MirrorBusy).
+
+Uso:
+    python -m src.analytics_mirror --sync
+    python -m src.analytics_mirror --interval 10
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+DEFAULT_PATH = os.getenv('ANALYTICS_MIRROR_PATH', os.path.join('data', 'analytics.duckdb'))
+DEFAULT_INTERVAL_MINUTES = 10
+
+# Filas por lote al copiar desde PostgreSQL
+BATCH_SIZE = 50000
+
+# Se vuelve a leer este margen antes de la marca de agua: updated_at es la
+# hora de inicio de la transacción y una transacción larga puede confirmar
+# filas con una hora anterior a la última sincronización
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Días que se conservan los registros de borrados en PostgreSQL
+DELETIONS_RETENTION_DAYS = 30
+
+# Tablas copiadas incrementalmente: (columna, tipo en DuckDB)
+MIRRORED_TABLES = {
+    'bookings': [
+        ('id', 'INTEGER'),
+        ('booking_code', 'VARCHAR'),
+        ('client_name', 'VARCHAR'),
+        ('client_phone', 'VARCHAR'),
+        ('client_email', 'VARCHAR'),
+        ('date', 'DATE'),
+        ('start_time', 'TIME'),
+        ('end_time', 'TIME'),
+        ('professional_id', 'INTEGER'),
+        ('total_price', 'DOUBLE'),
+        ('deposit_paid', 'DOUBLE'),
+        ('status', 'VARCHAR'),
+        ('created_at', 'TIMESTAMP'),
+        ('updated_at', 'TIMESTAMP')
+    ],
+    'booking_services': [
+        ('id', 'INTEGER'),
+        ('booking_id', 'INTEGER'),
+        ('service_id', 'INTEGER'),
+        ('service_name', 'VARCHAR'),
+        ('service_price', 'DOUBLE'),
+        ('updated_at', 'TIMESTAMP')
+    ],
+    'payments': [
+        ('id', 'INTEGER'),
+        ('booking_code', 'VARCHAR'),
+        ('booking_id', 'INTEGER'),
+        ('amount', 'DOUBLE'),
+        ('payment_method', 'VARCHAR'),
+        ('payment_status', 'VARCHAR'),
+        ('mercado_pago_id', 'VARCHAR'),
+        ('verified', 'BOOLEAN'),
+        ('created_at', 'TIMESTAMP'),
+        ('updated_at', 'TIMESTAMP')
+    ],
+    'schedules': [
+        ('id', 'INTEGER'),
+        ('professional_id', 'INTEGER'),
+        ('date', 'DATE'),
+        ('start_time', 'TIME'),
+        ('available', 'BOOLEAN'),
+        ('updated_at', 'TIMESTAMP')
+    ]
+}
+
+# Catálogos pequeños que se copian completos en cada sincronización
+DIMENSION_TABLES = {
+    'professionals': [
+        ('id', 'INTEGER'),
+        ('name', 'VARCHAR'),
+        ('active', 'BOOLEAN')
+    ],
+    'services': [
+        ('id', 'INTEGER'),
+        ('name', 'VARCHAR'),
+        ('category', 'VARCHAR'),
+        ('category_id', 'INTEGER'),
+        ('price', 'DOUBLE'),
+        ('duration', 'INTEGER'),
+        ('active', 'BOOLEAN')
+    ]
+}
+
+SCHEMA_SQL = '''
+    ALTER TABLE booking_services ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+    ALTER TABLE schedules ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+
+    CREATE TABLE IF NOT EXISTS analytics_deletions (
+        id BIGSERIAL PRIMARY KEY,
+        table_name VARCHAR(50) NOT NULL,
+        row_id INTEGER NOT NULL,
+        deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_analytics_deletions_deleted_at
+        ON analytics_deletions (deleted_at);
+
+    -- Marca de agua confiable aunque alguna escritura no actualice updated_at
+    CREATE OR REPLACE FUNCTION trg_touch_updated_at() RETURNS TRIGGER AS $$
+    BEGIN
+        NEW.updated_at = CURRENT_TIMESTAMP;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION trg_record_deletion() RETURNS TRIGGER AS $$
+    BEGIN
+        INSERT INTO analytics_deletions (table_name, row_id) VALUES (TG_TABLE_NAME, OLD.id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+'''
+
+_TABLE_TRIGGERS_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table} (updated_at);
+
+    -- Solo columnas copiadas: reescribir otras (p. ej. client_id en el
+    -- backfill de clientes) no obliga a volver a copiar la tabla
+    DROP TRIGGER IF EXISTS {table}_touch_updated_at ON {table};
+    CREATE TRIGGER {table}_touch_updated_at
+        BEFORE UPDATE OF {columns} ON {table} FOR EACH ROW EXECUTE FUNCTION trg_touch_updated_at();
+
+    DROP TRIGGER IF EXISTS {table}_record_deletion ON {table};
+    CREATE TRIGGER {table}_record_deletion
+        AFTER DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION trg_record_deletion();
+'''
+
+_schema_ready = False
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def ensure_schema(db):
+    """Agrega updated_at, índices y triggers de seguimiento en PostgreSQL (una vez por proceso)"""
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_SQL)
+        for table, columns in MIRRORED_TABLES.items():
+            touched = ', '.join(name for name, _ in columns if name != 'updated_at')
+            cursor.execute(_TABLE_TRIGGERS_SQL.format(table=table, columns=touched))
+
+    _schema_ready = True
+
+
+def is_available():
+    """Indica si DuckDB está instalado"""
+    return importlib.util.find_spec('duckdb') is not None
+
+
+class MirrorBusy(Exception):
+    """El archivo del espejo está bloqueado por otro proceso (una sincronización)"""
+
+
+class AnalyticsMirror:
+    """
+    Archivo DuckDB con la copia de las tablas transaccionales
+
+    Cada operación abre su propia conexión y la cierra al terminar, para no
+    retener el lock del archivo entre sincronizaciones; un lock de hilo
+    evita que la sincronización y las consultas del mismo proceso se pisen.
+
+    Args:
+        path (str): Archivo DuckDB
+        read_only (bool): Abre el archivo en solo lectura (panel de admin);
+            solo el proceso sincronizador debe abrirlo en escritura
+    """
+
+    def __init__(self, path=DEFAULT_PATH, read_only=False):
+        import duckdb
+
+        self.path = path
+        self.read_only = read_only
+        self.conn = None
+        self.lock = threading.Lock()
+        self._duckdb = duckdb
+
+        if not read_only:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def _connect(self):
+        """
+        Abre el archivo durante una operación
+
+        Raises:
+            MirrorBusy: Si otro proceso tiene el archivo abierto en escritura
+        """
+        with self.lock:
+            try:
+                self.conn = self._duckdb.connect(self.path, read_only=self.read_only)
+            except self._duckdb.IOException as e:
+                raise MirrorBusy(str(e)) from e
+            try:
+                if not self.read_only:
+                    self._create_tables()
+                yield self.conn
+            finally:
+                self.conn.close()
+                self.conn = None
+
+    def _create_tables(self):
+        for table, columns in MIRRORED_TABLES.items():
+            column_sql = ', '.join(f'"{name}" {kind}' for name, kind in columns)
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({column_sql}, PRIMARY KEY (id))')
+
+        # Sin llave primaria: se vacían y se vuelven a llenar en la misma
+        # transacción, y DuckDB no permite reinsertar una llave borrada ahí
+        for table, columns in DIMENSION_TABLES.items():
+            column_sql = ', '.join(f'"{name}" {kind}' for name, kind in columns)
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({column_sql})')
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS mirror_state (
+                table_name VARCHAR PRIMARY KEY,
+                watermark TIMESTAMP,
+                deletions_watermark TIMESTAMP,
+                synced_at TIMESTAMP
+            )
+        ''')
+
+    def _get_state(self, table):
+        row = self.conn.execute(
+            "SELECT watermark, deletions_watermark FROM mirror_state WHERE table_name = ?", [table]
+        ).fetchone()
+        return row if row else (None, None)
+
+    def _set_state(self, table, watermark, deletions_watermark):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO mirror_state VALUES (?, ?, ?, ?)",
+            [table, watermark, deletions_watermark, datetime.now()]
+        )
+
+    def _load_batch(self, table, columns, rows, replace=True):
+        import pandas as pd
+
+        batch = pd.DataFrame(rows, columns=[name for name, _ in columns])
+        self.conn.register('mirror_batch', batch)
+        try:
+            select_sql = ', '.join(f'CAST("{name}" AS {kind})' for name, kind in columns)
+            insert_sql = 'INSERT OR REPLACE INTO' if replace else 'INSERT INTO'
+            self.conn.execute(f'{insert_sql} {table} SELECT {select_sql} FROM mirror_batch')
+        finally:
+            self.conn.unregister('mirror_batch')
+
+    def _pg_select(self, columns):
+        # Los NUMERIC de PostgreSQL llegan como Decimal; pedirlos como float8
+        return ', '.join(
+            f'{name}::float8' if kind == 'DOUBLE' else name
+            for name, kind in columns
+        )
+
+    def _sync_table(self, conn, table, columns):
+        watermark, deletions_watermark = self._get_state(table)
+
+        # La primera vez se copia todo (incluidas filas antiguas sin updated_at)
+        where_sql, params = 'TRUE', []
+        if watermark:
+            where_sql, params = 'updated_at >= %s', [watermark - SYNC_OVERLAP]
+
+        # Cursor con nombre: PostgreSQL entrega los cambios por lotes
+        cursor = conn.cursor(name=f'mirror_{table}')
+        cursor.itersize = BATCH_SIZE
+        cursor.execute(f'''
+            SELECT {self._pg_select(columns)}
+            FROM {table}
+            WHERE {where_sql}
+            ORDER BY updated_at, id
+        ''', params)
+
+        copied = 0
+        new_watermark = watermark
+        updated_at_index = [name for name, _ in columns].index('updated_at')
+
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            self._load_batch(table, columns, rows)
+            copied += len(rows)
+            last_updated_at = rows[-1][updated_at_index]
+            if last_updated_at and (new_watermark is None or last_updated_at > new_watermark):
+                new_watermark = last_updated_at
+        cursor.close()
+
+        # Borrados registrados por trigger desde la última sincronización
+        # (con el mismo margen; volver a borrar un ID no tiene efecto)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT deleted_at, row_id FROM analytics_deletions
+            WHERE table_name = %s AND deleted_at >= %s
+            ORDER BY deleted_at
+        ''', (table, deletions_watermark - SYNC_OVERLAP if deletions_watermark else datetime(1970, 1, 1)))
+        deletions = cursor.fetchall()
+
+        if deletions:
+            deleted_ids = [row_id for _, row_id in deletions]
+            self.conn.execute(f'DELETE FROM {table} WHERE list_contains(?, id)', [deleted_ids])
+            deletions_watermark = deletions[-1][0]
+
+        self._set_state(table, new_watermark, deletions_watermark)
+        return copied, len(deletions)
+
+    def _sync_dimension(self, conn, table, columns):
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {self._pg_select(columns)} FROM {table}')
+        rows = cursor.fetchall()
+        self.conn.execute(f'DELETE FROM {table}')
+        if rows:
+            self._load_batch(table, columns, rows, replace=False)
+        return len(rows)
+
+    def sync(self, db):
+        """
+        Copia los cambios desde PostgreSQL
+
+        Args:
+            db (Database): Instancia de base de datos
+
+        Returns:
+            dict: Filas copiadas y borradas por tabla y segundos transcurridos
+
+        Raises:
+            MirrorBusy: Si el panel tiene el archivo abierto en ese momento
+        """
+        if self.read_only:
+            raise RuntimeError("❌ El espejo está abierto en solo lectura; sincroniza con python -m src.analytics_mirror")
+
+        ensure_schema(db)
+        started = time.monotonic()
+        result = {'tables': {}}
+
+        with self._connect(), db.get_connection() as conn:
+            # Una sola foto consistente para todas las tablas
+            conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+
+            self.conn.execute('BEGIN TRANSACTION')
+            try:
+                for table, columns in MIRRORED_TABLES.items():
+                    copied, deleted = self._sync_table(conn, table, columns)
+                    result['tables'][table] = {'copied': copied, 'deleted': deleted}
+
+                for table, columns in DIMENSION_TABLES.items():
+                    result['tables'][table] = {'copied': self._sync_dimension(conn, table, columns), 'deleted': 0}
+
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM analytics_deletions WHERE deleted_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'",
+                (DELETIONS_RETENTION_DAYS,)
+            )
+
+        result['elapsed_seconds'] = round(time.monotonic() - started, 2)
+        return result
+
+    def last_synced(self):
+        """
+        Fecha y hora de la última sincronización, o None
+
+        Raises:
+            MirrorBusy: Si hay una sincronización en curso
+        """
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(synced_at) FROM mirror_state").fetchone()
+        return row[0] if row else None
+
+    def query(self, sql, params=None):
+        """
+        Ejecuta una consulta de solo lectura sobre el espejo
+
+        Returns:
+            DataFrame: Resultado de la consulta
+
+        Raises:
+            MirrorBusy: Si hay una sincronización en curso
+        """
+        with self._connect() as conn:
+            return conn.execute(sql, params or []).df()
+
+    # ==================== REPORTES ====================
+
+    def professional_breakdown(self, start_date, end_date):
+        """Citas, ingresos y anticipos por profesional y estado en un rango"""
+        return self.query('''
+            SELECT COALESCE(p.name, 'Sin asignar') as professional,
+                   b.status,
+                   COUNT(*) as bookings,
+                   SUM(b.total_price) as revenue,
+                   SUM(b.deposit_paid) as deposits
+            FROM bookings b
+            LEFT JOIN professionals p ON p.id = b.professional_id
+            WHERE b.date BETWEEN ?::DATE AND ?::DATE
+            GROUP BY ALL
+            ORDER BY revenue DESC
+        ''', [start_date, end_date])
+
+    def service_breakdown(self, start_date, end_date):
+        """Veces vendido e ingresos por servicio en un rango (citas no canceladas)"""
+        return self.query('''
+            SELECT COALESCE(s.name, bs.service_name) as service,
+                   COUNT(*) as times_booked,
+                   SUM(bs.service_price) as revenue
+            FROM booking_services bs
+            JOIN bookings b ON b.id = bs.booking_id
+            LEFT JOIN services s ON s.id = bs.service_id
+            WHERE b.date BETWEEN ?::DATE AND ?::DATE
+              AND b.status <> 'cancelled'
+            GROUP BY ALL
+            ORDER BY revenue DESC
+        ''', [start_date, end_date])
+
+
+def get_mirror(path=DEFAULT_PATH):
+    """
+    Obtiene el espejo de solo lectura compartido por el proceso del panel
+
+    Raises:
+        ImportError: Si DuckDB no está instalado
+    """
+    global _mirror
+    if _mirror is None:
+        with _mirror_lock:
+            if _mirror is None:
+                _mirror = AnalyticsMirror(path, read_only=True)
+    return _mirror
+
+
+def run_forever(db, mirror, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+    """Sincroniza el espejo de forma periódica"""
+    print(f"🔁 Espejo analítico en {mirror.path} (cada {interval_minutes} min)")
+
+    while True:
+        try:
+            result = mirror.sync(db)
+            copied = sum(t['copied'] for t in result['tables'].values())
+            print(f"📊 [{datetime.now():%Y-%m-%d %H:%M}] {copied} filas copiadas "
+                  f"en {result['elapsed_seconds']}s")
+        except MirrorBusy:
+            # El panel está leyendo; se reintenta en un momento
+            print("⏳ Espejo en uso por el panel, reintentando en 5s")
+            time.sleep(5)
+            continue
+        except Exception as e:
+            print(f"❌ Error sincronizando el espejo analítico: {e}")
+
+        time.sleep(interval_minutes * 60)
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Espejo analítico en DuckDB")
+    parser.add_argument('--sync', action='store_true', help="Sincroniza una vez y termina")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL_MINUTES,
+                        help="Minutos entre sincronizaciones")
+    parser.add_argument('--path', default=DEFAULT_PATH, help="Archivo DuckDB")
+    args = parser.parse_args()
+
+    try:
+        mirror = AnalyticsMirror(args.path)
+    except ImportError:
+        raise SystemExit("❌ DuckDB no está instalado. Ejecuta: pip install duckdb")
+
+    database = Database()
+    if args.sync:
+        result = mirror.sync(database)
+        for table, counts in result['tables'].items():
+            print(f"✅ {table}: {counts['copied']} filas copiadas, {counts['deleted']} borradas")
+        print(f"⏱️ {result['elapsed_seconds']}s")
+    else:
+        run_forever(database, mirror, args.interval)
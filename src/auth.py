@@ -0,0 +1,122 @@
+"""
+Autenticación del panel de administración
+
+Carga la tabla `users` una sola vez en un almacén de credenciales en caché
+y mantiene un `stauth.Authenticate` por sesión. Las altas, bajas y cambios
+de contraseña deben pasar por `create_user`, `delete_user` y
+`update_password` de este módulo para invalidar el almacén; las sesiones
+reconstruyen su autenticador cuando cambia la versión de credenciales.
+
+Uso (admin.py):
+    from src import auth
+    authenticator = auth.get_authenticator(db)
+    name, authentication_status, username = authenticator.login('Login', 'main')
+"""
+
+import extra_streamlit_components as stx
+import streamlit as st
+import streamlit_authenticator as stauth
+
+COOKIE_NAME = 'streamlit_auth'
+COOKIE_KEY = 'auth_key'
+COOKIE_EXPIRY_DAYS = 30
+
+# Llave en session_state donde vive el autenticador de la sesión
+SESSION_KEY = '_authenticator'
+
+
+@st.cache_resource
+def _credentials_version():
+    """Contador compartido por el proceso; cambia en cada invalidación"""
+    return {'version': 0}
+
+
+@st.cache_data(show_spinner=False)
+def load_credentials(_db):
+    """
+    Construye las credenciales en el formato de streamlit-authenticator
+
+    Returns:
+        dict: {'usernames': {username: {'email', 'name', 'password'}}}
+    """
+    usernames_list, hashed_passwords_list, names_list = _db.get_all_users_for_auth()
+
+    credentials = {
+        'usernames': {}
+    }
+
+    for i, username in enumerate(usernames_list):
+        credentials['usernames'][username] = {
+            'email': f'{username}@admin.app',
+            'name': names_list[i],
+            'password': hashed_passwords_list[i]
+        }
+
+    return credentials
+
+
+@st.cache_data(show_spinner=False)
+def load_users(_db):
+    """Usuarios (id, username, name) para la pestaña de gestión"""
+    return _db.get_all_users()
+
+
+def invalidate_credentials():
+    """Limpia el almacén de credenciales y obliga a reconstruir los autenticadores"""
+    load_credentials.clear()
+    load_users.clear()
+    _credentials_version()['version'] += 1
+
+
+def get_authenticator(db):
+    """
+    Obtiene el autenticador de la sesión (lo crea la primera vez o si las
+    credenciales cambiaron)
+
+    streamlit-authenticator 0.2.2 lee las cookies al construir su
+    CookieManager; mientras la sesión no esté autenticada se vuelve a leer en
+    cada rerun para que el reingreso por cookie siga funcionando.
+    """
+    version = _credentials_version()['version']
+    cached = st.session_state.get(SESSION_KEY)
+
+    if cached is None or cached[0] != version:
+        authenticator = stauth.Authenticate(
+            load_credentials(db),
+            COOKIE_NAME,
+            COOKIE_KEY,
+            COOKIE_EXPIRY_DAYS
+        )
+        st.session_state[SESSION_KEY] = (version, authenticator)
+        return authenticator
+
+    authenticator = cached[1]
+    if not st.session_state.get('authentication_status'):
+        authenticator.cookie_manager = stx.CookieManager()
+    return authenticator
+
+
+# ==================== ESCRITURAS CON INVALIDACIÓN ====================
+
+def create_user(db, username, password, name):
+    """Crea un usuario e invalida las credenciales en caché"""
+    success, message = db.create_user(username, password, name)
+    if success:
+        invalidate_credentials()
+    return success, message
+
+
+def delete_user(db, user_id):
+    """Elimina un usuario e invalida las credenciales en caché"""
+    success, message = db.delete_user(user_id)
+    if success:
+        invalidate_credentials()
+    return success, message
+
+
+def update_password(db, username, new_password):
+    """Actualiza la contraseña e invalida las credenciales en caché"""
+    success, message = db.update_password(username, new_password)
+    if success:
+        invalidate_credentials()
+    return success, message
@@ -0,0 +1,239 @@
+"""
+Integración de caché de Streamlit
+
+Un solo `Database` compartido por proceso (st.cache_resource) y cargadores
+con TTL (st.cache_data) para el catálogo y la disponibilidad por fecha.
+Los comparativos de reportes se guardan por (rango, dimensión, filtros).
+Las escrituras (reservar, cancelar, reprogramar) deben llamar a
+`invalidate_availability` para limpiar las entradas afectadas; el TTL cubre
+los cambios hechos desde otros procesos (por ejemplo, el panel de admin).
+
+Uso:
+    from src import cache
+    db = cache.get_db_or_stop()
+    categories = cache.load_active_categories()
+"""
+
+import streamlit as st
+
+from src import clients, combos, contact_lookup, loyalty, payments_service, resources, rollups, search, waitlist
+from src.database import Database
+
+# TTL en segundos
+CATALOG_TTL = 600           # Categorías, servicios y profesionales cambian poco
+AVAILABILITY_TTL = 60       # Horarios y citas por día
+REPORTS_TTL = 300           # Comparativos de reportes (leen el resumen diario)
+
+
+# Módulos con esquema propio: get_db solo verifica que estén migrados
+SCHEMA_MODULES = (
+    payments_service, rollups, combos, clients, loyalty, waitlist, resources, search, contact_lookup
+)
+
+
+@st.cache_resource
+def get_db():
+    """
+    Obtiene la instancia compartida de base de datos (una por proceso)
+
+    No ejecuta DDL: cada módulo solo consulta `schema_migrations` (ver
+    src/migrations.py) y el esquema se aplica con sus comandos `--migrate`.
+
+    Raises:
+        RuntimeError: Si falta aplicar alguna migración
+    """
+    database = Database()
+    for module in SCHEMA_MODULES:
+        module.ensure_schema(database)
+    return database
+
+
+def get_db_or_stop():
+    """
+    Como get_db, pero si falta una migración lo muestra en la página y detiene el script
+
+    st.cache_resource no guarda las excepciones, así que la siguiente
+    ejecución vuelve a verificar después de correr el comando.
+    """
+    try:
+        return get_db()
+    except RuntimeError as e:
+        st.error(str(e))
+        st.info("ℹ️ Aplica las migraciones en el orden indicado en el README (sección Migraciones) y recarga la página.")
+        st.stop()
+
+
+# ==================== CATÁLOGO ====================
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def load_active_categories():
+    """Categorías activas con su conteo de servicios"""
+    return get_db().get_active_categories()
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def load_services_by_category(category_id):
+    """Servicios activos de una categoría"""
+    return get_db().get_services_by_category(category_id)
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def load_professionals_for_service(service_id):
+    """Profesionales (datos completos) que pueden realizar un servicio"""
+    db = get_db()
+    professionals = []
+    for prof_id in db.get_professionals_for_service(service_id):
+        prof_info = db.get_professional_by_id(prof_id)
+        if prof_info:
+            professionals.append(prof_info)
+    return professionals
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def _load_combo_suggestions(service_ids):
+    return combos.get_suggestions(get_db(), list(service_ids))
+
+
+def load_combo_suggestions(service_ids):
+    """Servicios reservados frecuentemente junto con los del carrito (ver src/combos.py)"""
+    return _load_combo_suggestions(tuple(sorted(set(service_ids))))
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def load_resource_catalog():
+    """Capacidades de recursos y recursos requeridos por servicio (ver src/resources.py)"""
+    return resources.get_catalog(get_db())
+
+
+def clear_catalog():
+    """Limpia el catálogo en caché (tras editar categorías, servicios o asignaciones)"""
+    load_active_categories.clear()
+    load_services_by_category.clear()
+    load_professionals_for_service.clear()
+    _load_combo_suggestions.clear()
+    load_resource_catalog.clear()
+    _load_search.clear()
+    search.invalidate()
+
+
+@st.cache_data(ttl=CATALOG_TTL, show_spinner=False)
+def _load_search(query, kinds, limit):
+    return search.search(get_db(), query, kinds, limit)
+
+
+def load_search(query, kinds=search.KINDS, limit=10):
+    """Búsqueda difusa de servicios, categorías y clientes (ver src/search.py)"""
+    # Normalizar la llave: mayúsculas, acentos y espacios no duplican entradas
+    return _load_search(' '.join(search.fold(query).split()), tuple(sorted(kinds)), int(limit))
+
+
+# ==================== DISPONIBILIDAD ====================
+
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def _load_day_availability(professional_id, date):
+    db = get_db()
+    return {
+        'schedule': db.get_professional_schedule(professional_id, date),
+        'bookings': db.get_professional_bookings_by_date(professional_id, date)
+    }
+
+
+def load_day_availability(professional_id, date):
+    """
+    Horarios libres y citas activas de un profesional en una fecha
+
+    Args:
+        professional_id (int): ID del profesional
+        date (str or date): Fecha YYYY-MM-DD
+
+    Returns:
+        dict: {'schedule': [HH:MM, ...], 'bookings': [cita, ...]}
+    """
+    # Normalizar la llave para que coincida con invalidate_availability
+    return _load_day_availability(int(professional_id), str(date))
+
+
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def _load_resource_usage(date):
+    return resources.get_day_usage(get_db(), date)
+
+
+def load_day_occupancy(date, exclude_booking_id=None):
+    """
+    Ocupación de recursos en una fecha, indexada para validar horarios
+
+    Args:
+        date (str or date): Fecha YYYY-MM-DD
+        exclude_booking_id (int): Cita a ignorar (al reprogramarla) - opcional
+
+    Returns:
+        resources.DayOccupancy
+    """
+    return resources.DayOccupancy(
+        _load_resource_usage(str(date)),
+        load_resource_catalog()['capacities'],
+        exclude_booking_id
+    )
+
+
+def invalidate_availability(professional_id, date):
+    """Limpia la disponibilidad en caché de un profesional en una fecha"""
+    if professional_id is None or not date:
+        return
+    _load_day_availability.clear(int(professional_id), str(date))
+    _load_resource_usage.clear(str(date))
+
+
+# ==================== REPORTES ====================
+
+@st.cache_data(ttl=REPORTS_TTL, show_spinner=False)
+def _load_period_comparison(start_date, end_date, dimension, professional_ids, category_ids):
+    return get_db().get_period_comparison(
+        start_date, end_date, dimension, list(professional_ids), list(category_ids)
+    )
+
+
+def load_period_comparison(start_date, end_date, dimension='day', professional_ids=(), category_ids=()):
+    """
+    Comparativo actual / periodo anterior / año anterior (ver Database.get_period_comparison)
+
+    Args:
+        start_date (str or date): Fecha inicio
+        end_date (str or date): Fecha fin
+        dimension (str): 'day', 'professional' o 'category'
+        professional_ids (iterable): Filtro de profesionales - opcional
+        category_ids (iterable): Filtro de categorías - opcional
+
+    Returns:
+        list: Filas del comparativo
+    """
+    # Normalizar la llave: el orden de los filtros no debe duplicar entradas
+    return _load_period_comparison(
+        str(start_date), str(end_date), dimension,
+        tuple(sorted(professional_ids or ())), tuple(sorted(category_ids or ()))
+    )
+
+
+@st.cache_data(ttl=REPORTS_TTL, show_spinner=False)
+def load_professional_service_revenue(start_date, end_date, by='service'):
+    """Ingresos y servicios por profesional × servicio o categoría (ver src/revenue_matrix.py)"""
+    return get_db().get_professional_service_revenue(str(start_date), str(end_date), by)
+
+
+# ==================== CLIENTES ====================
+
+@st.cache_data(ttl=AVAILABILITY_TTL, show_spinner=False)
+def _load_bookings_by_contact(phone, email, require_both):
+    return get_db().find_bookings_by_contact(phone, email, require_both)
+
+
+def load_bookings_by_contact(phone=None, email=None, require_both=False):
+    """
+    Próximas citas y recientes de un cliente (ver Database.find_bookings_by_contact)
+
+    El límite de intentos (src/contact_lookup.py) se aplica antes de llamar.
+    """
+    # Normalizar la llave: el mismo contacto en otro formato usa la misma entrada
+    return _load_bookings_by_contact(
+        clients.normalize_phone(phone), clients.normalize_email(email), bool(require_both)
+    )
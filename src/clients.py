@@ -0,0 +1,393 @@
+"""
+Perfiles de cliente con estadísticas acumuladas
+
+`clients` guarda una fila por cliente, identificado por el teléfono
+normalizado (la misma regla que `format_phone` en src/utils.py: solo dígitos
+y prefijo 52 para números de 10 dígitos) o, si la cita no trae teléfono, por
+el email en minúsculas. Los triggers de `bookings` asignan `client_id` al
+crear la cita y mantienen los contadores con deltas en cada escritura
+(create_booking, cancel_booking, confirmación de pagos, ediciones del admin),
+así que las consultas de CRM leen una fila por cliente sin agregar citas.
+
+Contadores:
+    bookings            Citas creadas (cualquier estado)
+    cancellations       Citas canceladas
+    lifetime_value      Suma de total_price de las citas no canceladas
+    deposits_paid       Suma de deposit_paid (incluye citas canceladas)
+    first_booking_date  Primera fecha de cita
+    last_booking_date   Última fecha de cita
+
+Uso:
+    python -m src.clients --migrate
+    python -m src.clients --backfill
+    python -m src.clients --check
+"""
+
+import re
+import time
+
+from src import migrations
+
+SCHEMA_SQL = '''
+    -- Misma regla que src/utils.py:format_phone; NULL si no hay dígitos
+    CREATE OR REPLACE FUNCTION normalize_phone(p_phone TEXT) RETURNS TEXT AS $$
+        SELECT NULLIF(regexp_replace(regexp_replace(p_phone, '[^0-9]', '', 'g'), '^([0-9]{10})$', '52\\1'), '')
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+    CREATE OR REPLACE FUNCTION normalize_email(p_email TEXT) RETURNS TEXT AS $$
+        SELECT NULLIF(lower(btrim(p_email)), '')
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+    CREATE TABLE IF NOT EXISTS clients (
+        id SERIAL PRIMARY KEY,
+        phone VARCHAR(20) UNIQUE,
+        email VARCHAR(150),
+        name VARCHAR(100),
+        bookings INTEGER NOT NULL DEFAULT 0,
+        cancellations INTEGER NOT NULL DEFAULT 0,
+        lifetime_value NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        deposits_paid NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        first_booking_date DATE,
+        last_booking_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Clientes sin teléfono: uno por email
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_clients_email_only
+        ON clients (email) WHERE phone IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_clients_email ON clients (email);
+
+    -- Listas de CRM
+    CREATE INDEX IF NOT EXISTS idx_clients_lifetime_value ON clients (lifetime_value DESC, id);
+    CREATE INDEX IF NOT EXISTS idx_clients_last_booking ON clients (last_booking_date DESC NULLS LAST, id);
+
+    ALTER TABLE bookings ADD COLUMN IF NOT EXISTS client_id INTEGER REFERENCES clients(id);
+    CREATE INDEX IF NOT EXISTS idx_bookings_client ON bookings (client_id, date);
+
+    -- Búsqueda de citas por contacto (Database.find_bookings_by_contact)
+    CREATE INDEX IF NOT EXISTS idx_bookings_phone_normalized
+        ON bookings (normalize_phone(client_phone), date);
+    CREATE INDEX IF NOT EXISTS idx_bookings_email_normalized
+        ON bookings (normalize_email(client_email), date);
+
+    -- Busca o crea el cliente de unos datos de contacto
+    CREATE OR REPLACE FUNCTION client_upsert(p_name TEXT, p_phone TEXT, p_email TEXT)
+    RETURNS INTEGER AS $$
+    DECLARE
+        v_phone TEXT := normalize_phone(p_phone);
+        v_email TEXT := normalize_email(p_email);
+        v_id INTEGER;
+    BEGIN
+        IF v_phone IS NOT NULL THEN
+            INSERT INTO clients AS c (phone, email, name) VALUES (v_phone, v_email, p_name)
+            ON CONFLICT (phone) DO UPDATE SET
+                email = COALESCE(EXCLUDED.email, c.email),
+                name = COALESCE(NULLIF(btrim(EXCLUDED.name), ''), c.name),
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id INTO v_id;
+        ELSIF v_email IS NOT NULL THEN
+            INSERT INTO clients AS c (phone, email, name) VALUES (NULL, v_email, p_name)
+            ON CONFLICT (email) WHERE phone IS NULL DO UPDATE SET
+                name = COALESCE(NULLIF(btrim(EXCLUDED.name), ''), c.name),
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id INTO v_id;
+        END IF;
+        RETURN v_id;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION client_add(
+        p_client_id INTEGER, p_bookings INTEGER, p_cancellations INTEGER,
+        p_value NUMERIC, p_deposits NUMERIC, p_date DATE
+    ) RETURNS VOID AS $$
+    BEGIN
+        IF p_client_id IS NULL THEN
+            RETURN;
+        END IF;
+        UPDATE clients SET
+            bookings = bookings + p_bookings,
+            cancellations = cancellations + p_cancellations,
+            lifetime_value = lifetime_value + COALESCE(p_value, 0),
+            deposits_paid = deposits_paid + COALESCE(p_deposits, 0),
+            first_booking_date = LEAST(first_booking_date, p_date),
+            last_booking_date = GREATEST(last_booking_date, p_date),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = p_client_id;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Fechas exactas tras quitar una cita (índice por client_id)
+    CREATE OR REPLACE FUNCTION client_refresh_dates(p_client_id INTEGER) RETURNS VOID AS $$
+        UPDATE clients c SET first_booking_date = d.first_date, last_booking_date = d.last_date
+        FROM (SELECT MIN(date) as first_date, MAX(date) as last_date
+              FROM bookings WHERE client_id = p_client_id) d
+        WHERE c.id = p_client_id
+    $$ LANGUAGE sql;
+
+    CREATE OR REPLACE FUNCTION trg_bookings_client_assign() RETURNS TRIGGER AS $$
+    BEGIN
+        IF current_setting('clients.backfill', TRUE) = 'on' THEN
+            RETURN NEW;
+        END IF;
+        IF TG_OP = 'INSERT' OR NEW.client_phone IS DISTINCT FROM OLD.client_phone
+                OR NEW.client_email IS DISTINCT FROM OLD.client_email THEN
+            NEW.client_id := client_upsert(NEW.client_name, NEW.client_phone, NEW.client_email);
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION trg_bookings_client_stats() RETURNS TRIGGER AS $$
+    BEGIN
+        IF current_setting('clients.backfill', TRUE) = 'on' THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM client_add(
+                OLD.client_id, -1, -CASE WHEN OLD.status = 'cancelled' THEN 1 ELSE 0 END,
+                -CASE WHEN OLD.status = 'cancelled' THEN 0 ELSE OLD.total_price END,
+                -OLD.deposit_paid, NULL
+            );
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM client_add(
+                NEW.client_id, 1, CASE WHEN NEW.status = 'cancelled' THEN 1 ELSE 0 END,
+                CASE WHEN NEW.status = 'cancelled' THEN 0 ELSE NEW.total_price END,
+                NEW.deposit_paid, NEW.date
+            );
+        END IF;
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND (
+                OLD.client_id IS DISTINCT FROM NEW.client_id OR OLD.date IS DISTINCT FROM NEW.date)) THEN
+            PERFORM client_refresh_dates(OLD.client_id);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS bookings_client_assign ON bookings;
+    CREATE TRIGGER bookings_client_assign
+        BEFORE INSERT OR UPDATE OF client_phone, client_email
+        ON bookings FOR EACH ROW EXECUTE FUNCTION trg_bookings_client_assign();
+
+    -- UPDATE OF mira las columnas del SET, no las que cambia el trigger
+    -- BEFORE, por eso incluye las de contacto
+    DROP TRIGGER IF EXISTS bookings_client_stats ON bookings;
+    CREATE TRIGGER bookings_client_stats
+        AFTER INSERT OR UPDATE OF client_id, client_phone, client_email, date, status,
+                                  total_price, deposit_paid OR DELETE
+        ON bookings FOR EACH ROW EXECUTE FUNCTION trg_bookings_client_stats();
+'''
+
+# Contadores recalculados desde bookings (backfill y check)
+_ACTUAL_SQL = '''
+    SELECT client_id,
+           COUNT(*) as bookings,
+           COUNT(*) FILTER (WHERE status = 'cancelled') as cancellations,
+           COALESCE(SUM(total_price) FILTER (WHERE status IS DISTINCT FROM 'cancelled'), 0) as lifetime_value,
+           COALESCE(SUM(deposit_paid), 0) as deposits_paid,
+           MIN(date) as first_booking_date,
+           MAX(date) as last_booking_date
+    FROM bookings
+    WHERE client_id IS NOT NULL
+    GROUP BY client_id
+'''
+
+COUNTERS = ('bookings', 'cancellations', 'lifetime_value', 'deposits_paid',
+            'first_booking_date', 'last_booking_date')
+
+_schema_ready = False
+
+
+def normalize_phone(phone):
+    """Equivalente en Python de la función SQL normalize_phone (None si no hay dígitos)"""
+    digits = re.sub(r'[^0-9]', '', phone or '')
+    if len(digits) == 10:
+        digits = '52' + digits
+    return digits or None
+
+
+def normalize_email(email):
+    """Equivalente en Python de la función SQL normalize_email"""
+    return (email or '').strip().lower() or None
+
+
+def ensure_schema(db):
+    """
+    Verifica que la tabla de clientes y sus triggers estén instalados
+
+    No ejecuta DDL ni el backfill: el backfill bloquea `bookings` y reescribe
+    client_id en todas las citas, así que se corren con
+    `python -m src.clients --migrate` y `python -m src.clients --backfill`.
+
+    Raises:
+        RuntimeError: Si la tabla de clientes no existe
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'clients', SCHEMA_SQL, 'python -m src.clients --migrate', 'clients')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea o actualiza la tabla de clientes y sus triggers
+
+    Si la tabla no existía se rellena con el histórico completo.
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    if migrations.is_applied(db, 'clients', SCHEMA_SQL):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('clients'))")
+        if migrations.applied_checksum(cursor, 'clients') == migrations.checksum(SCHEMA_SQL):
+            return False
+        cursor.execute("SELECT to_regclass('clients') IS NULL")
+        is_new = cursor.fetchone()[0]
+        cursor.execute(SCHEMA_SQL)
+        if is_new:
+            _backfill(cursor)
+            print("✅ Tabla de clientes creada y rellenada")
+        migrations.record(cursor, 'clients', SCHEMA_SQL)
+
+    return True
+
+
+def _backfill(cursor):
+    # Bloquear escrituras y apagar los triggers de esta transacción mientras
+    # se asignan clientes y se recalculan los contadores
+    cursor.execute("LOCK TABLE bookings IN SHARE MODE")
+    cursor.execute("SET LOCAL clients.backfill = 'on'")
+
+    cursor.execute('''
+        INSERT INTO clients (phone, email, name)
+        SELECT normalize_phone(client_phone),
+               (array_agg(normalize_email(client_email) ORDER BY created_at DESC, id DESC)
+                    FILTER (WHERE normalize_email(client_email) IS NOT NULL))[1],
+               (array_agg(client_name ORDER BY created_at DESC, id DESC))[1]
+        FROM bookings
+        WHERE normalize_phone(client_phone) IS NOT NULL
+        GROUP BY 1
+        ON CONFLICT (phone) DO NOTHING
+    ''')
+    created = cursor.rowcount
+    cursor.execute('''
+        INSERT INTO clients (phone, email, name)
+        SELECT NULL, normalize_email(client_email),
+               (array_agg(client_name ORDER BY created_at DESC, id DESC))[1]
+        FROM bookings
+        WHERE normalize_phone(client_phone) IS NULL AND normalize_email(client_email) IS NOT NULL
+        GROUP BY 2
+        ON CONFLICT (email) WHERE phone IS NULL DO NOTHING
+    ''')
+    created += cursor.rowcount
+
+    cursor.execute('''
+        UPDATE bookings b SET client_id = c.id
+        FROM clients c
+        WHERE c.phone = normalize_phone(b.client_phone)
+          AND b.client_id IS DISTINCT FROM c.id
+    ''')
+    assigned = cursor.rowcount
+    cursor.execute('''
+        UPDATE bookings b SET client_id = c.id
+        FROM clients c
+        WHERE normalize_phone(b.client_phone) IS NULL
+          AND c.phone IS NULL AND c.email = normalize_email(b.client_email)
+          AND b.client_id IS DISTINCT FROM c.id
+    ''')
+    assigned += cursor.rowcount
+
+    cursor.execute(f'''
+        UPDATE clients c SET
+            bookings = COALESCE(a.bookings, 0),
+            cancellations = COALESCE(a.cancellations, 0),
+            lifetime_value = COALESCE(a.lifetime_value, 0),
+            deposits_paid = COALESCE(a.deposits_paid, 0),
+            first_booking_date = a.first_booking_date,
+            last_booking_date = a.last_booking_date
+        FROM clients c2
+        LEFT JOIN ({_ACTUAL_SQL}) a ON a.client_id = c2.id
+        WHERE c.id = c2.id
+    ''')
+
+    return {'clients_created': created, 'bookings_assigned': assigned}
+
+
+def backfill(db):
+    """
+    Asigna clientes a las citas sin cliente y recalcula todos los contadores
+
+    Returns:
+        dict: clients_created, bookings_assigned y elapsed_seconds
+    """
+    ensure_schema(db)
+    started = time.monotonic()
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        result = _backfill(cursor)
+
+    result['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    return result
+
+
+def check(db):
+    """
+    Compara los contadores contra una agregación directa de bookings
+
+    Returns:
+        list: Diferencias como (client_id, contador, valor_guardado, valor_real)
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT c.id, {', '.join(f'c.{name}, a.{name}' for name in COUNTERS)}
+            FROM clients c
+            LEFT JOIN ({_ACTUAL_SQL}) a ON a.client_id = c.id
+        ''')
+        differences = []
+        for row in cursor.fetchall():
+            for index, name in enumerate(COUNTERS):
+                stored, actual = row[1 + 2 * index], row[2 + 2 * index]
+                if actual is None and name in ('bookings', 'cancellations', 'lifetime_value', 'deposits_paid'):
+                    actual = 0
+                if stored != actual:
+                    differences.append((row[0], name, stored, actual))
+        return differences
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Perfiles de cliente")
+    parser.add_argument('--migrate', action='store_true', help="Crea o actualiza la tabla de clientes y sus triggers")
+    parser.add_argument('--backfill', action='store_true', help="Asigna clientes y recalcula contadores")
+    parser.add_argument('--check', action='store_true', help="Compara los contadores contra bookings")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de clientes aplicado")
+        else:
+            print("✅ El esquema de clientes ya estaba al día")
+    ensure_schema(database)
+    if args.backfill:
+        print(backfill(database))
+    if args.check:
+        differences = check(database)
+        for difference in differences:
+            print(difference)
+        print(f"{'⚠️' if differences else '✅'} {len(differences)} diferencias")
@@ -0,0 +1,372 @@
+"""
+Combinaciones de servicios reservadas juntas
+
+Un trabajo incremental recorre las citas nuevas (por ID, con una marca de
+agua), cuenta con NumPy los conjuntos de servicios de cada cita (servicios
+sueltos, pares y tríos; la matriz de co-ocurrencia dispersa en formato
+coordenado) y suma esos conteos en `service_itemset_counts`. Con los
+conjuntos que superan el soporte mínimo arma `service_suggestions`, la tabla
+de "frecuentemente reservados juntos" que el carrito lee con una consulta
+por llave, sin calcular nada por petición.
+
+Las citas cuentan con los servicios que tenían al procesarse; cancelar o
+editar una cita después no resta sus conteos (miden intención de compra).
+
+Uso:
+    python -m src.combos --migrate
+    python -m src.combos --refresh
+    python -m src.combos --interval 15
+    python -m src.combos --rebuild
+"""
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src import migrations
+
+# Tamaño máximo de los conjuntos que se cuentan (pares y tríos)
+MAX_ITEMSET_SIZE = 3
+
+# Soporte mínimo: fracción de las citas y conteo absoluto
+MIN_SUPPORT = 0.01
+MIN_COUNT = 3
+
+# Citas procesadas por transacción
+BATCH_SIZE = 5000
+
+# Solo se procesan citas con al menos esta antigüedad, para que las
+# transacciones en curso con IDs menores ya se hayan confirmado
+SETTLE_SECONDS = 60
+
+DEFAULT_INTERVAL_MINUTES = 15
+
+SCHEMA_SQL = '''
+    -- Conteo de citas por conjunto de servicios (IDs ordenados)
+    CREATE TABLE IF NOT EXISTS service_itemset_counts (
+        items INTEGER[] PRIMARY KEY,
+        size SMALLINT NOT NULL,
+        bookings INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_service_itemset_counts_size
+        ON service_itemset_counts (size, bookings DESC);
+
+    -- Marca de agua del trabajo incremental (una sola fila)
+    CREATE TABLE IF NOT EXISTS service_combo_state (
+        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+        last_booking_id INTEGER NOT NULL DEFAULT 0,
+        baskets INTEGER NOT NULL DEFAULT 0,
+        refreshed_at TIMESTAMP
+    );
+
+    INSERT INTO service_combo_state (id) VALUES (TRUE) ON CONFLICT DO NOTHING;
+
+    -- Sugerencias por servicio: confianza = P(sugerido | servicio)
+    CREATE TABLE IF NOT EXISTS service_suggestions (
+        service_id INTEGER NOT NULL,
+        suggested_service_id INTEGER NOT NULL,
+        together INTEGER NOT NULL,
+        confidence NUMERIC(6, 4) NOT NULL,
+        lift NUMERIC(10, 4) NOT NULL,
+        PRIMARY KEY (service_id, suggested_service_id)
+    );
+'''
+
+_schema_ready = False
+
+
+def ensure_schema(db):
+    """
+    Verifica que las tablas de combinaciones existan (una vez por proceso)
+
+    No ejecuta DDL: las tablas se crean con `python -m src.combos --migrate`.
+
+    Raises:
+        RuntimeError: Si las tablas no existen
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    migrations.require(db, 'combos', SCHEMA_SQL, 'python -m src.combos --migrate', 'service_itemset_counts')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea las tablas de combinaciones
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    if migrations.is_applied(db, 'combos', SCHEMA_SQL):
+        return False
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_SQL)
+        migrations.record(cursor, 'combos', SCHEMA_SQL)
+    return True
+
+
+def count_itemsets(booking_ids, service_ids, max_size=MAX_ITEMSET_SIZE):
+    """
+    Cuenta los conjuntos de servicios por cita
+
+    Args:
+        booking_ids (array): ID de cita de cada fila de booking_services
+        service_ids (array): ID de servicio de cada fila
+        max_size (int): Tamaño máximo de los conjuntos
+
+    Returns:
+        tuple: (baskets: int, itemsets: list of (tuple de IDs ordenados, conteo))
+    """
+    rows = np.unique(np.column_stack([
+        np.asarray(booking_ids, dtype=np.int64),
+        np.asarray(service_ids, dtype=np.int64)
+    ]).reshape(-1, 2), axis=0)
+    if not len(rows):
+        return 0, []
+
+    baskets, starts, sizes = np.unique(rows[:, 0], return_index=True, return_counts=True)
+    # Posición final (exclusiva) del grupo de cada fila; las filas vienen
+    # ordenadas por (cita, servicio), así que cada conjunto sale ordenado
+    group_end = np.repeat(starts + sizes, sizes)
+    services = rows[:, 1]
+
+    itemsets = []
+    positions = np.arange(len(rows))[:, None]
+    for size in range(1, max_size + 1):
+        itemsets.extend(_count_rows(services[positions]))
+        if size == max_size:
+            break
+
+        # Extender cada conjunto con las posiciones posteriores de la misma cita
+        last = positions[:, -1]
+        later = group_end[last] - last - 1
+        if not later.sum():
+            break
+        parent = np.repeat(np.arange(len(positions)), later)
+        offsets = np.arange(later.sum()) - np.repeat(np.cumsum(later) - later, later) + 1
+        positions = np.column_stack([positions[parent], last[parent] + offsets])
+
+    return len(baskets), itemsets
+
+
+def _count_rows(sets):
+    """Conteo de filas repetidas de una matriz de conjuntos (una fila por conjunto)"""
+    size = sets.shape[1]
+    if sets.max() < 1 << (63 // size):
+        # Empacar cada conjunto en un int64 hace el conteo unidimensional
+        bits = 63 // size
+        packed = np.zeros(len(sets), dtype=np.int64)
+        for column in range(size):
+            packed = (packed << bits) | sets[:, column]
+        keys, counts = np.unique(packed, return_counts=True)
+        mask = (1 << bits) - 1
+        unpacked = np.column_stack([(keys >> (bits * (size - 1 - column))) & mask for column in range(size)])
+    else:
+        unpacked, counts = np.unique(sets, axis=0, return_counts=True)
+    return [(tuple(int(s) for s in key), int(count)) for key, count in zip(unpacked, counts)]
+
+
+def refresh(db, batch_size=BATCH_SIZE):
+    """
+    Procesa las citas nuevas desde la marca de agua
+
+    Returns:
+        dict: bookings (citas procesadas), itemsets (conjuntos actualizados)
+              y elapsed_seconds
+    """
+    from psycopg2.extras import execute_values
+
+    ensure_schema(db)
+    started = time.monotonic()
+    processed = updated = 0
+
+    while True:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            # El bloqueo de la fila de estado evita dos refrescos simultáneos
+            cursor.execute("SELECT last_booking_id FROM service_combo_state FOR UPDATE")
+            last_booking_id = cursor.fetchone()[0]
+
+            cursor.execute('''
+                SELECT id FROM bookings
+                WHERE id > %s AND created_at < NOW() - make_interval(secs => %s)
+                ORDER BY id
+                LIMIT %s
+            ''', (last_booking_id, SETTLE_SECONDS, batch_size))
+            booking_ids = [row[0] for row in cursor.fetchall()]
+            if not booking_ids:
+                break
+
+            cursor.execute('''
+                SELECT booking_id, service_id FROM booking_services
+                WHERE booking_id = ANY(%s) AND service_id IS NOT NULL
+            ''', (booking_ids,))
+            rows = cursor.fetchall()
+            baskets, itemsets = count_itemsets([r[0] for r in rows], [r[1] for r in rows])
+
+            if itemsets:
+                execute_values(cursor, '''
+                    INSERT INTO service_itemset_counts AS c (items, size, bookings) VALUES %s
+                    ON CONFLICT (items) DO UPDATE SET bookings = c.bookings + EXCLUDED.bookings
+                ''', [(list(items), len(items), count) for items, count in itemsets],
+                    template="(%s::integer[], %s, %s)", page_size=1000)
+
+            cursor.execute('''
+                UPDATE service_combo_state
+                SET last_booking_id = %s, baskets = baskets + %s, refreshed_at = NOW()
+            ''', (booking_ids[-1], baskets))
+
+        processed += len(booking_ids)
+        updated += len(itemsets)
+        if len(booking_ids) < batch_size:
+            break
+
+    if processed:
+        rebuild_suggestions(db)
+
+    return {
+        'bookings': processed,
+        'itemsets': updated,
+        'elapsed_seconds': round(time.monotonic() - started, 2)
+    }
+
+
+def rebuild_suggestions(db, min_support=MIN_SUPPORT, min_count=MIN_COUNT):
+    """
+    Regenera service_suggestions a partir de los pares frecuentes
+
+    Returns:
+        int: Sugerencias guardadas
+    """
+    ensure_schema(db)
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM service_suggestions")
+        cursor.execute('''
+            WITH state AS (SELECT baskets FROM service_combo_state),
+            singles AS (
+                SELECT items[1] as service_id, bookings FROM service_itemset_counts WHERE size = 1
+            ), pairs AS (
+                SELECT p.items[1] as a, p.items[2] as b, p.bookings as together
+                FROM service_itemset_counts p, state
+                WHERE p.size = 2 AND p.bookings >= GREATEST(%s, CEIL(%s * state.baskets))
+            ), directed AS (
+                SELECT a as service_id, b as suggested_service_id, together FROM pairs
+                UNION ALL
+                SELECT b, a, together FROM pairs
+            )
+            INSERT INTO service_suggestions
+                (service_id, suggested_service_id, together, confidence, lift)
+            SELECT d.service_id, d.suggested_service_id, d.together,
+                   d.together::numeric / sa.bookings,
+                   d.together::numeric * state.baskets / (sa.bookings * sb.bookings)
+            FROM directed d
+            JOIN singles sa ON sa.service_id = d.service_id
+            JOIN singles sb ON sb.service_id = d.suggested_service_id
+            CROSS JOIN state
+        ''', (min_count, min_support))
+        return cursor.rowcount
+
+
+def get_suggestions(db, service_ids, limit=3):
+    """
+    Servicios activos reservados frecuentemente junto con los del carrito
+
+    Args:
+        db (Database): Instancia de base de datos
+        service_ids (list): IDs de los servicios en el carrito
+        limit (int): Máximo de sugerencias
+
+    Returns:
+        list: Servicios (como en la tabla services) con confidence
+    """
+    if not service_ids:
+        return []
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT s.*, MAX(g.confidence) as confidence
+            FROM service_suggestions g
+            JOIN services s ON s.id = g.suggested_service_id AND s.active = TRUE
+            WHERE g.service_id = ANY(%(cart)s) AND NOT g.suggested_service_id = ANY(%(cart)s)
+            GROUP BY s.id
+            ORDER BY MAX(g.confidence) DESC, SUM(g.together) DESC
+            LIMIT %(limit)s
+        ''', {'cart': list(service_ids), 'limit': limit})
+        return [db._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def get_frequent_combos(db, limit=10, min_support=MIN_SUPPORT, min_count=MIN_COUNT):
+    """
+    Conjuntos de 2 o más servicios activos que superan el soporte mínimo
+
+    Returns:
+        list: Dicts con service_ids, services (nombres), bookings y support (%)
+    """
+    ensure_schema(db)
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT c.items as service_ids,
+                   ARRAY(SELECT s.name FROM unnest(c.items) WITH ORDINALITY u(id, n)
+                         JOIN services s ON s.id = u.id ORDER BY u.n) as services,
+                   c.bookings,
+                   ROUND(100.0 * c.bookings / NULLIF(st.baskets, 0), 2) as support
+            FROM service_itemset_counts c
+            CROSS JOIN service_combo_state st
+            WHERE c.size >= 2 AND c.bookings >= GREATEST(%s, CEIL(%s * st.baskets))
+              AND NOT EXISTS (
+                  SELECT 1 FROM services s
+                  WHERE s.id = ANY(c.items) AND s.active = FALSE
+              )
+            ORDER BY c.bookings DESC, c.size DESC
+            LIMIT %s
+        ''', (min_count, min_support, limit))
+        return [db._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def run_forever(db, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+    """Procesa las citas nuevas de forma periódica"""
+    print(f"🔁 Minería de combinaciones iniciada (cada {interval_minutes} min)")
+
+    while True:
+        try:
+            result = refresh(db)
+            print(f"📊 [{datetime.now():%Y-%m-%d %H:%M}] {result['bookings']} citas procesadas, "
+                  f"{result['itemsets']} conjuntos actualizados ({result['elapsed_seconds']}s)")
+        except Exception as e:
+            print(f"❌ Error en minería de combinaciones: {e}")
+
+        time.sleep(interval_minutes * 60)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Minería de combinaciones de servicios")
+    parser.add_argument('--migrate', action='store_true', help="Crea las tablas de combinaciones")
+    parser.add_argument('--refresh', action='store_true', help="Procesa las citas nuevas y termina")
+    parser.add_argument('--rebuild', action='store_true', help="Regenera las sugerencias y termina")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL_MINUTES,
+                        help="Minutos entre ejecuciones")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de combinaciones aplicado")
+        else:
+            print("✅ El esquema de combinaciones ya estaba al día")
+    ensure_schema(database)
+    if args.refresh:
+        print(refresh(database))
+    elif args.rebuild:
+        print(f"✅ {rebuild_suggestions(database)} sugerencias guardadas")
+    elif not args.migrate:
+        run_forever(database, args.interval)
@@ -0,0 +1,168 @@
+"""
+Búsqueda de citas por teléfono o email para clientes que perdieron su código
+
+La consulta usa índices de expresión sobre los valores normalizados
+(ver src/clients.py y Database.find_bookings_by_contact). Para evitar que la
+búsqueda sirva para enumerar clientes, cada llave tiene un límite de intentos
+en una ventana deslizante. Las llaves de contacto van ligadas a quien busca
+(IP o sesión), así que los intentos de otra persona con el teléfono de un
+cliente no le impiden a él recuperar su código.
+
+Los intentos se guardan en PostgreSQL (`contact_lookup_attempts`): el límite
+se comparte entre procesos y réplicas y no se reinicia al reiniciar la app.
+
+Uso:
+    python -m src.contact_lookup --migrate
+
+    from src import contact_lookup
+    keys = contact_lookup.lookup_keys('ip:10.0.0.1', 'session:abc', phone='525512345678')
+    ok, message = contact_lookup.check_rate(db, keys)
+"""
+
+from src import migrations
+
+MAX_LOOKUPS = 5            # Búsquedas permitidas por llave...
+WINDOW_SECONDS = 300       # ...en esta ventana
+RETENTION_HOURS = 24       # Intentos más viejos se borran (mayor que cualquier ventana)
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS contact_lookup_attempts (
+        id BIGSERIAL PRIMARY KEY,
+        key VARCHAR(300) NOT NULL,
+        attempted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_contact_lookup_attempts_key
+        ON contact_lookup_attempts (key, attempted_at);
+    CREATE INDEX IF NOT EXISTS idx_contact_lookup_attempts_attempted_at
+        ON contact_lookup_attempts (attempted_at);
+'''
+
+_schema_ready = False
+
+
+def ensure_schema(db):
+    """
+    Verifica que la tabla de intentos exista (una vez por proceso)
+
+    No ejecuta DDL: la tabla se crea con `python -m src.contact_lookup --migrate`.
+
+    Raises:
+        RuntimeError: Si la tabla no existe
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    migrations.require(db, 'contact_lookup', SCHEMA_SQL, 'python -m src.contact_lookup --migrate',
+                       'contact_lookup_attempts')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea la tabla de intentos de búsqueda
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    if migrations.is_applied(db, 'contact_lookup', SCHEMA_SQL):
+        return False
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_SQL)
+        migrations.record(cursor, 'contact_lookup', SCHEMA_SQL)
+    return True
+
+
+def lookup_keys(requester, session=None, phone=None, email=None):
+    """
+    Llaves a limitar para una búsqueda por contacto
+
+    Args:
+        requester (str): Quién busca, p. ej. 'ip:10.0.0.1' (o la sesión si no hay IP)
+        session (str): Sesión de Streamlit, p. ej. 'session:abc' - opcional
+        phone (str): Teléfono normalizado - opcional
+        email (str): Email normalizado - opcional
+
+    Returns:
+        list: Llaves de quien busca y de cada contacto ligado a él
+    """
+    keys = [requester, session]
+    if phone:
+        keys.append(f"{requester}|phone:{phone}")
+    if email:
+        keys.append(f"{requester}|email:{email}")
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def check_rate(db, keys, max_lookups=MAX_LOOKUPS, window_seconds=WINDOW_SECONDS):
+    """
+    Registra un intento de búsqueda si ninguna llave excede el límite
+
+    Args:
+        db (Database): Instancia de base de datos
+        keys (iterable): Llaves a limitar (ver lookup_keys)
+        max_lookups (int): Intentos permitidos por llave en la ventana
+        window_seconds (int): Tamaño de la ventana en segundos
+
+    Returns:
+        tuple: (allowed: bool, message: str)
+    """
+    keys = sorted({key for key in keys if key})
+    if not keys:
+        return True, "✅ OK"
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        # Serializa los intentos simultáneos sobre las mismas llaves (en orden, sin interbloqueos)
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(key)) FROM unnest(%s::text[]) AS key", (keys,))
+        cursor.execute('''
+            SELECT key, COUNT(*),
+                   EXTRACT(EPOCH FROM MIN(attempted_at) + %(window)s * INTERVAL '1 second' - CURRENT_TIMESTAMP)
+            FROM contact_lookup_attempts
+            WHERE key = ANY(%(keys)s)
+              AND attempted_at > CURRENT_TIMESTAMP - %(window)s * INTERVAL '1 second'
+            GROUP BY key
+            HAVING COUNT(*) >= %(max)s
+        ''', {'keys': keys, 'window': window_seconds, 'max': max_lookups})
+        blocked = cursor.fetchall()
+        if blocked:
+            wait = int(max(remaining for _, _, remaining in blocked)) + 1
+            return False, f"⚠️ Demasiadas búsquedas. Intenta de nuevo en {wait} segundos"
+
+        cursor.execute('''
+            INSERT INTO contact_lookup_attempts (key)
+            SELECT unnest(%s::text[])
+        ''', (keys,))
+        cursor.execute(
+            "DELETE FROM contact_lookup_attempts WHERE attempted_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 hour'",
+            (RETENTION_HOURS,)
+        )
+    return True, "✅ OK"
+
+
+def reset(db, keys=None):
+    """Olvida los intentos registrados (todas las llaves si no se indican)"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        if keys is None:
+            cursor.execute("DELETE FROM contact_lookup_attempts")
+        else:
+            cursor.execute("DELETE FROM contact_lookup_attempts WHERE key = ANY(%s)", (list(keys),))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Límite de búsquedas por contacto")
+    parser.add_argument('--migrate', action='store_true', help="Crea la tabla de intentos de búsqueda")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de búsquedas por contacto aplicado")
+        else:
+            print("✅ El esquema de búsquedas por contacto ya estaba al día")
+    ensure_schema(database)
@@ -5,11 +5,13 @@ import os
 import bcrypt
 import json
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 from datetime import datetime, time, date
 from decimal import Decimal
 from contextlib import contextmanager
 from dotenv import load_dotenv
 from psycopg2.errors import UniqueViolation
+from src import mercadopago_client
 
 # Cargar variables de entorno
 load_dotenv()
@@ -156,7 +158,90 @@ class Database:
                 return True
             except psycopg2.IntegrityError:
                 return False
-    
+
+    def get_assignment_matrix(self):
+        """
+        Obtiene la matriz profesional × servicio en una sola consulta
+
+        Solo incluye profesionales y servicios activos.
+
+        Returns:
+            list: Una fila por par (professional_id, professional_name,
+                  service_id, service_name, assigned)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT p.id as professional_id, p.name as professional_name,
+                       s.id as service_id, s.name as service_name,
+                       EXISTS (
+                           SELECT 1 FROM professional_services ps
+                           WHERE ps.professional_id = p.id AND ps.service_id = s.id
+                       ) as assigned
+                FROM professionals p
+                CROSS JOIN services s
+                WHERE p.active = TRUE AND s.active = TRUE
+                ORDER BY p.name, p.id, s.name, s.id
+            ''')
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+    def apply_professional_service_changes(self, additions, removals):
+        """
+        Aplica altas y bajas de asignaciones en una sola transacción
+
+        Los pares con un profesional o servicio inactivo se ignoran (la matriz
+        solo muestra los activos).
+
+        Args:
+            additions (list): Pares (professional_id, service_id) a asignar
+            removals (list): Pares (professional_id, service_id) a quitar
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        if not additions and not removals:
+            return True, "Sin cambios"
+
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+
+                removed = []
+                if removals:
+                    removed = execute_values(cursor, '''
+                        DELETE FROM professional_services ps
+                        USING (VALUES %s) AS r (professional_id, service_id), professionals p, services s
+                        WHERE ps.professional_id = r.professional_id
+                          AND ps.service_id = r.service_id
+                          AND p.id = r.professional_id AND p.active = TRUE
+                          AND s.id = r.service_id AND s.active = TRUE
+                        RETURNING ps.id
+                    ''', removals, fetch=True)
+
+                added = []
+                if additions:
+                    # Los pares que ya existen se ignoran
+                    added = execute_values(cursor, '''
+                        INSERT INTO professional_services (professional_id, service_id)
+                        SELECT a.professional_id, a.service_id
+                        FROM (VALUES %s) AS a (professional_id, service_id)
+                        JOIN professionals p ON p.id = a.professional_id AND p.active = TRUE
+                        JOIN services s ON s.id = a.service_id AND s.active = TRUE
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM professional_services ps
+                            WHERE ps.professional_id = a.professional_id
+                              AND ps.service_id = a.service_id
+                        )
+                        RETURNING id
+                    ''', additions, fetch=True)
+
+                conn.commit()
+                return True, f"✅ {len(added)} asignaciones agregadas y {len(removed)} removidas"
+
+        except Exception as e:
+            print(f"❌ Error en apply_professional_service_changes: {str(e)}")
+            return False, f"❌ Error al guardar asignaciones: {str(e)}"
+
     # ==================== MÉTODOS DE HORARIOS ====================
     
     def add_schedule(self, professional_id, date, start_time):
@@ -420,19 +505,14 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Total de horarios
+            # Total y disponibles en una sola pasada
             cursor.execute('''
-                SELECT COUNT(*) as total FROM schedules
+                SELECT COUNT(*) as total,
+                       COUNT(*) FILTER (WHERE available = TRUE) as available
+                FROM schedules
                 WHERE professional_id = %s AND date >= %s AND date <= %s
             ''', (professional_id, start_date, end_date))
-            total = cursor.fetchone()[0]
-            
-            # Horarios disponibles
-            cursor.execute('''
-                SELECT COUNT(*) as available FROM schedules
-                WHERE professional_id = %s AND date >= %s AND date <= %s AND available = TRUE
-            ''', (professional_id, start_date, end_date))
-            available = cursor.fetchone()[0]
+            total, available = cursor.fetchone()
             
             # Horarios ocupados
             occupied = total - available
@@ -444,6 +524,107 @@ class Database:
                 'utilization_rate': (occupied / total * 100) if total > 0 else 0
             }
     
+    def get_utilization_minutes(self, start_date, end_date, professional_ids=None, slot_minutes=60):
+        """
+        Minutos de capacidad (horarios) y minutos reservados por profesional, día y hora
+        
+        Una sola consulta para todos los profesionales: la capacidad sale de los
+        bloques de `schedules` y los minutos reservados reparten cada cita no
+        cancelada entre las horas que abarca.
+        
+        Args:
+            start_date (str): Fecha inicio 'YYYY-MM-DD'
+            end_date (str): Fecha fin 'YYYY-MM-DD'
+            professional_ids (list): Limitar a estos profesionales - opcional
+            slot_minutes (int): Duración de cada bloque de horario
+        
+        Returns:
+            list: Filas con professional_id, professional_name, date, hour,
+                  capacity_minutes y booked_minutes
+        """
+        prof_filter = ""
+        params = {'start': start_date, 'end': end_date, 'slot': slot_minutes}
+        if professional_ids:
+            prof_filter = "AND professional_id = ANY(%(professionals)s)"
+            params['professionals'] = list(professional_ids)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                WITH capacity AS (
+                    SELECT professional_id, date,
+                           EXTRACT(HOUR FROM start_time)::int as hour,
+                           COUNT(*) * %(slot)s as capacity_minutes
+                    FROM schedules
+                    WHERE date >= %(start)s AND date <= %(end)s {prof_filter}
+                    GROUP BY 1, 2, 3
+                ), spans AS (
+                    SELECT professional_id, date,
+                           EXTRACT(EPOCH FROM start_time)::int / 60 as start_min,
+                           COALESCE(EXTRACT(EPOCH FROM end_time)::int / 60,
+                                    EXTRACT(EPOCH FROM start_time)::int / 60 + %(slot)s) as end_min
+                    FROM bookings
+                    WHERE date >= %(start)s AND date <= %(end)s {prof_filter}
+                      AND status <> 'cancelled' AND start_time IS NOT NULL
+                ), booked AS (
+                    SELECT s.professional_id, s.date, h.hour,
+                           SUM(LEAST(s.end_min, (h.hour + 1) * 60) - GREATEST(s.start_min, h.hour * 60)) as booked_minutes
+                    FROM spans s
+                    CROSS JOIN LATERAL generate_series(s.start_min / 60, (s.end_min - 1) / 60) as h(hour)
+                    WHERE s.end_min > s.start_min
+                    GROUP BY 1, 2, 3
+                )
+                SELECT COALESCE(c.professional_id, b.professional_id) as professional_id,
+                       COALESCE(p.name, 'Sin asignar') as professional_name,
+                       COALESCE(c.date, b.date) as date,
+                       COALESCE(c.hour, b.hour) as hour,
+                       COALESCE(c.capacity_minutes, 0)::int as capacity_minutes,
+                       COALESCE(b.booked_minutes, 0)::int as booked_minutes
+                FROM capacity c
+                FULL JOIN booked b
+                  ON b.professional_id = c.professional_id AND b.date = c.date AND b.hour = c.hour
+                LEFT JOIN professionals p ON p.id = COALESCE(c.professional_id, b.professional_id)
+                ORDER BY 1, 3, 4
+            ''', params)
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
+    def get_demand_by_weekday_hour(self, start_date, end_date, professional_ids=None):
+        """
+        Citas, ingresos y cancelaciones agrupados por día de la semana y hora
+        
+        Args:
+            start_date (str): Fecha inicio 'YYYY-MM-DD'
+            end_date (str): Fecha fin 'YYYY-MM-DD'
+            professional_ids (list): Limitar a estos profesionales - opcional
+        
+        Returns:
+            list: Filas con weekday (0 = lunes), hour, bookings (no canceladas),
+                  revenue y cancellations; solo las celdas con citas
+        """
+        prof_filter = ""
+        params = {'start': start_date, 'end': end_date}
+        if professional_ids:
+            prof_filter = "AND professional_id = ANY(%(professionals)s)"
+            params['professionals'] = list(professional_ids)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT EXTRACT(ISODOW FROM date)::int - 1 as weekday,
+                       EXTRACT(HOUR FROM start_time)::int as hour,
+                       COUNT(*) FILTER (WHERE status <> 'cancelled') as bookings,
+                       COALESCE(SUM(total_price) FILTER (WHERE status <> 'cancelled'), 0) as revenue,
+                       COUNT(*) FILTER (WHERE status = 'cancelled') as cancellations
+                FROM bookings
+                WHERE date >= %(start)s AND date <= %(end)s {prof_filter}
+                  AND start_time IS NOT NULL
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+            ''', params)
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
     # ==================== MÉTODOS DE CITAS ====================
     
     def create_booking(self, client_name, client_phone, client_email, date, start_time, 
@@ -604,12 +785,16 @@ class Database:
                     booking['start_time']
                 )
                 
-                # Actualizar cita
+                # Actualizar cita (la hora de fin se mueve con la de inicio)
                 cursor.execute('''
                     UPDATE bookings 
-                    SET date = %s, start_time = %s, updated_at = CURRENT_TIMESTAMP
+                    SET date = %s, start_time = %s,
+                        end_time = CASE WHEN end_time > start_time
+                                        THEN %s::time + (end_time - start_time)
+                                        ELSE end_time END,
+                        updated_at = CURRENT_TIMESTAMP
                     WHERE booking_code = %s
-                ''', (new_date, new_time, booking_code))
+                ''', (new_date, new_time, new_time, booking_code))
                 
                 # Registrar cambio
                 cursor.execute('''
@@ -632,9 +817,174 @@ class Database:
         except Exception as e:
             return False, f"❌ Error: {str(e)}"
     
+    # ==================== MÉTODOS DE CLIENTES ====================
+    # Tabla y contadores mantenidos por triggers (ver src/clients.py)
+    
+    def get_client(self, phone=None, email=None):
+        """
+        Obtiene el perfil de un cliente por teléfono o email (normalizados)
+        
+        Args:
+            phone (str): Teléfono en cualquier formato - opcional
+            email (str): Email - opcional
+        
+        Returns:
+            dict or None: Fila de clients (el teléfono tiene prioridad)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM clients
+                WHERE phone = normalize_phone(%(phone)s)
+                   OR (normalize_phone(%(phone)s) IS NULL AND email = normalize_email(%(email)s))
+                ORDER BY phone IS NULL, id
+                LIMIT 1
+            ''', {'phone': phone, 'email': email})
+            row = cursor.fetchone()
+            
+            return self._row_to_dict(cursor, row) if row else None
+    
+    def get_clients(self, order_by='last_booking_date', limit=50):
+        """
+        Lista de clientes para CRM ordenada por un contador
+        
+        Args:
+            order_by (str): 'last_booking_date', 'lifetime_value', 'bookings'
+                            o 'cancellations'
+            limit (int): Máximo de clientes
+        
+        Returns:
+            list: Filas de clients
+        """
+        orders = {
+            'last_booking_date': 'last_booking_date DESC NULLS LAST, id',
+            'lifetime_value': 'lifetime_value DESC, id',
+            'bookings': 'bookings DESC, id',
+            'cancellations': 'cancellations DESC, id'
+        }
+        if order_by not in orders:
+            raise ValueError(f"Orden no válido: {order_by}")
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT * FROM clients
+                WHERE bookings > 0
+                ORDER BY {orders[order_by]}
+                LIMIT %s
+            ''', (limit,))
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
+    def get_loyalty_balance(self, client_id):
+        """
+        Saldo de puntos de un cliente (una fila por cliente, ver src/loyalty.py)
+        
+        Args:
+            client_id (int): ID del cliente
+        
+        Returns:
+            dict: points, lifetime_points, entries y updated_at (en cero si
+                  el cliente aún no tiene movimientos)
+        """
+        empty = {'points': 0, 'lifetime_points': 0, 'entries': 0, 'updated_at': None}
+        if client_id is None:
+            return empty
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT points, lifetime_points, entries, updated_at
+                FROM loyalty_balances WHERE client_id = %s
+            ''', (client_id,))
+            row = cursor.fetchone()
+            
+            return self._row_to_dict(cursor, row) if row else empty
+    
+    def get_loyalty_ledger(self, client_id, limit=20):
+        """
+        Últimos movimientos de puntos de un cliente
+        
+        Args:
+            client_id (int): ID del cliente
+            limit (int): Máximo de movimientos
+        
+        Returns:
+            list: Movimientos con el código de la cita (si aún existe)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT l.id, l.entry_type, l.points, l.note, l.created_at, l.booking_id, b.booking_code
+                FROM loyalty_ledger l
+                LEFT JOIN bookings b ON b.id = l.booking_id
+                WHERE l.client_id = %s
+                ORDER BY l.id DESC
+                LIMIT %s
+            ''', (client_id, limit))
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
+    def find_bookings_by_contact(self, phone=None, email=None, require_both=False, recent_days=90, limit=20):
+        """
+        Busca las citas de un cliente por teléfono y/o email normalizados
+        
+        Usa los índices de expresión idx_bookings_phone_normalized e
+        idx_bookings_email_normalized (ver src/clients.py), por lo que no
+        recorre la tabla completa.
+        
+        Args:
+            phone (str): Teléfono en cualquier formato - opcional
+            email (str): Email - opcional
+            require_both (bool): Si True, ambos datos deben coincidir en la cita
+            recent_days (int): Días hacia atrás para las citas recientes
+            limit (int): Máximo de citas por grupo
+        
+        Returns:
+            dict: {'upcoming': [...], 'recent': [...]} con el nombre del
+                  profesional y los servicios de cada cita
+        """
+        conditions = []
+        if phone:
+            conditions.append('normalize_phone(b.client_phone) = normalize_phone(%(phone)s)')
+        if email:
+            conditions.append('normalize_email(b.client_email) = normalize_email(%(email)s)')
+        if not conditions or (require_both and len(conditions) < 2):
+            return {'upcoming': [], 'recent': []}
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                WITH matches AS (
+                    SELECT b.*
+                    FROM bookings b
+                    WHERE ({' AND '.join(conditions) if require_both else ' OR '.join(conditions)})
+                      AND b.date >= CURRENT_DATE - %(recent_days)s::int
+                ),
+                picked AS (
+                    (SELECT * FROM matches WHERE date >= CURRENT_DATE
+                     ORDER BY date, start_time LIMIT %(limit)s)
+                    UNION ALL
+                    (SELECT * FROM matches WHERE date < CURRENT_DATE
+                     ORDER BY date DESC, start_time DESC LIMIT %(limit)s)
+                )
+                SELECT m.id, m.booking_code, m.client_name, m.date, m.start_time, m.end_time,
+                       m.status, m.total_price, m.deposit_paid, m.date >= CURRENT_DATE AS upcoming,
+                       p.name AS professional_name,
+                       (SELECT string_agg(bs.service_name, ', ' ORDER BY bs.id)
+                        FROM booking_services bs WHERE bs.booking_id = m.id) AS services
+                FROM picked m
+                LEFT JOIN professionals p ON p.id = m.professional_id
+            ''', {'phone': phone, 'email': email, 'recent_days': recent_days, 'limit': limit})
+            rows = [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+            
+            upcoming = sorted((r for r in rows if r['upcoming']), key=lambda r: (r['date'], r['start_time']))
+            recent = sorted((r for r in rows if not r['upcoming']), key=lambda r: (r['date'], r['start_time']), reverse=True)
+            return {'upcoming': upcoming, 'recent': recent}
+    
     # ==================== MÉTODOS DE PAGOS - VERSIÓN MEJORADA ====================
     # Agrega estas funciones a tu clase Database en database.py
-
+    
     def create_payment(self, booking_code, booking_id, amount, payment_method='deposit', payment_status='pending'):
         """
         Crea un registro de pago en la base de datos
@@ -670,6 +1020,122 @@ class Database:
             return False, f"❌ Error al crear pago: {str(e)}"
 
 
+    def _upsert_payment_confirmations(self, cursor, confirmations):
+        """
+        Registra pagos validados y confirma sus citas en una sola sentencia
+        
+        Requiere el índice único sobre payments.mercado_pago_id
+        (ver src.payments_service.migrate). El pago sin ID de proveedor de
+        la cita toma el ID de la operación; si no hay uno, se inserta. Si el ID
+        ya existe, ON CONFLICT lo actualiza, de modo que validaciones
+        simultáneas (webhook, conciliación, validación manual) nunca duplican
+        filas y repetir una confirmación no tiene efecto.
+        
+        Args:
+            cursor: Cursor de la transacción en curso
+            confirmations (list): Lista de (booking_code, mercado_pago_id, payment_data)
+        
+        Returns:
+            list: Un dict por operación con booking_code, mercado_pago_id,
+                  payment_id, result ('confirmed', 'already_confirmed',
+                  'other_booking', 'booking_not_found') y booking_status
+        """
+        rows = [
+            (
+                booking_code,
+                str(mp_id).strip(),
+                payment_data.get('amount'),
+                payment_data.get('payment_method') or 'credit_card'
+            )
+            for booking_code, mp_id, payment_data in confirmations
+        ]
+        
+        results = execute_values(cursor, '''
+            WITH data (booking_code, mp_id, amount, method) AS (VALUES %s),
+            incoming AS (
+                SELECT DISTINCT ON (d.mp_id)
+                    d.booking_code, d.mp_id, d.amount::numeric AS amount, d.method,
+                    b.id AS booking_id
+                FROM data d
+                JOIN bookings b ON b.booking_code = d.booking_code
+                ORDER BY d.mp_id
+            ),
+            claimed AS (
+                UPDATE payments p
+                SET mercado_pago_id = i.mp_id,
+                    amount = i.amount,
+                    payment_method = i.method,
+                    payment_status = 'verified',
+                    verified = TRUE,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM incoming i
+                WHERE p.id = (
+                    SELECT x.id FROM payments x
+                    WHERE x.booking_code = i.booking_code
+                    AND x.mercado_pago_id IS NULL
+                    AND NOT COALESCE(x.verified, FALSE)
+                    ORDER BY x.created_at DESC
+                    LIMIT 1
+                )
+                AND p.mercado_pago_id IS NULL
+                AND NOT EXISTS (SELECT 1 FROM payments y WHERE y.mercado_pago_id = i.mp_id)
+                RETURNING p.id, p.booking_id, p.mercado_pago_id
+            ),
+            upserted AS (
+                INSERT INTO payments
+                (booking_code, booking_id, amount, payment_method, payment_status,
+                mercado_pago_id, verified, created_at, updated_at)
+                SELECT i.booking_code, i.booking_id, i.amount, i.method, 'verified',
+                       i.mp_id, TRUE, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+                FROM incoming i
+                WHERE i.mp_id NOT IN (SELECT mercado_pago_id FROM claimed)
+                ON CONFLICT (mercado_pago_id) DO UPDATE
+                SET amount = EXCLUDED.amount,
+                    payment_method = EXCLUDED.payment_method,
+                    payment_status = 'verified',
+                    verified = TRUE,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE payments.booking_code = EXCLUDED.booking_code
+                AND NOT COALESCE(payments.verified, FALSE)
+                RETURNING id, booking_id, mercado_pago_id
+            ),
+            changed AS (
+                SELECT * FROM claimed
+                UNION ALL
+                SELECT * FROM upserted
+            ),
+            confirmed AS (
+                UPDATE bookings b
+                SET status = 'confirmed',
+                    deposit_paid = i.amount,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM changed c
+                JOIN incoming i ON i.mp_id = c.mercado_pago_id
+                WHERE b.id = c.booking_id
+                RETURNING b.id, b.status
+            )
+            SELECT
+                d.booking_code,
+                d.mp_id AS mercado_pago_id,
+                COALESCE(c.id, p.id) AS payment_id,
+                CASE
+                    WHEN c.id IS NOT NULL THEN 'confirmed'
+                    WHEN b.id IS NULL THEN 'booking_not_found'
+                    WHEN p.id IS NOT NULL AND p.booking_code IS DISTINCT FROM d.booking_code THEN 'other_booking'
+                    ELSE 'already_confirmed'
+                END AS result,
+                COALESCE(cb.status, b.status) AS booking_status
+            FROM (SELECT DISTINCT booking_code, mp_id FROM data) d
+            LEFT JOIN bookings b ON b.booking_code = d.booking_code
+            LEFT JOIN changed c ON c.mercado_pago_id = d.mp_id
+            LEFT JOIN payments p ON p.mercado_pago_id = d.mp_id
+            LEFT JOIN (SELECT DISTINCT ON (id) id, status FROM confirmed) cb ON cb.id = b.id
+        ''', rows, page_size=len(rows), fetch=True)
+        
+        columns = ['booking_code', 'mercado_pago_id', 'payment_id', 'result', 'booking_status']
+        return [dict(zip(columns, row)) for row in results]
+
+
     def confirm_payment_with_operation(self, booking_code, payment_id, payment_data):
         """
         Confirma un pago después de validarlo con Mercado Pago
@@ -685,79 +1151,28 @@ class Database:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                
-                # 1. Buscar si existe un pago para este booking_code
-                cursor.execute('''
-                    SELECT id, booking_id FROM payments 
-                    WHERE booking_code = %s
-                ''', (booking_code,))
-                
-                existing_payment = cursor.fetchone()
-                
-                if existing_payment:
-                    # Actualizar el pago existente
-                    payment_record_id = existing_payment[0]
-                    
-                    cursor.execute('''
-                        UPDATE payments
-                        SET 
-                            mercado_pago_id = %s,
-                            amount = %s,
-                            payment_method = %s,
-                            payment_status = %s,
-                            verified = TRUE,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE id = %s
-                    ''', (
-                        str(payment_id),
-                        payment_data.get('amount'),
-                        payment_data.get('payment_method', 'credit_card'),
-                        'verified',
-                        payment_record_id
-                    ))
-                else:
-                    # Crear un nuevo pago (si aún no existe)
-                    # Primero obtener el booking_id del booking_code
-                    cursor.execute('SELECT id FROM bookings WHERE booking_code = %s', (booking_code,))
-                    booking_row = cursor.fetchone()
-                    
-                    if not booking_row:
-                        return False, f"❌ No se encontró la cita {booking_code}"
-                    
-                    booking_id = booking_row[0]
-                    
-                    cursor.execute('''
-                        INSERT INTO payments
-                        (booking_code, booking_id, amount, payment_method, payment_status, 
-                        mercado_pago_id, verified, created_at, updated_at)
-                        VALUES (%s, %s, %s, %s, %s, %s, TRUE, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                    ''', (
-                        booking_code,
-                        booking_id,
-                        payment_data.get('amount'),
-                        payment_data.get('payment_method', 'credit_card'),
-                        'verified',
-                        str(payment_id)
-                    ))
-                
-                # 2. Actualizar el estado de la cita
-                cursor.execute('''
-                    UPDATE bookings
-                    SET status = 'confirmed', 
-                        deposit_paid = %s,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE booking_code = %s
-                ''', (payment_data.get('amount'), booking_code))
+                outcome = self._upsert_payment_confirmations(
+                    cursor, [(booking_code, payment_id, payment_data)]
+                )[0]
                 conn.commit()
-                
-                print(f"✅ Pago confirmado - Booking: {booking_code}, MP ID: {payment_id}")
-                return True, f"✅ Pago confirmado exitosamente. ID Mercado Pago: {payment_id}"
         
         except Exception as e:
             print(f"❌ Error en confirm_payment_with_operation: {str(e)}")
             import traceback
             traceback.print_exc()
             return False, f"❌ Error al confirmar pago: {str(e)}"
+        
+        if outcome['result'] == 'booking_not_found':
+            return False, f"❌ No se encontró la cita {booking_code}"
+        
+        if outcome['result'] == 'other_booking':
+            return False, f"❌ El pago {payment_id} ya está registrado en otra cita"
+        
+        if outcome['result'] == 'already_confirmed':
+            return True, f"✅ El pago {payment_id} ya estaba confirmado (cita {outcome['booking_status']})"
+        
+        print(f"✅ Pago confirmado - Booking: {booking_code}, MP ID: {payment_id}")
+        return True, f"✅ Pago confirmado exitosamente. ID Mercado Pago: {payment_id}"
 
 
     def update_payment_status(self, payment_id, payment_status):
@@ -842,6 +1257,79 @@ class Database:
             return []
 
 
+    def save_payment_link(self, booking_code, init_point, preference_id, amount):
+        """
+        Guarda el enlace de pago de Mercado Pago en el pago pendiente más reciente
+
+        Args:
+            booking_code (str): Código de la cita
+            init_point (str): URL de pago (init_point de la preferencia)
+            preference_id (str): ID de la preferencia
+            amount (float): Monto que cobra la preferencia
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE payments
+                    SET init_point = %s,
+                        preference_id = %s,
+                        init_point_amount = %s,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = (
+                        SELECT id FROM payments
+                        WHERE booking_code = %s AND payment_status = 'pending'
+                        ORDER BY created_at DESC
+                        LIMIT 1
+                    )
+                ''', (init_point, preference_id, amount, booking_code))
+
+                if cursor.rowcount == 0:
+                    return False, "❌ No hay pago pendiente para esta cita"
+
+                conn.commit()
+                return True, "✅ Enlace de pago guardado"
+
+        except Exception as e:
+            print(f"❌ Error en save_payment_link: {str(e)}")
+            return False, f"❌ Error al guardar enlace de pago: {str(e)}"
+
+
+    def get_payment_link(self, booking_code, amount):
+        """
+        Obtiene el enlace de pago guardado del pago pendiente más reciente
+
+        Args:
+            booking_code (str): Código de la cita
+            amount (float): Monto que debe cobrar el enlace
+
+        Returns:
+            str: init_point o None si no hay enlace para ese monto
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT init_point FROM payments
+                    WHERE booking_code = %s
+                    AND payment_status = 'pending'
+                    AND init_point IS NOT NULL
+                    AND init_point_amount = %s
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                ''', (booking_code, amount))
+
+                row = cursor.fetchone()
+                return row[0] if row else None
+
+        except Exception as e:
+            print(f"❌ Error en get_payment_link: {str(e)}")
+            return None
+
+
     def update_deposit_paid(self, booking_code, deposit_amount):
         """
         Actualiza el anticipo pagado de una cita
@@ -928,59 +1416,276 @@ class Database:
             return False, f"❌ Error: {str(e)}"
 
 
-    def get_pending_payments(self):
+    def _created_at_range(self, start_date=None, end_date=None):
         """
-        Obtiene todos los pagos pendientes del sistema
+        Condiciones de rango sobre payments.created_at (usan el índice)
+        
+        Equivale a DATE(created_at) BETWEEN start_date AND end_date sin
+        envolver la columna en una función.
+        
+        Returns:
+            tuple: (conditions: list, params: list)
+        """
+        conditions = []
+        params = []
+        
+        if start_date:
+            conditions.append("created_at >= %s::date")
+            params.append(start_date)
+        if end_date:
+            conditions.append("created_at < %s::date + 1")
+            params.append(end_date)
+        
+        return conditions, params
+
+    def _payments_by_status_page(self, payment_status, start_date=None, end_date=None, before=None, limit=200):
+        """
+        Página de pagos de un estado, más recientes primero (paginación por llave)
+        
+        Args:
+            payment_status (str): Estado del pago
+            start_date (str): Fecha inicio (YYYY-MM-DD) - opcional
+            end_date (str): Fecha fin (YYYY-MM-DD) - opcional
+            before (tuple): (created_at, id) de la última fila de la página anterior
+            limit (int): Tamaño de página
+        
+        Returns:
+            list: Pagos ordenados por (created_at, id) descendente
+        """
+        conditions, params = self._created_at_range(start_date, end_date)
+        conditions.insert(0, "payment_status = %s")
+        params.insert(0, payment_status)
+        
+        if before:
+            conditions.append("(created_at, id) < (%s, %s)")
+            params.extend(before)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT * FROM payments
+                WHERE {' AND '.join(conditions)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            ''', params + [limit])
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+    def get_pending_payments(self, before=None, limit=200):
+        """
+        Obtiene pagos pendientes, más recientes primero
+        
+        Args:
+            before (tuple): (created_at, id) del último pago de la página anterior
+                            - opcional
+            limit (int): Tamaño de página
         
         Returns:
             list: Lista de pagos pendientes
         """
+        try:
+            return self._payments_by_status_page('pending', before=before, limit=limit)
+        
+        except Exception as e:
+            print(f"❌ Error en get_pending_payments: {str(e)}")
+            return []
+
+
+    def get_pending_payments_page(self, after_id=0, limit=200):
+        """
+        Obtiene una página de pagos pendientes ordenada por ID (paginación por llave)
+        
+        Args:
+            after_id (int): Último ID de la página anterior (0 para la primera)
+            limit (int): Tamaño de página
+        
+        Returns:
+            list: Pagos pendientes con id > after_id
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, booking_code, booking_id, amount, created_at
+                FROM payments
+                WHERE payment_status = 'pending' AND id > %s
+                ORDER BY id
+                LIMIT %s
+            ''', (after_id, limit))
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+    def _booking_payments_filter(self, payment_state=None, start_date=None, end_date=None, min_pending=0):
+        """
+        Construye el WHERE de la vista de pagos por cita
+
+        Args:
+            payment_state (str): 'pending', 'confirmed', 'paid' o None para todos
+            start_date (str): Fecha inicial YYYY-MM-DD (incluida) o None
+            end_date (str): Fecha final YYYY-MM-DD (incluida) o None
+            min_pending (float): Monto pendiente mínimo
+
+        Returns:
+            tuple: (where_sql: str, params: list)
+        """
+        conditions = ['TRUE']
+        params = []
+
+        if payment_state == 'pending':
+            conditions.append("b.status = 'pending'")
+        elif payment_state == 'confirmed':
+            conditions.append("b.status = 'confirmed'")
+        elif payment_state == 'paid':
+            conditions.append("b.deposit_paid >= b.total_price")
+
+        # Rangos directos sobre la columna para poder usar índices
+        if start_date:
+            conditions.append("b.date >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append("b.date <= %s")
+            params.append(end_date)
+
+        if min_pending and min_pending > 0:
+            conditions.append("(b.total_price - b.deposit_paid) >= %s")
+            params.append(min_pending)
+
+        return ' AND '.join(conditions), params
+
+    def get_booking_payments_totals(self, **filters):
+        """
+        Totales de la vista de pagos calculados en SQL (una fila por cita)
+
+        Args:
+            **filters: Ver _booking_payments_filter
+
+        Returns:
+            dict: total_bookings, total_value, total_collected, total_pending
+        """
+        where_sql, params = self._booking_payments_filter(**filters)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT
+                    COUNT(*) as total_bookings,
+                    COALESCE(SUM(b.total_price), 0) as total_value,
+                    COALESCE(SUM(b.deposit_paid), 0) as total_collected,
+                    COALESCE(SUM(GREATEST(b.total_price - b.deposit_paid, 0)), 0) as total_pending
+                FROM bookings b
+                WHERE {where_sql}
+            ''', params)
+
+            return self._row_to_dict(cursor, cursor.fetchone())
+
+    def get_booking_payments_page(self, after=None, limit=50, **filters):
+        """
+        Obtiene una página de citas con su pago más reciente (paginación por llave)
+
+        Las citas se ordenan por (date, start_time, id) descendente; cada cita
+        aparece una sola vez aunque tenga varios pagos.
+
+        Args:
+            after (tuple): (date, start_time, id) de la última fila de la página
+                           anterior, o None para la primera página
+            limit (int): Tamaño de página
+            **filters: Ver _booking_payments_filter
+
+        Returns:
+            list: Citas con total_price, deposit_paid, pending y datos del último pago
+        """
+        where_sql, params = self._booking_payments_filter(**filters)
+
+        if after:
+            where_sql += " AND (b.date, b.start_time, b.id) < (%s, %s, %s)"
+            params.extend(after)
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT
+                    b.id,
+                    b.booking_code,
+                    b.client_name,
+                    b.client_phone,
+                    b.client_email,
+                    b.date,
+                    b.start_time,
+                    b.total_price,
+                    b.deposit_paid,
+                    GREATEST(b.total_price - b.deposit_paid, 0) as pending,
+                    b.status as booking_status,
+                    lp.mercado_pago_id,
+                    lp.payment_status,
+                    lp.verified,
+                    lp.created_at as payment_date,
+                    pr.name as professional_name
+                FROM bookings b
+                LEFT JOIN LATERAL (
+                    SELECT p.mercado_pago_id, p.payment_status, p.verified, p.created_at
+                    FROM payments p
+                    WHERE p.booking_id = b.id
+                    ORDER BY p.created_at DESC, p.id DESC
+                    LIMIT 1
+                ) lp ON TRUE
+                LEFT JOIN professionals pr ON b.professional_id = pr.id
+                WHERE {where_sql}
+                ORDER BY b.date DESC, b.start_time DESC, b.id DESC
+                LIMIT %s
+            ''', params + [limit])
+
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+    def confirm_payments_bulk(self, confirmations):
+        """
+        Confirma varios pagos validados en una sola transacción
+        
+        Usa el mismo upsert que confirm_payment_with_operation: las operaciones
+        ya registradas se ignoran.
+        
+        Args:
+            confirmations (list): Lista de (booking_code, mercado_pago_id, payment_data)
+        
+        Returns:
+            tuple: (success: bool, confirmed booking_codes: list or error_message: str)
+        """
+        if not confirmations:
+            return True, []
+        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM payments 
-                    WHERE payment_status = 'pending'
-                    ORDER BY created_at DESC
-                ''')
+                outcomes = self._upsert_payment_confirmations(cursor, confirmations)
+                conn.commit()
                 
-                return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+                confirmed = [o['booking_code'] for o in outcomes if o['result'] == 'confirmed']
+                print(f"✅ {len(confirmed)} pagos confirmados en lote")
+                return True, confirmed
         
         except Exception as e:
-            print(f"❌ Error en get_pending_payments: {str(e)}")
-            return []
+            print(f"❌ Error en confirm_payments_bulk: {str(e)}")
+            return False, f"❌ Error al confirmar pagos: {str(e)}"
 
 
-    def get_verified_payments(self, start_date=None, end_date=None):
+    def get_verified_payments(self, start_date=None, end_date=None, before=None, limit=200):
         """
         Obtiene pagos verificados en un rango de fechas
         
         Args:
             start_date (str): Fecha inicio (YYYY-MM-DD) - opcional
             end_date (str): Fecha fin (YYYY-MM-DD) - opcional
+            before (tuple): (created_at, id) del último pago de la página anterior
+                            - opcional
+            limit (int): Tamaño de página
         
         Returns:
             list: Lista de pagos verificados
         """
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                if start_date and end_date:
-                    cursor.execute('''
-                        SELECT * FROM payments 
-                        WHERE payment_status = 'verified'
-                        AND DATE(created_at) BETWEEN %s AND %s
-                        ORDER BY created_at DESC
-                    ''', (start_date, end_date))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM payments 
-                        WHERE payment_status = 'verified'
-                        ORDER BY created_at DESC
-                    ''')
-                
-                return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+            return self._payments_by_status_page(
+                'verified', start_date, end_date, before=before, limit=limit
+            )
         
         except Exception as e:
             print(f"❌ Error en get_verified_payments: {str(e)}")
@@ -991,6 +1696,9 @@ class Database:
         """
         Obtiene un resumen de pagos para reportes
         
+        Lee el resumen diario `daily_payment_stats` (ver src/rollups.py) en
+        lugar de recorrer la tabla de pagos.
+        
         Args:
             start_date (str): Fecha inicio (YYYY-MM-DD) - opcional
             end_date (str): Fecha fin (YYYY-MM-DD) - opcional
@@ -1002,29 +1710,19 @@ class Database:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                if start_date and end_date:
-                    cursor.execute('''
-                        SELECT 
-                            COUNT(*) as total_payments,
-                            SUM(amount) as total_amount,
-                            AVG(amount) as average_amount,
-                            COUNT(CASE WHEN payment_status = 'verified' THEN 1 END) as verified_count,
-                            COUNT(CASE WHEN payment_status = 'pending' THEN 1 END) as pending_count,
-                            COUNT(CASE WHEN verified = TRUE THEN 1 END) as verified_true_count
-                        FROM payments
-                        WHERE DATE(created_at) BETWEEN %s AND %s
-                    ''', (start_date, end_date))
-                else:
-                    cursor.execute('''
-                        SELECT 
-                            COUNT(*) as total_payments,
-                            SUM(amount) as total_amount,
-                            AVG(amount) as average_amount,
-                            COUNT(CASE WHEN payment_status = 'verified' THEN 1 END) as verified_count,
-                            COUNT(CASE WHEN payment_status = 'pending' THEN 1 END) as pending_count,
-                            COUNT(CASE WHEN verified = TRUE THEN 1 END) as verified_true_count
-                        FROM payments
-                    ''')
+                conditions, params = self._stat_date_range(start_date, end_date)
+                
+                cursor.execute(f'''
+                    SELECT 
+                        COALESCE(SUM(payments), 0)::int as total_payments,
+                        SUM(amount) as total_amount,
+                        SUM(amount) / NULLIF(SUM(amounts), 0) as average_amount,
+                        COALESCE(SUM(payments) FILTER (WHERE payment_status = 'verified'), 0)::int as verified_count,
+                        COALESCE(SUM(payments) FILTER (WHERE payment_status = 'pending'), 0)::int as pending_count,
+                        COALESCE(SUM(verified), 0)::int as verified_true_count
+                    FROM daily_payment_stats
+                    WHERE {conditions}
+                ''', params)
                 
                 row = cursor.fetchone()
                 return self._row_to_dict(cursor, row) if row else {}
@@ -1063,26 +1761,205 @@ class Database:
             
             return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
     
+    def _stat_date_range(self, start_date=None, end_date=None, column='stat_date'):
+        """Condiciones de rango sobre stat_date de las tablas de resumen"""
+        conditions = ['TRUE']
+        params = []
+        if start_date:
+            conditions.append(f"{column} >= %s")
+            params.append(start_date)
+        if end_date:
+            conditions.append(f"{column} <= %s")
+            params.append(end_date)
+        return ' AND '.join(conditions), params
+    
     def get_booking_statistics(self, start_date, end_date):
-        """Obtiene estadísticas de citas en un rango de fechas"""
+        """Obtiene estadísticas de citas en un rango de fechas (desde daily_booking_stats)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
+            conditions, params = self._stat_date_range(start_date, end_date)
+            
+            cursor.execute(f'''
                 SELECT 
-                    COUNT(*) as total_bookings,
-                    SUM(total_price) as total_revenue,
-                    SUM(deposit_paid) as total_deposits,
-                    COUNT(CASE WHEN status = 'confirmed' THEN 1 END) as confirmed,
-                    COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending,
-                    COUNT(CASE WHEN status = 'cancelled' THEN 1 END) as cancelled
-                FROM bookings
-                WHERE date >= %s AND date <= %s
-            ''', (start_date, end_date))
+                    COALESCE(SUM(bookings), 0)::int as total_bookings,
+                    SUM(revenue) as total_revenue,
+                    SUM(deposits) as total_deposits,
+                    COALESCE(SUM(bookings) FILTER (WHERE status = 'confirmed'), 0)::int as confirmed,
+                    COALESCE(SUM(bookings) FILTER (WHERE status = 'pending'), 0)::int as pending,
+                    COALESCE(SUM(bookings) FILTER (WHERE status = 'cancelled'), 0)::int as cancelled
+                FROM daily_booking_stats
+                WHERE service_id = 0 AND {conditions}
+            ''', params)
             
             row = cursor.fetchone()
             return self._row_to_dict(cursor, row) if row else None
     
+    def get_daily_booking_totals(self, start_date, end_date):
+        """
+        Citas, ingresos y anticipos por día (desde daily_booking_stats)
+        
+        Args:
+            start_date (str): Fecha inicio (YYYY-MM-DD)
+            end_date (str): Fecha fin (YYYY-MM-DD)
+        
+        Returns:
+            list: Un dict por día con booking_date, total_bookings,
+                  total_revenue y deposits_collected
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            conditions, params = self._stat_date_range(start_date, end_date)
+            
+            cursor.execute(f'''
+                SELECT 
+                    stat_date as booking_date,
+                    SUM(bookings)::int as total_bookings,
+                    SUM(revenue) as total_revenue,
+                    SUM(deposits) as deposits_collected
+                FROM daily_booking_stats
+                WHERE service_id = 0 AND {conditions}
+                GROUP BY stat_date
+                HAVING SUM(bookings) > 0
+                ORDER BY stat_date
+            ''', params)
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
+    def get_period_comparison(self, start_date, end_date, dimension='day', professional_ids=None, category_ids=None):
+        """
+        Compara un rango contra el periodo anterior y el mismo rango del año pasado
+        
+        Una sola consulta sobre daily_booking_stats: cada fila de los tres
+        periodos se etiqueta con su periodo y las funciones de ventana calculan
+        la participación dentro del periodo y el valor del rango actual para
+        la misma llave. Las citas canceladas no cuentan.
+        
+        Args:
+            start_date (str): Fecha inicio 'YYYY-MM-DD'
+            end_date (str): Fecha fin 'YYYY-MM-DD'
+            dimension (str): 'day' (alineado por día del periodo), 'professional'
+                             o 'category'
+            professional_ids (list): Limitar a estos profesionales - opcional
+            category_ids (list): Limitar a estas categorías - opcional
+        
+        Returns:
+            list: Filas con key, label, period ('current', 'previous' o
+                  'last_year'), bookings, revenue, revenue_share (%),
+                  current_revenue y revenue_change (%)
+        
+        Raises:
+            ValueError: Si la dimensión no es válida
+        """
+        if dimension not in ('day', 'professional', 'category'):
+            raise ValueError(f"Dimensión no válida: {dimension}")
+        
+        # Por categoría (o con filtro de categoría) se leen las filas por
+        # servicio; el resto usa los totales por cita (service_id = 0)
+        by_service = dimension == 'category' or bool(category_ids)
+        
+        filters = ["d.status <> 'cancelled'", "d.service_id > 0" if by_service else "d.service_id = 0"]
+        params = {'start': start_date, 'end': end_date}
+        if professional_ids:
+            filters.append("d.professional_id = ANY(%(professionals)s)")
+            params['professionals'] = list(professional_ids)
+        if category_ids:
+            filters.append("s.category_id = ANY(%(categories)s)")
+            params['categories'] = list(category_ids)
+        
+        key_sql, label_sql = {
+            'day': ("(d.stat_date - p.period_start)",
+                    "to_char(%(start)s::date + (d.stat_date - p.period_start), 'YYYY-MM-DD')"),
+            'professional': ("d.professional_id", "COALESCE(pr.name, 'Sin asignar')"),
+            'category': ("COALESCE(s.category_id, 0)", "COALESCE(c.name, 'Sin categoría')")
+        }[dimension]
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                WITH periods(period, period_start, period_end) AS (
+                    SELECT 'current', %(start)s::date, %(end)s::date
+                    UNION ALL
+                    SELECT 'previous', %(start)s::date - (%(end)s::date - %(start)s::date) - 1, %(start)s::date - 1
+                    UNION ALL
+                    SELECT 'last_year', (%(start)s::date - INTERVAL '1 year')::date,
+                                        (%(end)s::date - INTERVAL '1 year')::date
+                ), facts AS (
+                    SELECT p.period, {key_sql} as key, MIN({label_sql}) as label,
+                           SUM(d.bookings)::int as bookings, SUM(d.revenue) as revenue
+                    FROM periods p
+                    JOIN daily_booking_stats d
+                      ON d.stat_date >= p.period_start AND d.stat_date <= p.period_end
+                    LEFT JOIN services s ON s.id = d.service_id
+                    LEFT JOIN categories c ON c.id = s.category_id
+                    LEFT JOIN professionals pr ON pr.id = d.professional_id
+                    WHERE {' AND '.join(filters)}
+                    GROUP BY 1, 2
+                    HAVING SUM(d.bookings) > 0
+                )
+                SELECT key, label, period, bookings, revenue,
+                       ROUND(100 * revenue / NULLIF(SUM(revenue) OVER (PARTITION BY period), 0), 2) as revenue_share,
+                       SUM(revenue) FILTER (WHERE period = 'current') OVER (PARTITION BY key) as current_revenue,
+                       ROUND(100 * (SUM(revenue) FILTER (WHERE period = 'current') OVER (PARTITION BY key) - revenue)
+                             / NULLIF(revenue, 0), 2) as revenue_change
+                FROM facts
+                ORDER BY key, period
+            ''', params)
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
+    def get_professional_service_revenue(self, start_date, end_date, by='service'):
+        """
+        Servicios realizados e ingresos por profesional y servicio (o categoría)
+        
+        Una sola agregación sobre las filas por servicio de daily_booking_stats;
+        las citas canceladas no cuentan.
+        
+        Args:
+            start_date (str): Fecha inicio 'YYYY-MM-DD'
+            end_date (str): Fecha fin 'YYYY-MM-DD'
+            by (str): 'service' o 'category'
+        
+        Returns:
+            list: Filas con professional_id, professional_name, item_id,
+                  item_name, services (veces realizado) y revenue
+        
+        Raises:
+            ValueError: Si `by` no es válido
+        """
+        if by not in ('service', 'category'):
+            raise ValueError(f"Agrupación no válida: {by}")
+        
+        item_id, item_name = {
+            'service': ("d.service_id", "COALESCE(s.name, 'Servicio #' || d.service_id)"),
+            'category': ("COALESCE(s.category_id, 0)", "COALESCE(c.name, 'Sin categoría')")
+        }[by]
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            conditions, params = self._stat_date_range(start_date, end_date, column='d.stat_date')
+            
+            cursor.execute(f'''
+                SELECT d.professional_id,
+                       COALESCE(p.name, 'Sin asignar') as professional_name,
+                       {item_id} as item_id,
+                       MIN({item_name}) as item_name,
+                       SUM(d.bookings)::int as services,
+                       SUM(d.revenue) as revenue
+                FROM daily_booking_stats d
+                LEFT JOIN services s ON s.id = d.service_id
+                LEFT JOIN categories c ON c.id = s.category_id
+                LEFT JOIN professionals p ON p.id = d.professional_id
+                WHERE d.service_id > 0 AND d.status <> 'cancelled' AND {conditions}
+                GROUP BY 1, 2, 3
+                HAVING SUM(d.bookings) > 0
+                ORDER BY 2, 4
+            ''', params)
+            
+            return [self._row_to_dict(cursor, row) for row in cursor.fetchall()]
+    
     def create_professional_schedules(self, professional_id, start_date, end_date, 
                                      start_time, end_time, days_of_week):
         """
@@ -1320,19 +2197,17 @@ class Database:
             if not payment_id or not str(payment_id).strip():
                 return False, {}, "El ID de pago no puede estar vacío"
             
-            # URL de la API de Mercado Pago para obtener detalles del pago
-            url = f"https://api.mercadopago.com/v1/payments/{payment_id}"
-            
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-            
-            # Realizar petición a Mercado Pago
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            # Consultar el pago con la sesión compartida (reintentos + caché)
+            status_code, payment = mercadopago_client.get_payment(payment_id, access_token)
             
-            payment = response.json()
+            # Manejar errores específicos de HTTP
+            if status_code == 404:
+                return False, {}, "El ID de pago no existe en Mercado Pago"
+            elif status_code == 401:
+                return False, {}, "Token de Mercado Pago inválido o expirado"
+            elif status_code >= 400:
+                error_detail = payment.get("message") or f"HTTP {status_code}"
+                return False, {}, f"Error en la validación: {error_detail}"
             
             # Validar que el pago exista
             if not payment or "id" not in payment:
@@ -1349,16 +2224,7 @@ class Database:
                 return False, {}, f"El pago no corresponde a esta cita. Referencia esperada: {booking_code}"
             
             # Extraer datos del pago
-            payment_data = {
-                "operation_id": payment.get("id"),
-                "amount": payment.get("transaction_amount"),
-                "status": status,
-                "date": payment.get("date_approved"),
-                "payer_email": payment.get("payer", {}).get("email"),
-                "payment_method": payment.get("payment_method", {}).get("type"),
-                "payment_type": payment.get("payment_type_id"),  # credit_card, debit_card, account_money, etc.
-                "currency": payment.get("currency_id")
-            }
+            payment_data = mercadopago_client.payment_summary(payment)
             
             return True, payment_data, None
         
@@ -1368,20 +2234,6 @@ class Database:
         except requests.exceptions.ConnectionError:
             return False, {}, "Error de conexión con Mercado Pago. Verifica tu conexión a internet"
         
-        except requests.exceptions.HTTPError as e:
-            # Manejar errores específicos de HTTP
-            if e.response.status_code == 404:
-                return False, {}, "El ID de pago no existe en Mercado Pago"
-            elif e.response.status_code == 401:
-                return False, {}, "Token de Mercado Pago inválido o expirado"
-            else:
-                error_detail = ""
-                try:
-                    error_detail = e.response.json().get("message", str(e))
-                except:
-                    error_detail = str(e)
-                return False, {}, f"Error en la validación: {error_detail}"
-        
         except Exception as e:
             return False, {}, f"Error inesperado: {str(e)}"
         
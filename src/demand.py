@@ -0,0 +1,68 @@
+"""
+Demanda por día de la semana y hora
+
+Agrupa las citas de cualquier rango en una sola consulta
+(Database.get_demand_by_weekday_hour) y las vuelca en matrices densas de
+7 × 24 (lunes a domingo × 0-23 h) listas para un mapa de calor, de modo que
+los rangos largos nunca traen filas crudas a Streamlit.
+
+Uso:
+    from src import demand
+    grids = demand.load_demand(db, '2025-01-01', '2025-06-30')
+    grids['bookings']       # DataFrame 7 × 24
+"""
+
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+HOURS = list(range(24))
+METRICS = ('bookings', 'revenue', 'cancellations')
+
+
+def build_grids(rows):
+    """
+    Convierte las filas agrupadas en una matriz densa por métrica
+
+    Args:
+        rows (list): Filas con weekday, hour y las columnas de METRICS
+
+    Returns:
+        dict: {métrica: DataFrame 7 × 24 (índice WEEKDAYS, columnas HOURS)}
+    """
+    weekday = np.array([row['weekday'] for row in rows], dtype=int)
+    hour = np.array([row['hour'] for row in rows], dtype=int)
+
+    grids = {}
+    for metric in METRICS:
+        grid = np.zeros((len(WEEKDAYS), len(HOURS)))
+        np.add.at(grid, (weekday, hour), np.array([row[metric] for row in rows], dtype=float))
+        grids[metric] = pd.DataFrame(grid, index=WEEKDAYS, columns=HOURS)
+    return grids
+
+
+def load_demand(db, start_date, end_date, professional_ids=None):
+    """
+    Matrices de demanda día de la semana × hora para un rango
+
+    Args:
+        db (Database): Instancia de base de datos
+        start_date (str): Fecha inicio 'YYYY-MM-DD'
+        end_date (str): Fecha fin 'YYYY-MM-DD'
+        professional_ids (list): Limitar a estos profesionales - opcional
+
+    Returns:
+        dict: {'bookings', 'revenue', 'cancellations': DataFrame 7 × 24}
+    """
+    return build_grids(db.get_demand_by_weekday_hour(start_date, end_date, professional_ids))
+
+
+def hourly_profile(grids, metric='bookings'):
+    """Total por hora (suma de los días de la semana), sin las horas vacías"""
+    totals = grids[metric].sum(axis=0)
+    return totals[totals > 0]
+
+
+def to_long(grid, value_name):
+    """Formato largo (Día, Hora, valor) para graficar el mapa de calor"""
+    return grid.rename_axis(index='Día', columns='Hora').stack().reset_index(name=value_name)
@@ -0,0 +1,388 @@
+"""
+Programa de puntos: libro de movimientos de solo inserción y saldo materializado
+
+`loyalty_ledger` guarda cada movimiento de puntos (nunca se edita ni se
+borra) y `loyalty_balances` el saldo por cliente, que un trigger por
+sentencia actualiza con la suma de las filas insertadas. Leer un saldo es
+una búsqueda por llave primaria, sin importar cuántos movimientos existan.
+
+Los puntos de una cita se sincronizan con un trigger de `bookings` en la
+misma transacción que la confirma o la cancela: la cita debe tener, en neto,
+`points_for(total_price)` puntos si está confirmada o completada y 0 en otro
+caso; el trigger inserta la diferencia ('earn' o 'reverse'). Así reconfirmar,
+cambiar el total o mover la cita a otro cliente también cuadra.
+
+Regla: POINTS_PER_PESO puntos por peso (misma variable de entorno que
+Config.POINTS_PER_PESO en src/utils.py).
+
+Uso:
+    python -m src.loyalty --migrate      # instala o cambia la regla de puntos
+    python -m src.loyalty --accrue       # backfill por lotes desde bookings
+    python -m src.loyalty --check
+    python -m src.loyalty --benchmark
+"""
+
+import math
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from src import clients, migrations
+
+load_dotenv()
+
+POINTS_PER_PESO = int(os.getenv('POINTS_PER_PESO', '1'))
+BATCH_SIZE = 5000                          # Citas por transacción en accrue
+BENCHMARK_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+BENCHMARK_READS = 200
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS loyalty_ledger (
+        id BIGSERIAL PRIMARY KEY,
+        client_id INTEGER NOT NULL REFERENCES clients(id),
+        booking_id INTEGER,
+        entry_type VARCHAR(20) NOT NULL CHECK (entry_type IN ('earn', 'reverse', 'adjust')),
+        points INTEGER NOT NULL,
+        note TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    -- Sin llave foránea a bookings: el historial sobrevive al borrar la cita
+    CREATE INDEX IF NOT EXISTS idx_loyalty_ledger_booking ON loyalty_ledger (booking_id, client_id);
+    CREATE INDEX IF NOT EXISTS idx_loyalty_ledger_client ON loyalty_ledger (client_id, id DESC);
+
+    CREATE TABLE IF NOT EXISTS loyalty_balances (
+        client_id INTEGER PRIMARY KEY REFERENCES clients(id),
+        points INTEGER NOT NULL DEFAULT 0,
+        lifetime_points INTEGER NOT NULL DEFAULT 0,
+        entries INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE OR REPLACE FUNCTION loyalty_points_for(p_amount NUMERIC) RETURNS INTEGER AS $$
+        SELECT floor(COALESCE(p_amount, 0) * {points_per_peso})::int
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+    -- Solo inserción
+    CREATE OR REPLACE FUNCTION trg_loyalty_ledger_readonly() RETURNS TRIGGER AS $$
+    BEGIN
+        RAISE EXCEPTION 'loyalty_ledger es de solo inserción (%)', TG_OP;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS loyalty_ledger_readonly ON loyalty_ledger;
+    CREATE TRIGGER loyalty_ledger_readonly
+        BEFORE UPDATE OR DELETE ON loyalty_ledger
+        FOR EACH ROW EXECUTE FUNCTION trg_loyalty_ledger_readonly();
+    DROP TRIGGER IF EXISTS loyalty_ledger_no_truncate ON loyalty_ledger;
+    CREATE TRIGGER loyalty_ledger_no_truncate
+        BEFORE TRUNCATE ON loyalty_ledger
+        FOR EACH STATEMENT EXECUTE FUNCTION trg_loyalty_ledger_readonly();
+
+    -- Un upsert por cliente y sentencia (los lotes no pagan un upsert por fila)
+    CREATE OR REPLACE FUNCTION trg_loyalty_ledger_balance() RETURNS TRIGGER AS $$
+    BEGIN
+        INSERT INTO loyalty_balances AS lb (client_id, points, lifetime_points, entries)
+        SELECT client_id, SUM(points), COALESCE(SUM(points) FILTER (WHERE entry_type = 'earn'), 0), COUNT(*)
+        FROM new_entries
+        GROUP BY client_id
+        ON CONFLICT (client_id) DO UPDATE SET
+            points = lb.points + EXCLUDED.points,
+            lifetime_points = lb.lifetime_points + EXCLUDED.lifetime_points,
+            entries = lb.entries + EXCLUDED.entries,
+            updated_at = CURRENT_TIMESTAMP;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS loyalty_ledger_balance ON loyalty_ledger;
+    CREATE TRIGGER loyalty_ledger_balance
+        AFTER INSERT ON loyalty_ledger
+        REFERENCING NEW TABLE AS new_entries
+        FOR EACH STATEMENT EXECUTE FUNCTION trg_loyalty_ledger_balance();
+
+    -- Deja en p_target los puntos netos de una cita para un cliente
+    CREATE OR REPLACE FUNCTION loyalty_sync_booking(
+        p_booking_id INTEGER, p_client_id INTEGER, p_target INTEGER
+    ) RETURNS VOID AS $$
+    DECLARE
+        v_delta INTEGER;
+    BEGIN
+        IF p_client_id IS NULL THEN
+            RETURN;
+        END IF;
+        SELECT p_target - COALESCE(SUM(points), 0) INTO v_delta
+        FROM loyalty_ledger
+        WHERE booking_id = p_booking_id AND client_id = p_client_id
+          AND entry_type IN ('earn', 'reverse');
+        IF v_delta <> 0 THEN
+            INSERT INTO loyalty_ledger (client_id, booking_id, entry_type, points)
+            VALUES (p_client_id, p_booking_id, CASE WHEN v_delta > 0 THEN 'earn' ELSE 'reverse' END, v_delta);
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION trg_bookings_loyalty() RETURNS TRIGGER AS $$
+    BEGIN
+        -- El backfill de clientes reasigna client_id sin triggers; accrue() lo cuadra después
+        IF current_setting('clients.backfill', TRUE) = 'on' THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.client_id IS DISTINCT FROM NEW.client_id) THEN
+            PERFORM loyalty_sync_booking(OLD.id, OLD.client_id, 0);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM loyalty_sync_booking(
+                NEW.id, NEW.client_id,
+                CASE WHEN NEW.status IN ('confirmed', 'completed') THEN loyalty_points_for(NEW.total_price) ELSE 0 END
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- UPDATE OF mira las columnas del SET; client_id cambia con las de contacto
+    DROP TRIGGER IF EXISTS bookings_loyalty ON bookings;
+    CREATE TRIGGER bookings_loyalty
+        AFTER INSERT OR UPDATE OF status, total_price, client_id, client_phone, client_email OR DELETE
+        ON bookings FOR EACH ROW EXECUTE FUNCTION trg_bookings_loyalty();
+'''
+
+# Puntos netos esperados contra los registrados, por (cita, cliente), en un rango de ids
+_DELTAS_SQL = '''
+    WITH target AS (
+        SELECT id as booking_id, client_id,
+               CASE WHEN status IN ('confirmed', 'completed') THEN loyalty_points_for(total_price) ELSE 0 END as points
+        FROM bookings
+        WHERE id > %(after)s AND id <= %(upto)s AND client_id IS NOT NULL
+    ),
+    booked AS (
+        SELECT booking_id, client_id, SUM(points) as points
+        FROM loyalty_ledger
+        WHERE booking_id > %(after)s AND booking_id <= %(upto)s AND entry_type IN ('earn', 'reverse')
+        GROUP BY booking_id, client_id
+    )
+    SELECT COALESCE(t.client_id, b.client_id) as client_id,
+           COALESCE(t.booking_id, b.booking_id) as booking_id,
+           COALESCE(t.points, 0) - COALESCE(b.points, 0) as delta
+    FROM target t
+    FULL JOIN booked b ON b.booking_id = t.booking_id AND b.client_id = t.client_id
+    WHERE COALESCE(t.points, 0) <> COALESCE(b.points, 0)
+'''
+
+_schema_ready = False
+
+
+def points_for(amount):
+    """Puntos que da una cita confirmada (misma regla que la función SQL loyalty_points_for)"""
+    return math.floor(float(amount or 0) * POINTS_PER_PESO)
+
+
+def _schema_sql():
+    """SCHEMA_SQL con la regla de puntos de este proceso"""
+    return SCHEMA_SQL.replace('{points_per_peso}', str(POINTS_PER_PESO))
+
+
+def ensure_schema(db):
+    """
+    Verifica que el libro de puntos, los saldos y los triggers estén instalados
+
+    No ejecuta DDL: el trigger de `bookings` y la regla de puntos
+    (loyalty_points_for) solo cambian con `python -m src.loyalty --migrate`,
+    así que un proceso con otro POINTS_PER_PESO no reescribe la función.
+
+    Raises:
+        RuntimeError: Si el libro de puntos no existe
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'loyalty', _schema_sql(), 'python -m src.loyalty --migrate', 'loyalty_ledger')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea o actualiza el libro de puntos, los saldos y los triggers
+
+    Requiere la tabla de clientes (`python -m src.clients --migrate`). Las
+    tablas nuevas no se rellenan solas: el historial se acredita con `accrue`,
+    que también cuadra las citas si cambió la regla de puntos.
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    clients.ensure_schema(db)
+    sql = _schema_sql()
+    if migrations.is_applied(db, 'loyalty', sql):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('loyalty'))")
+        if migrations.applied_checksum(cursor, 'loyalty') == migrations.checksum(sql):
+            return False
+        cursor.execute(sql)
+        migrations.record(cursor, 'loyalty', sql)
+
+    return True
+
+
+def accrue(db, batch_size=BATCH_SIZE):
+    """
+    Acredita (o revierte) por lotes los puntos de todas las citas
+
+    Idempotente: solo inserta la diferencia contra el libro, así que sirve
+    como backfill inicial y para cuadrar tras el backfill de clientes. Cada
+    lote bloquea sus citas (FOR SHARE) para no competir con el trigger.
+
+    Returns:
+        dict: entries, points, batches y elapsed_seconds
+    """
+    ensure_schema(db)
+    started = time.monotonic()
+    result = {'entries': 0, 'points': 0, 'batches': 0}
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT GREATEST((SELECT COALESCE(MAX(id), 0) FROM bookings),
+                            (SELECT COALESCE(MAX(booking_id), 0) FROM loyalty_ledger))
+        ''')
+        max_id = cursor.fetchone()[0]
+
+    for after in range(0, max_id, batch_size):
+        params = {'after': after, 'upto': after + batch_size}
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1 FROM bookings WHERE id > %(after)s AND id <= %(upto)s FOR SHARE', params)
+            cursor.execute(f'''
+                WITH deltas AS ({_DELTAS_SQL})
+                INSERT INTO loyalty_ledger (client_id, booking_id, entry_type, points, note)
+                SELECT client_id, booking_id, CASE WHEN delta > 0 THEN 'earn' ELSE 'reverse' END, delta, 'accrue'
+                FROM deltas
+                RETURNING points
+            ''', params)
+            points = [row[0] for row in cursor.fetchall()]
+        result['entries'] += len(points)
+        result['points'] += sum(points)
+        result['batches'] += 1
+
+    result['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    return result
+
+
+def check(db):
+    """
+    Compara los saldos contra el libro y el libro contra las citas
+
+    Returns:
+        list: Diferencias como ('balance', client_id, guardado, real) o
+              ('booking', booking_id, client_id, puntos_faltantes)
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT COALESCE(b.client_id, l.client_id), COALESCE(b.points, 0), COALESCE(l.points, 0)
+            FROM loyalty_balances b
+            FULL JOIN (SELECT client_id, SUM(points) as points FROM loyalty_ledger GROUP BY client_id) l
+              ON l.client_id = b.client_id
+            WHERE COALESCE(b.points, 0) <> COALESCE(l.points, 0)
+        ''')
+        differences = [('balance',) + row for row in cursor.fetchall()]
+
+        cursor.execute(_DELTAS_SQL, {'after': 0, 'upto': 2 ** 31 - 1})
+        differences += [('booking', booking_id, client_id, delta) for client_id, booking_id, delta in cursor.fetchall()]
+        return differences
+
+
+def _time_reads(cursor, sql, client_id, count):
+    # Promedio en milisegundos por lectura
+    started = time.perf_counter()
+    for _ in range(count):
+        cursor.execute(sql, (client_id,))
+        cursor.fetchone()
+    return round((time.perf_counter() - started) * 1000 / count, 3)
+
+
+def benchmark(db, sizes=BENCHMARK_SIZES, reads=BENCHMARK_READS):
+    """
+    Mide la lectura del saldo contra sumar el libro conforme el libro crece
+
+    Trabaja con un cliente temporal dentro de una transacción que se revierte
+    al final, así que no deja datos.
+
+    Returns:
+        list: Dicts con ledger_rows, balance_ms (promedio por lectura de
+              loyalty_balances) y sum_ms (promedio de SUM sobre el libro)
+    """
+    ensure_schema(db)
+    results = []
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO clients (phone, name) VALUES (%s, 'Benchmark') RETURNING id",
+                       (f"bench-{uuid.uuid4().hex[:12]}",))
+        client_id = cursor.fetchone()[0]
+
+        rows = 0
+        for size in sorted(sizes):
+            cursor.execute('''
+                INSERT INTO loyalty_ledger (client_id, entry_type, points, note)
+                SELECT %s, 'adjust', 1, 'benchmark' FROM generate_series(1, %s)
+            ''', (client_id, size - rows))
+            rows = size
+            cursor.execute("ANALYZE loyalty_ledger")
+            results.append({
+                'ledger_rows': size,
+                'balance_ms': _time_reads(cursor, 'SELECT points FROM loyalty_balances WHERE client_id = %s',
+                                          client_id, reads),
+                'sum_ms': _time_reads(cursor, 'SELECT SUM(points) FROM loyalty_ledger WHERE client_id = %s',
+                                      client_id, max(reads // 20, 5))
+            })
+
+        cursor.execute("SELECT points FROM loyalty_balances WHERE client_id = %s", (client_id,))
+        assert cursor.fetchone()[0] == rows, "El saldo no coincide con el libro"
+        conn.rollback()
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Programa de puntos")
+    parser.add_argument('--migrate', action='store_true', help="Crea o actualiza el libro de puntos y sus triggers")
+    parser.add_argument('--accrue', action='store_true', help="Acredita por lotes los puntos de las citas")
+    parser.add_argument('--check', action='store_true', help="Compara saldos, libro y citas")
+    parser.add_argument('--benchmark', action='store_true', help="Mide la lectura del saldo contra el tamaño del libro")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCHMARK_SIZES),
+                        help="Tamaños del libro para el benchmark")
+    args = parser.parse_args()
+
+    database = Database()
+    clients.ensure_schema(database)
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de puntos aplicado. Ejecuta --accrue para cuadrar las citas con la regla actual")
+        else:
+            print("✅ El esquema de puntos ya estaba al día")
+    ensure_schema(database)
+    if args.accrue:
+        print(accrue(database))
+    if args.check:
+        differences = check(database)
+        for difference in differences[:50]:
+            print(difference)
+        print(f"{'⚠️' if differences else '✅'} {len(differences)} diferencias")
+    if args.benchmark:
+        print(f"{'movimientos':>12} {'saldo (ms)':>11} {'SUM (ms)':>10}")
+        for row in benchmark(database, args.sizes):
+            print(f"{row['ledger_rows']:>12,} {row['balance_ms']:>11.3f} {row['sum_ms']:>10.3f}")
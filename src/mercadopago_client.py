@@ -0,0 +1,289 @@
+"""
+Cliente HTTP de Mercado Pago
+
+Mantiene una sola `requests.Session` por proceso (conexiones keep-alive),
+reintenta de forma acotada ante errores 5xx y timeouts, y guarda en caché
+LRU+TTL los pagos consultados. Los 404 se guardan en una caché negativa corta
+para que números de operación mal escritos no golpeen la API en cada rerun.
+
+La URL base se puede apuntar a un servidor local con MERCADOPAGO_API_URL
+(ver `run_tests()` al final del archivo).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Cargar variables de entorno
+load_dotenv()
+
+API_URL = os.getenv('MERCADOPAGO_API_URL', 'https://api.mercadopago.com')
+
+# Timeouts (conexión, lectura) en segundos
+TIMEOUT = (3.05, 10)
+
+# Estados que ya no cambian: se pueden cachear más tiempo
+FINAL_STATUSES = {'approved', 'rejected', 'cancelled', 'refunded', 'charged_back'}
+
+CACHE_MAX_ENTRIES = 512
+CACHE_TTL_FINAL = 600       # 10 min para pagos en estado final
+CACHE_TTL_PENDING = 30      # 30 s para pagos que aún pueden cambiar
+CACHE_TTL_NOT_FOUND = 30    # 30 s de caché negativa para 404
+
+
+class TTLCache:
+    """Caché LRU con expiración por entrada, segura entre hilos"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna el valor o None si no existe o expiró"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_session = None
+_session_lock = threading.Lock()
+_payment_cache = TTLCache()
+
+
+def get_session():
+    """Obtiene la sesión HTTP compartida del proceso (la crea la primera vez)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=3,
+                    connect=2,
+                    read=2,
+                    status=3,
+                    backoff_factor=0.3,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET']),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def _auth_headers(access_token):
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+
+
+def get_payment(payment_id, access_token, use_cache=True):
+    """
+    Consulta un pago por ID en Mercado Pago
+
+    Args:
+        payment_id (str): ID del pago (número de operación)
+        access_token (str): Token de acceso de Mercado Pago
+        use_cache (bool): Si False, fuerza la consulta a la API
+
+    Returns:
+        tuple: (status_code: int, payload: dict)
+
+    Raises:
+        requests.exceptions.Timeout / ConnectionError si se agotan los reintentos
+    """
+    payment_id = str(payment_id).strip()
+    key = (access_token, payment_id)
+
+    if use_cache:
+        cached = _payment_cache.get(key)
+        if cached is not None:
+            return cached
+
+    response = get_session().get(
+        f"{API_URL}/v1/payments/{payment_id}",
+        headers=_auth_headers(access_token),
+        timeout=TIMEOUT
+    )
+
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {}
+
+    result = (response.status_code, payload)
+
+    if response.status_code == 200:
+        ttl = CACHE_TTL_FINAL if payload.get('status') in FINAL_STATUSES else CACHE_TTL_PENDING
+        _payment_cache.set(key, result, ttl)
+    elif response.status_code == 404:
+        _payment_cache.set(key, result, CACHE_TTL_NOT_FOUND)
+
+    return result
+
+
+def payment_summary(payment):
+    """Extrae los campos del pago que usa la aplicación"""
+    return {
+        "operation_id": payment.get("id"),
+        "amount": payment.get("transaction_amount"),
+        "status": payment.get("status"),
+        "date": payment.get("date_approved"),
+        "payer_email": (payment.get("payer") or {}).get("email"),
+        "payment_method": (payment.get("payment_method") or {}).get("type"),
+        "payment_type": payment.get("payment_type_id"),  # credit_card, debit_card, account_money, etc.
+        "currency": payment.get("currency_id"),
+        "external_reference": payment.get("external_reference")
+    }
+
+
+def search_payments(external_reference, access_token, status=None):
+    """
+    Busca pagos por external_reference (el booking_code de la cita)
+
+    No usa caché: se llama desde la conciliación, que necesita el estado actual.
+
+    Returns:
+        tuple: (status_code: int, results: list)
+    """
+    params = {
+        'external_reference': external_reference,
+        'sort': 'date_created',
+        'criteria': 'desc'
+    }
+    if status:
+        params['status'] = status
+
+    response = get_session().get(
+        f"{API_URL}/v1/payments/search",
+        headers=_auth_headers(access_token),
+        params=params,
+        timeout=TIMEOUT
+    )
+
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {}
+
+    return response.status_code, payload.get('results', []) if response.status_code == 200 else []
+
+
+def invalidate_payment(payment_id, access_token):
+    """Elimina un pago de la caché (por ejemplo, al recibir una notificación)"""
+    _payment_cache.invalidate((access_token, str(payment_id).strip()))
+
+
+def clear_cache():
+    """Vacía la caché de pagos"""
+    _payment_cache.clear()
+
+
+# Función para testing contra un servidor local
+def run_tests():
+    """Ejecuta pruebas del cliente contra un servidor HTTP local simulado"""
+    global API_URL
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    calls = {'count': 0, 'flaky': 0}
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            calls['count'] += 1
+            payment_id = self.path.rsplit('/', 1)[-1]
+
+            if payment_id == 'flaky' and calls['flaky'] < 2:
+                calls['flaky'] += 1
+                code, body = 503, {'message': 'unavailable'}
+            elif payment_id in ('123', 'flaky'):
+                code, body = 200, {'id': payment_id, 'status': 'approved',
+                                   'transaction_amount': 200, 'external_reference': 'BC-TEST'}
+            else:
+                code, body = 404, {'message': 'not_found'}
+
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    API_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    clear_cache()
+
+    print("🧪 Ejecutando tests del cliente Mercado Pago...\n")
+
+    try:
+        # Test 1: Pago aprobado y cacheado
+        assert get_payment('123', 'TOKEN')[0] == 200
+        assert get_payment('123', 'TOKEN')[0] == 200
+        assert calls['count'] == 1
+        print("✅ Test 1: Caché de pago aprobado - PASÓ")
+
+        # Test 2: Caché negativa de 404
+        assert get_payment('999', 'TOKEN')[0] == 404
+        assert get_payment('999', 'TOKEN')[0] == 404
+        assert calls['count'] == 2
+        print("✅ Test 2: Caché negativa de 404 - PASÓ")
+
+        # Test 3: Reintentos ante 5xx
+        assert get_payment('flaky', 'TOKEN')[0] == 200
+        assert calls['flaky'] == 2
+        print("✅ Test 3: Reintentos ante 503 - PASÓ")
+
+        # Test 4: Invalidación
+        invalidate_payment('123', 'TOKEN')
+        before = calls['count']
+        get_payment('123', 'TOKEN')
+        assert calls['count'] == before + 1
+        print("✅ Test 4: Invalidación de caché - PASÓ")
+    finally:
+        server.shutdown()
+
+    print("\n✅ Todos los tests pasaron correctamente!")
+
+
+if __name__ == "__main__":
+    run_tests()
@@ -0,0 +1,119 @@
+"""
+Registro de migraciones de esquema aplicadas
+
+Cada módulo con esquema propio registra aquí el hash de su SQL al aplicarlo.
+Así un proceso que arranca solo hace una consulta para saber si el esquema
+está al día, en lugar de repetir DDL (y tomar locks sobre `bookings` o
+`payments`) en cada arranque.
+
+Uso:
+    from src import migrations
+    if not migrations.is_applied(db, 'payments', SCHEMA_SQL):
+        ...
+"""
+
+import hashlib
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        name VARCHAR(100) PRIMARY KEY,
+        checksum VARCHAR(32) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+
+def checksum(sql):
+    """Hash del SQL de una migración (cambia si cambia el esquema)"""
+    return hashlib.md5(sql.encode('utf-8')).hexdigest()
+
+
+def applied_checksum(cursor, name):
+    """
+    Hash registrado de una migración
+
+    Returns:
+        str or None: None si nunca se aplicó
+    """
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return None
+    cursor.execute('SELECT checksum FROM schema_migrations WHERE name = %s', (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def is_applied(db, name, sql):
+    """Indica si la migración ya se aplicó con este mismo SQL"""
+    with db.get_connection() as conn:
+        return applied_checksum(conn.cursor(), name) == checksum(sql)
+
+
+def record(cursor, name, sql):
+    """Registra la migración como aplicada (dentro de la transacción que la aplicó)"""
+    cursor.execute(SCHEMA_SQL)
+    cursor.execute('''
+        INSERT INTO schema_migrations (name, checksum)
+        VALUES (%s, %s)
+        ON CONFLICT (name) DO UPDATE SET checksum = EXCLUDED.checksum, applied_at = CURRENT_TIMESTAMP
+    ''', (name, checksum(sql)))
+
+
+def require(db, name, sql, command, table):
+    """
+    Verifica, sin ejecutar DDL, que una migración esté aplicada
+
+    Si nunca se registró pero `table` existe (instalada antes de este
+    registro) o si el SQL cambió, solo avisa: el esquema anterior sigue
+    funcionando hasta correr `command`.
+
+    Args:
+        db (Database): Instancia de base de datos
+        name (str): Nombre de la migración
+        sql (str): SQL actual de la migración
+        command (str): Comando que la aplica
+        table (str): Tabla principal de la migración
+
+    Raises:
+        RuntimeError: Si el esquema no está instalado
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        applied = applied_checksum(cursor, name)
+        if applied is None:
+            cursor.execute('SELECT to_regclass(%s) IS NOT NULL', (table,))
+            if not cursor.fetchone()[0]:
+                raise RuntimeError(f"❌ Falta el esquema '{name}'. Ejecuta: {command}")
+
+    if applied != checksum(sql):
+        print(f"⚠️ El esquema '{name}' no está al día. Ejecuta: {command}")
+
+
+def create_index_concurrently(db, name, definition, unique=False):
+    """
+    Crea un índice sin bloquear las escrituras de la tabla
+
+    CREATE INDEX CONCURRENTLY no corre dentro de una transacción, así que usa
+    su propia conexión en autocommit. Si un intento anterior falló, el índice
+    quedó inválido: se borra y se vuelve a construir.
+
+    Args:
+        db (Database): Instancia de base de datos
+        name (str): Nombre del índice
+        definition (str): Resto de la sentencia, p. ej. "ON payments (created_at)"
+        unique (bool): Crear un índice único
+
+    Returns:
+        bool: True si se construyó, False si ya existía y era válido
+    """
+    with db.get_connection() as conn:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute('SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)', (name,))
+        row = cursor.fetchone()
+        if row and row[0]:
+            return False
+        if row:
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY {name} {definition}")
+        return True
@@ -456,9 +456,9 @@ def enviar_confirmacion_cambio(client_name, client_email, booking_code, new_date
         return False
 
 
-def enviar_recordatorio_cita(booking_data):
+def _construir_recordatorio(booking_data, remitente):
     """
-    Envía recordatorio de cita para MAÑANA
+    Construye el mensaje de recordatorio de cita (sin enviarlo)
     """
     cliente = booking_data['client']
     cita = booking_data['appointment']
@@ -500,6 +500,20 @@ def enviar_recordatorio_cita(booking_data):
     </html>
     """
     
+    msg = MIMEMultipart("alternative")
+    msg['From'] = remitente
+    msg['To'] = cliente.get('email', '')
+    msg['Subject'] = f"🔔 Recordatorio: Cita mañana a las {cita['start_time']}"
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+
+def enviar_recordatorio_cita(booking_data):
+    """
+    Envía recordatorio de cita para MAÑANA
+    """
+    cliente = booking_data['client']
+    
     remitente = os.getenv("GMAIL_USER")
     contraseña = os.getenv("GMAIL_PASSWORD")
     destinatario = cliente.get('email', '')
@@ -507,11 +521,7 @@ def enviar_recordatorio_cita(booking_data):
     if not destinatario:
         return False
     
-    msg = MIMEMultipart("alternative")
-    msg['From'] = remitente
-    msg['To'] = destinatario
-    msg['Subject'] = f"🔔 Recordatorio: Cita mañana a las {cita['start_time']}"
-    msg.attach(MIMEText(html_content, 'html'))
+    msg = _construir_recordatorio(booking_data, remitente)
     
     try:
         servidor = smtplib.SMTP('smtp.gmail.com', 587)
@@ -523,4 +533,168 @@ def enviar_recordatorio_cita(booking_data):
         return True
     except Exception as e:
         print(f"❌ Error: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def _conectar_smtp(remitente, contraseña):
+    """Abre y autentica una conexión SMTP con Gmail"""
+    servidor = smtplib.SMTP('smtp.gmail.com', 587)
+    servidor.starttls()
+    servidor.login(remitente, contraseña)
+    return servidor
+
+
+def _conexion_viva(servidor):
+    """Indica si la conexión SMTP sigue respondiendo"""
+    try:
+        servidor.noop()
+        return True
+    except Exception:
+        return False
+
+
+def _enviar_lote(elementos, clave, construir, etiqueta):
+    """
+    Envía un correo por elemento reutilizando una sola conexión SMTP
+    
+    Si el servidor se desconecta, reconecta y reintenta el mensaje actual una
+    vez. Si eso falla, solo ese mensaje queda como fallido: la conexión se
+    descarta y el siguiente mensaje vuelve a conectar.
+    
+    Args:
+        elementos (list): Datos de cada correo (con 'client' y su email)
+        clave (callable): elemento -> llave del resultado
+        construir (callable): (elemento, remitente) -> mensaje
+        etiqueta (str): Nombre del correo para los mensajes de error
+    
+    Returns:
+        dict: {clave: bool} indicando si cada correo se envió
+    """
+    resultados = {clave(elemento): False for elemento in elementos}
+    pendientes = [elemento for elemento in elementos if elemento['client'].get('email')]
+    
+    if not pendientes:
+        return resultados
+    
+    remitente = os.getenv("GMAIL_USER")
+    contraseña = os.getenv("GMAIL_PASSWORD")
+    
+    try:
+        servidor = _conectar_smtp(remitente, contraseña)
+    except Exception as e:
+        print(f"❌ Error conectando a SMTP: {e}")
+        return resultados
+    
+    for elemento in pendientes:
+        try:
+            if servidor is None:
+                servidor = _conectar_smtp(remitente, contraseña)
+            try:
+                servidor.send_message(construir(elemento, remitente))
+            except smtplib.SMTPServerDisconnected:
+                # Reconectar una vez y reintentar el mensaje actual
+                servidor = None
+                servidor = _conectar_smtp(remitente, contraseña)
+                servidor.send_message(construir(elemento, remitente))
+            resultados[clave(elemento)] = True
+        except Exception as e:
+            print(f"⚠️ Error enviando {etiqueta} {clave(elemento)}: {e}")
+            if servidor is not None and not _conexion_viva(servidor):
+                servidor = None
+    
+    if servidor is not None:
+        try:
+            servidor.quit()
+        except Exception:
+            pass
+    
+    return resultados
+
+
+def enviar_recordatorios_lote(bookings_data):
+    """
+    Envía varios recordatorios reutilizando una sola conexión SMTP
+    
+    Args:
+        bookings_data (list): Lista de booking_data (mismo formato que enviar_recordatorio_cita)
+    
+    Returns:
+        dict: {booking_code: bool} indicando si cada recordatorio se envió
+    """
+    resultados = _enviar_lote(
+        bookings_data, lambda data: data['booking_code'], _construir_recordatorio, 'recordatorio'
+    )
+    
+    enviados = sum(1 for ok in resultados.values() if ok)
+    print(f"✅ {enviados}/{len(resultados)} recordatorios enviados en lote")
+    return resultados
+
+
+def _construir_oferta_espacio(oferta, remitente):
+    """
+    Construye el correo de un espacio liberado para la lista de espera (sin enviarlo)
+    """
+    cliente = oferta['client']
+    espacio = oferta['slot']
+    
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }}
+            .container {{ max-width: 600px; margin: 0 auto; background: white; border-radius: 8px; }}
+            .header {{ background: linear-gradient(135deg, #EC4899 0%, #A855F7 100%); color: white; padding: 20px; text-align: center; }}
+            .content {{ padding: 20px; }}
+            .box {{ background: #fdf2f8; border-left: 4px solid #EC4899; padding: 15px; margin: 20px 0; }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>✨ ¡Se liberó un espacio!</h1>
+            </div>
+            <div class="content">
+                <p>Hola <strong>{cliente.get('name')}</strong>,</p>
+                <p>Estás en nuestra lista de espera y se liberó un horario que te puede interesar:</p>
+                
+                <div class="box">
+                    <p><strong>Fecha:</strong> {espacio['date']}</p>
+                    <p><strong>Hora:</strong> {espacio['start_time']} - {espacio['end_time']}</p>
+                    <p><strong>Profesional:</strong> {oferta['professional']['name']}</p>
+                    <p><strong>Servicios:</strong> {oferta['services']}</p>
+                </div>
+                
+                <p>Los espacios se asignan a quien reserve primero: <a href="{oferta['app_url']}">reserva aquí</a>.</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    
+    msg = MIMEMultipart("alternative")
+    msg['From'] = remitente
+    msg['To'] = cliente.get('email', '')
+    msg['Subject'] = f"✨ Espacio disponible el {espacio['date']} a las {espacio['start_time']}"
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+
+def enviar_ofertas_lote(ofertas):
+    """
+    Envía ofertas de la lista de espera reutilizando una sola conexión SMTP
+    
+    Args:
+        ofertas (list): Dicts con offer_id, client, slot, professional, services y app_url
+    
+    Returns:
+        dict: {offer_id: bool} indicando si cada oferta se envió
+    """
+    resultados = _enviar_lote(
+        ofertas, lambda oferta: oferta['offer_id'], _construir_oferta_espacio, 'oferta'
+    )
+    
+    enviados = sum(1 for ok in resultados.values() if ok)
+    print(f"✅ {enviados}/{len(resultados)} ofertas de lista de espera enviadas en lote")
+    return resultados
@@ -0,0 +1,353 @@
+"""
+Servicio de pagos de Mercado Pago
+
+Mantiene un solo cliente del SDK por proceso y crea las preferencias de pago
+en segundo plano en cuanto la cita se guarda. El `init_point` resultante se
+guarda en la fila de `payments`, así que las vistas solo leen el enlace
+guardado (o esperan el futuro unos instantes) sin bloquear el rerun de
+Streamlit con la llamada al proveedor.
+
+El enlace vale para un monto: los futuros y el enlace guardado se buscan por
+(código de cita, monto), así que pagar un anticipo distinto al del checkout
+crea una preferencia nueva.
+
+Uso:
+    python -m src.payments_service --migrate
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+
+from src import migrations
+
+# Cargar variables de entorno
+load_dotenv()
+
+NOTIFICATION_URL = os.getenv('MERCADOPAGO_NOTIFICATION_URL', 'https://tu-dominio.com/webhook/mercadopago')
+BACK_URL = os.getenv('MERCADOPAGO_BACK_URL', 'https://tu-dominio.com')
+
+# Hilos dedicados a crear preferencias
+MAX_WORKERS = 4
+
+# Futuros terminados que se conservan en memoria (el enlace ya queda en la BD)
+MAX_TRACKED_FUTURES = 256
+
+SCHEMA_SQL = '''
+    ALTER TABLE payments ADD COLUMN IF NOT EXISTS init_point TEXT;
+    ALTER TABLE payments ADD COLUMN IF NOT EXISTS preference_id VARCHAR(100);
+    ALTER TABLE payments ADD COLUMN IF NOT EXISTS init_point_amount NUMERIC(10,2);
+
+    -- Los verificados son casi toda la tabla: su listado recorre
+    -- idx_payments_created_at y filtra por estado sin descartar casi nada
+    DROP INDEX IF EXISTS idx_payments_verified_created;
+'''
+
+# Índices de pagos: (nombre, definición, único). Se construyen con
+# CREATE INDEX CONCURRENTLY para no bloquear pagos ni reservas
+INDEXES = [
+    # Una fila por operación de Mercado Pago (los NULL no chocan entre sí).
+    # Es el árbitro de ON CONFLICT en Database._upsert_payment_confirmations.
+    ('idx_payments_mercado_pago_id', 'ON payments (mercado_pago_id)', True),
+
+    # Último pago por cita (LATERAL en Database.get_booking_payments_page)
+    ('idx_payments_booking_created', 'ON payments (booking_id, created_at DESC, id DESC)', False),
+
+    # Orden y llave de paginación de la vista de pagos
+    ('idx_bookings_date_start_id', 'ON bookings (date DESC, start_time DESC, id DESC)', False),
+
+    # Rangos de created_at (Database._created_at_range)
+    ('idx_payments_created_at', 'ON payments (created_at)', False),
+
+    # Listado de pendientes con paginación por (created_at, id); parcial
+    # porque los pendientes son una fracción pequeña y caliente de la tabla
+    ('idx_payments_pending_created',
+     "ON payments (created_at DESC, id DESC) WHERE payment_status = 'pending'", False),
+
+    # Barrido por ID de la conciliación (Database.get_pending_payments_page)
+    ('idx_payments_pending_id', "ON payments (id) WHERE payment_status = 'pending'", False)
+]
+
+# Lo que se registra en schema_migrations: cambia si cambia cualquier parte
+MIGRATION_SQL = SCHEMA_SQL + ''.join(
+    f"\n    CREATE {'UNIQUE ' if unique else ''}INDEX {name} {definition};" for name, definition, unique in INDEXES
+)
+
+_schema_ready = False
+_sdk = None
+_sdk_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='mp-preference')
+_futures = {}
+_futures_lock = threading.Lock()
+
+
+def ensure_schema(db):
+    """
+    Verifica que las columnas e índices de pagos estén instalados
+
+    No ejecuta DDL ni toca filas: el esquema se aplica con
+    `python -m src.payments_service --migrate` (ver migrate).
+
+    Raises:
+        RuntimeError: Si el esquema nunca se aplicó
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'payments', MIGRATION_SQL, 'python -m src.payments_service --migrate',
+                       'idx_payments_mercado_pago_id')
+    _schema_ready = True
+
+
+def find_duplicate_mercado_pago_ids(db, limit=50):
+    """
+    Operaciones de Mercado Pago registradas en más de un pago
+
+    Returns:
+        list: (mercado_pago_id, ids de pagos, número de filas), las más repetidas primero
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT mercado_pago_id, array_agg(id ORDER BY id), COUNT(*)
+            FROM payments
+            WHERE mercado_pago_id IS NOT NULL
+            GROUP BY mercado_pago_id
+            HAVING COUNT(*) > 1
+            ORDER BY COUNT(*) DESC, mercado_pago_id
+            LIMIT %s
+        ''', (limit,))
+        return cursor.fetchall()
+
+
+def migrate(db):
+    """
+    Aplica columnas e índices de pagos
+
+    Nunca borra pagos: si hay operaciones de Mercado Pago duplicadas, las
+    reporta y se detiene antes de crear el índice único, para resolverlas a
+    mano. Los índices se construyen sin bloquear escrituras.
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+
+    Raises:
+        RuntimeError: Si hay pagos duplicados por mercado_pago_id
+    """
+    if migrations.is_applied(db, 'payments', MIGRATION_SQL):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('payments_schema'))")
+        cursor.execute(SCHEMA_SQL)
+
+    duplicates = find_duplicate_mercado_pago_ids(db)
+    if duplicates:
+        for mercado_pago_id, payment_ids, rows in duplicates:
+            print(f"⚠️ mercado_pago_id {mercado_pago_id}: {rows} pagos {payment_ids}")
+        raise RuntimeError(
+            f"❌ {len(duplicates)} operaciones de Mercado Pago tienen pagos duplicados. "
+            "Resuélvelas y vuelve a ejecutar --migrate"
+        )
+
+    for name, definition, unique in INDEXES:
+        if migrations.create_index_concurrently(db, name, definition, unique):
+            print(f"✅ Índice {name} creado")
+
+    with db.get_connection() as conn:
+        migrations.record(conn.cursor(), 'payments', MIGRATION_SQL)
+
+    return True
+
+
+def get_access_token():
+    return os.getenv("MERCADOPAGO_ACCESS_TOKEN")
+
+
+def is_configured():
+    """Indica si hay un Access Token real configurado"""
+    token = get_access_token()
+    return bool(token) and token != "ACCESS_TOKEN"
+
+
+def demo_link(booking_code):
+    """URL de prueba cuando Mercado Pago no está configurado"""
+    return f"https://www.mercadopago.com.mx/checkout/v1/redirect?preference-id=demo&reference={booking_code}"
+
+
+def get_sdk():
+    """
+    Obtiene el cliente del SDK compartido del proceso (lo crea la primera vez)
+
+    Raises:
+        ImportError: Si el SDK de Mercado Pago no está instalado
+    """
+    global _sdk
+    if _sdk is None:
+        with _sdk_lock:
+            if _sdk is None:
+                from mercadopago.sdk import SDK
+                _sdk = SDK(get_access_token())
+    return _sdk
+
+
+def build_preference_data(booking_data):
+    """Arma el cuerpo de la preferencia a partir de los datos de la cita"""
+    deposit = booking_data.get('payment', {}).get('deposit', 0)
+
+    return {
+        "items": [{
+            "title": f"Anticipo - {booking_data['client']['name']}",
+            "description": f"Servicios: {', '.join([s['name'] for s in booking_data['services']])}",
+            "quantity": 1,
+            "currency_id": "MXN",
+            "unit_price": float(deposit)
+        }],
+        "payer": {
+            "name": booking_data['client']['name'],
+            "email": booking_data['client']['email'],
+            "phone": {
+                "area_code": "52",
+                "number": booking_data['client']['phone']
+            }
+        },
+        "external_reference": booking_data.get('booking_code', 'unknown'),
+        "back_urls": {
+            "success": f"{BACK_URL}/success",
+            "failure": f"{BACK_URL}/failure",
+            "pending": f"{BACK_URL}/pending"
+        },
+        "auto_return": "approved",
+        "notification_url": NOTIFICATION_URL
+    }
+
+
+def create_preference(booking_data):
+    """
+    Crea la preferencia en Mercado Pago (llamada bloqueante)
+
+    Returns:
+        tuple: (init_point: str, preference_id: str)
+
+    Raises:
+        RuntimeError: Si Mercado Pago no devuelve una preferencia válida
+    """
+    if not is_configured():
+        return demo_link(booking_data.get('booking_code', 'unknown')), None
+
+    preference_response = get_sdk().preference().create(build_preference_data(booking_data))
+    preference = preference_response.get("response") or {}
+
+    if "id" not in preference:
+        raise RuntimeError(f"Error al crear preferencia de Mercado Pago (HTTP {preference_response.get('status')})")
+
+    return preference.get("init_point"), preference.get("id")
+
+
+def _amount(value):
+    """Normaliza el monto a centavos (parte de la llave del enlace)"""
+    return round(float(value or 0), 2)
+
+
+def _create_and_store(db, booking_data):
+    init_point, preference_id = create_preference(booking_data)
+    if preference_id:
+        db.save_payment_link(
+            booking_data['booking_code'], init_point, preference_id,
+            _amount(booking_data.get('payment', {}).get('deposit'))
+        )
+    return init_point
+
+
+def submit_preference(db, booking_data):
+    """
+    Programa la creación de la preferencia en segundo plano
+
+    Si ya hay una creación en curso (o terminada con éxito) para la cita y
+    el mismo monto, retorna ese mismo futuro en lugar de crear otra preferencia.
+
+    Returns:
+        Future: Resuelve al init_point
+    """
+    key = (booking_data['booking_code'], _amount(booking_data.get('payment', {}).get('deposit')))
+
+    with _futures_lock:
+        future = _futures.get(key)
+        if future is not None and not (future.done() and future.exception()):
+            return future
+
+        if len(_futures) >= MAX_TRACKED_FUTURES:
+            for code in [c for c, f in _futures.items() if f.done()]:
+                del _futures[code]
+
+        future = _executor.submit(_create_and_store, db, booking_data)
+        _futures[key] = future
+        return future
+
+
+def get_payment_link(db, booking_code, amount, timeout=0):
+    """
+    Obtiene el enlace de pago de una cita sin llamar al proveedor
+
+    Revisa primero el futuro en memoria y luego el enlace guardado en la BD.
+    Un futuro fallido se descarta al reportar su error, así la siguiente
+    llamada a submit_preference vuelve a intentarlo.
+
+    Args:
+        db (Database): Instancia de base de datos
+        booking_code (str): Código de la cita
+        amount (float): Monto que debe cobrar el enlace
+        timeout (float): Segundos máximos a esperar un futuro en curso
+
+    Returns:
+        tuple: (init_point or None, error_message or None)
+               (None, None) significa que no hay enlace para ese monto o que
+               aún se está generando
+    """
+    key = (booking_code, _amount(amount))
+    with _futures_lock:
+        future = _futures.get(key)
+
+    if future is None:
+        return db.get_payment_link(booking_code, key[1]), None
+
+    try:
+        return future.result(timeout=timeout), None
+    except FutureTimeoutError:
+        return None, None
+    except Exception as e:
+        with _futures_lock:
+            if _futures.get(key) is future:
+                del _futures[key]
+        if isinstance(e, ImportError):
+            return None, "Mercado Pago SDK no está instalado. Ejecuta: pip install mercadopago"
+        return None, f"Error de Mercado Pago: {str(e)}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Servicio de pagos de Mercado Pago")
+    parser.add_argument('--migrate', action='store_true', help="Aplica columnas e índices de pagos")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        try:
+            applied = migrate(database)
+        except RuntimeError as e:
+            raise SystemExit(str(e))
+        if applied:
+            print("✅ Esquema de pagos aplicado")
+        else:
+            print("✅ El esquema de pagos ya estaba al día")
+    ensure_schema(database)
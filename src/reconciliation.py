@@ -0,0 +1,251 @@
+"""
+Conciliación de pagos pendientes contra Mercado Pago
+
+Recorre los pagos con estado 'pending' por páginas, busca en Mercado Pago
+pagos aprobados cuyo external_reference sea el booking_code de la cita
+(consultas concurrentes con un limitador de tasa) y confirma en lote todas
+las coincidencias en una sola transacción por página.
+
+Uso:
+    python -m src.reconciliation --once
+    python -m src.reconciliation --interval 5
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from src import mercadopago_client, payments_service
+from src.database import Database
+
+PAGE_SIZE = 200
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 10
+DEFAULT_INTERVAL_MINUTES = 5
+
+
+class RateLimiter:
+    """Limitador de tasa tipo token bucket, seguro entre hilos"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def find_approved_payment(booking_code, access_token, limiter):
+    """
+    Busca un pago aprobado para una cita
+
+    Returns:
+        tuple: (booking_code, payment_data or None, error or None)
+    """
+    limiter.acquire()
+    try:
+        status_code, results = mercadopago_client.search_payments(
+            booking_code, access_token, status='approved'
+        )
+    except requests.exceptions.RequestException as e:
+        return booking_code, None, str(e)
+
+    if status_code != 200:
+        return booking_code, None, f"HTTP {status_code}"
+
+    for payment in results:
+        if payment.get('status') == 'approved' and payment.get('external_reference') == booking_code:
+            return booking_code, mercadopago_client.payment_summary(payment), None
+
+    return booking_code, None, None
+
+
+def find_matches(booking_codes, access_token, max_workers=MAX_WORKERS,
+                 requests_per_second=REQUESTS_PER_SECOND):
+    """
+    Consulta Mercado Pago de forma concurrente para una lista de citas
+
+    Returns:
+        tuple: (matches: list of (booking_code, mp_id, payment_data), errors: int)
+    """
+    limiter = RateLimiter(requests_per_second)
+    matches = []
+    errors = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(find_approved_payment, code, access_token, limiter)
+            for code in booking_codes
+        ]
+        for future in futures:
+            booking_code, payment_data, error = future.result()
+            if error:
+                errors += 1
+            elif payment_data:
+                matches.append((booking_code, payment_data['operation_id'], payment_data))
+
+    return matches, errors
+
+
+def reconcile_pending_payments(db, access_token=None, page_size=PAGE_SIZE,
+                               max_workers=MAX_WORKERS, requests_per_second=REQUESTS_PER_SECOND):
+    """
+    Ejecuta una pasada completa de conciliación
+
+    Returns:
+        dict: Resultado con conteos y rendimiento (consultas por segundo)
+    """
+    access_token = access_token or os.getenv("MERCADOPAGO_ACCESS_TOKEN")
+    started = time.monotonic()
+
+    result = {
+        'pages': 0,
+        'checked': 0,
+        'matched': 0,
+        'confirmed': 0,
+        'errors': 0,
+        'elapsed_seconds': 0.0,
+        'checks_per_second': 0.0
+    }
+
+    after_id = 0
+    while True:
+        page = db.get_pending_payments_page(after_id=after_id, limit=page_size)
+        if not page:
+            break
+
+        after_id = page[-1]['id']
+        result['pages'] += 1
+
+        # Una cita puede tener varios pagos pendientes: consultar una sola vez
+        booking_codes = list(dict.fromkeys(p['booking_code'] for p in page if p['booking_code']))
+        result['checked'] += len(booking_codes)
+
+        matches, errors = find_matches(booking_codes, access_token, max_workers, requests_per_second)
+        result['matched'] += len(matches)
+        result['errors'] += errors
+
+        if matches:
+            success, confirmed = db.confirm_payments_bulk(matches)
+            if success:
+                result['confirmed'] += len(confirmed)
+            else:
+                result['errors'] += len(matches)
+
+        if len(page) < page_size:
+            break
+
+    elapsed = time.monotonic() - started
+    result['elapsed_seconds'] = round(elapsed, 2)
+    result['checks_per_second'] = round(result['checked'] / elapsed, 1) if elapsed > 0 else 0.0
+    return result
+
+
+def run_forever(db, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+    """Ejecuta la conciliación de forma periódica"""
+    print(f"🔁 Conciliación de pagos iniciada (cada {interval_minutes} min)")
+
+    while True:
+        try:
+            result = reconcile_pending_payments(db)
+            print(f"📊 [{datetime.now():%Y-%m-%d %H:%M}] {result['checked']} citas revisadas, "
+                  f"{result['confirmed']} confirmadas, {result['errors']} errores "
+                  f"({result['checks_per_second']} consultas/s)")
+        except Exception as e:
+            print(f"❌ Error en conciliación: {e}")
+
+        time.sleep(interval_minutes * 60)
+
+
+# Función para testing contra un servidor local
+def run_tests():
+    """Prueba la búsqueda concurrente contra un servidor HTTP local simulado"""
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            reference = parse_qs(urlparse(self.path).query).get('external_reference', [''])[0]
+            # Las citas con número par tienen un pago aprobado
+            results = []
+            if reference.endswith(('0', '2', '4', '6', '8')):
+                results.append({'id': int(reference[-4:]) + 9000, 'status': 'approved',
+                                'external_reference': reference, 'transaction_amount': 200})
+
+            data = json.dumps({'results': results}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mercadopago_client.API_URL = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print("🧪 Ejecutando tests de conciliación...\n")
+
+    try:
+        codes = [f"BC-TEST-{i:04d}" for i in range(200)]
+        started = time.monotonic()
+        matches, errors = find_matches(codes, 'TOKEN', requests_per_second=100)
+        elapsed = time.monotonic() - started
+
+        assert errors == 0
+        assert len(matches) == 100
+        assert all(m[2]['external_reference'] == m[0] for m in matches)
+        print(f"✅ Test 1: {len(codes)} citas consultadas en {elapsed:.2f}s "
+              f"({len(codes) / elapsed:.0f} consultas/s) - PASÓ")
+
+        limiter = RateLimiter(20, burst=1)
+        started = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+        assert time.monotonic() - started >= 0.45
+        print("✅ Test 2: Limitador de tasa - PASÓ")
+    finally:
+        server.shutdown()
+
+    print("\n✅ Todos los tests pasaron correctamente!")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Conciliación de pagos pendientes")
+    parser.add_argument('--once', action='store_true', help="Ejecuta una sola pasada y termina")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL_MINUTES,
+                        help="Minutos entre ejecuciones")
+    parser.add_argument('--test', action='store_true', help="Ejecuta las pruebas contra un servidor local")
+    args = parser.parse_args()
+
+    if args.test:
+        run_tests()
+    else:
+        database = Database()
+        payments_service.ensure_schema(database)
+        if args.once:
+            print(reconcile_pending_payments(database))
+        else:
+            run_forever(database, args.interval)
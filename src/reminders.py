@@ -0,0 +1,265 @@
+"""
+Programador de recordatorios de citas
+
+Corre fuera de Streamlit (cron, systemd o `python -m src.reminders`) y envía
+recordatorios a las citas cuyo inicio cae dentro de la ventana
+Config.REMINDER_HOURS_BEFORE. Cada recordatorio enviado queda registrado en
+`booking_reminders`, así que ejecutar el proceso varias veces no duplica correos.
+
+Uso:
+    python -m src.reminders --migrate
+    python -m src.reminders --once
+    python -m src.reminders --interval 15
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from src import migrations, notifications
+from src.database import Database
+from src.utils import Config, log_activity
+
+# Tipo de recordatorio registrado en la tabla de deduplicación
+REMINDER_TYPE = 'email_24h'
+
+# Intervalo por defecto entre ejecuciones del loop (minutos)
+DEFAULT_INTERVAL_MINUTES = 15
+
+# Máximo de recordatorios por lote enviado al SMTP
+BATCH_SIZE = 50
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS booking_reminders (
+        id SERIAL PRIMARY KEY,
+        booking_id INTEGER NOT NULL REFERENCES bookings(id) ON DELETE CASCADE,
+        booking_code VARCHAR(50) NOT NULL,
+        reminder_type VARCHAR(30) NOT NULL,
+        sent_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (booking_id, reminder_type)
+    );
+'''
+
+# Índice de expresión: permite filtrar por rango de inicio (fecha + hora).
+# Se construye con CREATE INDEX CONCURRENTLY para no bloquear reservas
+START_INDEX = ('idx_bookings_start_ts', 'ON bookings ((date + start_time))')
+
+# Lo que se registra en schema_migrations: cambia si cambia cualquier parte
+MIGRATION_SQL = SCHEMA_SQL + f"\n    CREATE INDEX {START_INDEX[0]} {START_INDEX[1]};"
+
+_schema_ready = False
+
+
+def ensure_schema(db):
+    """
+    Verifica que la tabla de deduplicación y el índice de inicio estén instalados
+
+    No ejecuta DDL: se instalan con `python -m src.reminders --migrate`.
+
+    Raises:
+        RuntimeError: Si la tabla de deduplicación no existe
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'reminders', MIGRATION_SQL, 'python -m src.reminders --migrate', 'booking_reminders')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea la tabla de deduplicación y el índice de inicio
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    if migrations.is_applied(db, 'reminders', MIGRATION_SQL):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(SCHEMA_SQL)
+
+    if migrations.create_index_concurrently(db, *START_INDEX):
+        print(f"✅ Índice {START_INDEX[0]} creado")
+
+    with db.get_connection() as conn:
+        migrations.record(conn.cursor(), 'reminders', MIGRATION_SQL)
+
+    return True
+
+
+def get_due_reminders(db, now=None, hours_before=None):
+    """
+    Obtiene citas que inician dentro de la ventana de recordatorio y aún no
+    tienen recordatorio enviado
+
+    Args:
+        db (Database): Instancia de base de datos
+        now (datetime): Momento de referencia (por defecto, ahora)
+        hours_before (int): Horas de anticipación (por defecto Config.REMINDER_HOURS_BEFORE)
+
+    Returns:
+        list: Citas pendientes de recordatorio
+    """
+    now = now or datetime.now()
+    hours_before = hours_before if hours_before is not None else Config.REMINDER_HOURS_BEFORE
+    window_end = now + timedelta(hours=hours_before)
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT
+                b.id,
+                b.booking_code,
+                b.client_name,
+                b.client_email,
+                b.date,
+                b.start_time,
+                b.end_time,
+                COALESCE(p.name, 'Sin asignar') as professional_name
+            FROM bookings b
+            LEFT JOIN professionals p ON b.professional_id = p.id
+            LEFT JOIN booking_reminders r
+                ON r.booking_id = b.id AND r.reminder_type = %s
+            WHERE (b.date + b.start_time) > %s
+            AND (b.date + b.start_time) <= %s
+            AND b.status NOT IN ('cancelled', 'completed')
+            AND r.id IS NULL
+            ORDER BY (b.date + b.start_time)
+        ''', (REMINDER_TYPE, now, window_end))
+
+        return [db._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def _claim_reminders(db, bookings):
+    """
+    Reserva los recordatorios en la tabla de deduplicación antes de enviarlos.
+    Solo devuelve las citas que este proceso logró reservar, de modo que dos
+    ejecuciones simultáneas nunca envían el mismo recordatorio.
+    """
+    if not bookings:
+        return []
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        values = [(b['id'], b['booking_code'], REMINDER_TYPE) for b in bookings]
+        args = ','.join(cursor.mogrify('(%s, %s, %s)', v).decode('utf-8') for v in values)
+        cursor.execute(f'''
+            INSERT INTO booking_reminders (booking_id, booking_code, reminder_type)
+            VALUES {args}
+            ON CONFLICT (booking_id, reminder_type) DO NOTHING
+            RETURNING booking_id
+        ''')
+        claimed = {row[0] for row in cursor.fetchall()}
+
+    return [b for b in bookings if b['id'] in claimed]
+
+
+def _release_reminders(db, booking_ids):
+    """Libera reservas de recordatorios que no se pudieron enviar (se reintentan)"""
+    if not booking_ids:
+        return
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM booking_reminders
+            WHERE reminder_type = %s AND booking_id = ANY(%s)
+        ''', (REMINDER_TYPE, list(booking_ids)))
+
+
+def _to_booking_data(booking):
+    """Convierte una fila de cita al formato de booking_data de notifications"""
+    return {
+        'client': {
+            'name': booking['client_name'],
+            'email': (booking['client_email'] or '').strip()
+        },
+        'appointment': {
+            'date': str(booking['date']),
+            'start_time': str(booking['start_time']),
+            'end_time': str(booking['end_time'])
+        },
+        'booking_code': booking['booking_code'],
+        'professional': {
+            'name': booking['professional_name'] or 'Profesional'
+        }
+    }
+
+
+def send_due_reminders(db, now=None, hours_before=None):
+    """
+    Ejecuta una pasada del programador: selecciona, reserva y envía recordatorios
+
+    Returns:
+        dict: {'due': int, 'sent': int, 'failed': int, 'skipped': int}
+    """
+    due = get_due_reminders(db, now=now, hours_before=hours_before)
+    claimed = _claim_reminders(db, due)
+
+    result = {'due': len(due), 'sent': 0, 'failed': 0, 'skipped': len(due) - len(claimed)}
+
+    failed_ids = []
+    for i in range(0, len(claimed), BATCH_SIZE):
+        batch = claimed[i:i + BATCH_SIZE]
+        outcome = notifications.enviar_recordatorios_lote([_to_booking_data(b) for b in batch])
+
+        for booking in batch:
+            if outcome.get(booking['booking_code']):
+                result['sent'] += 1
+            elif booking['client_email'] and booking['client_email'].strip():
+                # Error de envío: liberar para reintentar en la siguiente pasada
+                failed_ids.append(booking['id'])
+                result['failed'] += 1
+            else:
+                # Sin email: se queda registrado para no volver a intentarlo
+                result['failed'] += 1
+
+    _release_reminders(db, failed_ids)
+
+    log_activity('reminders', result)
+    return result
+
+
+def run_forever(db, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+    """Ejecuta el programador de forma periódica"""
+    ensure_schema(db)
+    print(f"⏰ Programador de recordatorios iniciado (cada {interval_minutes} min, "
+          f"ventana de {Config.REMINDER_HOURS_BEFORE} h)")
+
+    while True:
+        try:
+            result = send_due_reminders(db)
+            print(f"📊 [{datetime.now():%Y-%m-%d %H:%M}] {result['sent']} enviados, "
+                  f"{result['failed']} fallidos, {result['skipped']} ya reservados")
+        except Exception as e:
+            print(f"❌ Error en programador de recordatorios: {e}")
+
+        time.sleep(interval_minutes * 60)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Programador de recordatorios de citas")
+    parser.add_argument('--migrate', action='store_true', help="Crea la tabla de deduplicación y el índice de inicio")
+    parser.add_argument('--once', action='store_true', help="Ejecuta una sola pasada y termina")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL_MINUTES,
+                        help="Minutos entre ejecuciones")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de recordatorios aplicado")
+        else:
+            print("✅ El esquema de recordatorios ya estaba al día")
+    if args.once:
+        ensure_schema(database)
+        print(send_due_reminders(database))
+    elif not args.migrate:
+        run_forever(database, args.interval)
@@ -0,0 +1,466 @@
+"""
+Recursos compartidos (cabinas, sillas, equipos) y su ocupación por día
+
+Cada servicio puede requerir recursos (`service_resources`) y cada recurso
+tiene una capacidad (cuántas citas pueden usarlo a la vez). Una cita ocupa
+los recursos de sus servicios durante todo su horario; si dos servicios de la
+misma cita piden el mismo recurso se toma la cantidad mayor (se realizan uno
+tras otro).
+
+La disponibilidad (app.calculate_available_slots) carga una sola vez el uso
+de recursos de la fecha y lo convierte en `DayOccupancy`: por recurso, una
+función escalonada (puntos de cambio ordenados + carga de cada tramo). Cada
+horario candidato se valida con bisect en O(log n + k), donde k son los
+tramos dentro del horario, en lugar de recorrer todas las citas del día.
+
+Como la disponibilidad se calcula antes de reservar, un trigger diferido
+(al confirmar la transacción) vuelve a validar la capacidad en la base de
+datos, serializado por recurso y fecha, para que dos reservas simultáneas no
+ocupen el mismo recurso.
+
+Uso:
+    python -m src.resources --migrate
+
+    from src import resources
+    occupancy = resources.DayOccupancy(resources.get_day_usage(db, '2025-01-15'), capacities)
+    occupancy.fits({resource_id: 1}, 600, 660)
+"""
+
+from bisect import bisect_left, bisect_right
+
+from src import migrations
+
+DEFAULT_SLOT_MINUTES = 60      # Duración supuesta si la cita no tiene hora de fin válida
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS resources (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE,
+        kind VARCHAR(50),
+        capacity INTEGER NOT NULL DEFAULT 1 CHECK (capacity > 0),
+        active BOOLEAN NOT NULL DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS service_resources (
+        service_id INTEGER NOT NULL REFERENCES services(id) ON DELETE CASCADE,
+        resource_id INTEGER NOT NULL REFERENCES resources(id) ON DELETE CASCADE,
+        quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0),
+        PRIMARY KEY (service_id, resource_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_service_resources_resource
+        ON service_resources (resource_id);
+
+    -- Servicios de una cita (uso por día y validación por cita)
+    CREATE INDEX IF NOT EXISTS idx_booking_services_booking
+        ON booking_services (booking_id);
+
+    -- Uso de recursos por cita activa; date/start/end en el GROUP BY para
+    -- que el filtro por fecha se aplique antes de agrupar
+    CREATE OR REPLACE VIEW resource_usage AS
+    SELECT b.id AS booking_id, b.date, b.start_time,
+           CASE WHEN b.end_time > b.start_time THEN b.end_time
+                ELSE b.start_time + interval '{default_slot_minutes} minutes' END AS end_time,
+           sr.resource_id, MAX(sr.quantity) AS quantity
+    FROM bookings b
+    JOIN booking_services bs ON bs.booking_id = b.id
+    JOIN service_resources sr ON sr.service_id = bs.service_id
+    WHERE b.status IS DISTINCT FROM 'cancelled'
+    GROUP BY b.id, b.date, b.start_time, b.end_time, sr.resource_id;
+
+    CREATE OR REPLACE FUNCTION resource_check_booking(p_booking_id INTEGER) RETURNS VOID AS $$
+    DECLARE
+        u RECORD;
+        v_peak INTEGER;
+    BEGIN
+        FOR u IN
+            SELECT ru.*, r.name, r.capacity
+            FROM resource_usage ru JOIN resources r ON r.id = ru.resource_id
+            WHERE ru.booking_id = p_booking_id AND r.active
+            ORDER BY ru.resource_id
+        LOOP
+            -- Una reserva a la vez por recurso y fecha (orden fijo: sin interbloqueos)
+            PERFORM pg_advisory_xact_lock(u.resource_id, u.date - DATE '2000-01-01');
+
+            -- Barrido de inicios (+) y fines (-) de las citas que se traslapan;
+            -- a la misma hora los fines van primero (intervalos [inicio, fin))
+            WITH overlapping AS (
+                SELECT GREATEST(o.start_time, u.start_time) AS s,
+                       LEAST(o.end_time, u.end_time) AS e, o.quantity
+                FROM resource_usage o
+                WHERE o.resource_id = u.resource_id AND o.date = u.date
+                  AND o.start_time < u.end_time AND o.end_time > u.start_time
+            ), events AS (
+                SELECT s AS t, quantity AS delta FROM overlapping
+                UNION ALL
+                SELECT e, -quantity FROM overlapping
+            )
+            SELECT COALESCE(MAX(load), 0) INTO v_peak
+            FROM (
+                SELECT SUM(delta) OVER (ORDER BY t, delta ROWS UNBOUNDED PRECEDING) AS load
+                FROM events
+            ) sweep;
+
+            IF v_peak > u.capacity THEN
+                RAISE EXCEPTION 'Recurso no disponible: % (% de %) el % a las %',
+                    u.name, v_peak, u.capacity, u.date, to_char(u.start_time, 'HH24:MI');
+            END IF;
+        END LOOP;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION trg_resource_check() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'bookings' THEN
+            PERFORM resource_check_booking(NEW.id);
+        ELSE
+            PERFORM resource_check_booking(NEW.booking_id);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Diferidos: create_booking inserta la cita antes que sus servicios.
+    -- En UPDATE solo se valida si cambia el horario o se reactiva la cita,
+    -- así confirmar pagos no falla por traslapes anteriores a este módulo.
+    DROP TRIGGER IF EXISTS bookings_resources_insert ON bookings;
+    CREATE CONSTRAINT TRIGGER bookings_resources_insert
+        AFTER INSERT ON bookings
+        DEFERRABLE INITIALLY DEFERRED FOR EACH ROW
+        WHEN (NEW.status IS DISTINCT FROM 'cancelled')
+        EXECUTE FUNCTION trg_resource_check();
+
+    DROP TRIGGER IF EXISTS bookings_resources_update ON bookings;
+    CREATE CONSTRAINT TRIGGER bookings_resources_update
+        AFTER UPDATE OF status, date, start_time, end_time ON bookings
+        DEFERRABLE INITIALLY DEFERRED FOR EACH ROW
+        WHEN (NEW.status IS DISTINCT FROM 'cancelled' AND (
+            OLD.status = 'cancelled'
+            OR NEW.date IS DISTINCT FROM OLD.date
+            OR NEW.start_time IS DISTINCT FROM OLD.start_time
+            OR NEW.end_time IS DISTINCT FROM OLD.end_time))
+        EXECUTE FUNCTION trg_resource_check();
+
+    DROP TRIGGER IF EXISTS booking_services_resources ON booking_services;
+    CREATE CONSTRAINT TRIGGER booking_services_resources
+        AFTER INSERT OR UPDATE OF service_id ON booking_services
+        DEFERRABLE INITIALLY DEFERRED FOR EACH ROW
+        EXECUTE FUNCTION trg_resource_check();
+'''
+
+_schema_ready = False
+
+
+def _schema_sql():
+    """SCHEMA_SQL con la duración supuesta de este módulo"""
+    return SCHEMA_SQL.replace('{default_slot_minutes}', str(DEFAULT_SLOT_MINUTES))
+
+
+def ensure_schema(db):
+    """
+    Verifica que las tablas de recursos, la vista de uso y los triggers estén instalados
+
+    No ejecuta DDL: el trigger de ocupación de `bookings` se instala con
+    `python -m src.resources --migrate`.
+
+    Raises:
+        RuntimeError: Si las tablas de recursos no existen
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'resources', _schema_sql(), 'python -m src.resources --migrate', 'resources')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea o actualiza las tablas de recursos, la vista de uso y los triggers de validación
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    sql = _schema_sql()
+    if migrations.is_applied(db, 'resources', sql):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('resources'))")
+        if migrations.applied_checksum(cursor, 'resources') == migrations.checksum(sql):
+            return False
+        cursor.execute(sql)
+        migrations.record(cursor, 'resources', sql)
+
+    return True
+
+
+# ==================== CATÁLOGO ====================
+
+def get_resources(db, include_inactive=True):
+    """
+    Lista los recursos con el número de servicios que los requieren
+
+    Args:
+        db (Database): Instancia de base de datos
+        include_inactive (bool): Incluir recursos desactivados
+
+    Returns:
+        list: Recursos ordenados por tipo y nombre
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT r.id, r.name, r.kind, r.capacity, r.active,
+                   COUNT(sr.service_id) AS services
+            FROM resources r
+            LEFT JOIN service_resources sr ON sr.resource_id = r.id
+            WHERE %s OR r.active
+            GROUP BY r.id
+            ORDER BY r.kind NULLS LAST, r.name
+        ''', (include_inactive,))
+        return [db._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def add_resource(db, name, kind=None, capacity=1):
+    """
+    Agrega un recurso
+
+    Args:
+        db (Database): Instancia de base de datos
+        name (str): Nombre único (ej. "Sillón de pedicure")
+        kind (str): Tipo (ej. "Cabina", "Equipo") - opcional
+        capacity (int): Citas que pueden usarlo al mismo tiempo
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    name = (name or '').strip()
+    if not name:
+        return False, "⚠️ El nombre es obligatorio"
+    if int(capacity) < 1:
+        return False, "⚠️ La capacidad debe ser al menos 1"
+
+    try:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO resources (name, kind, capacity)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (name) DO NOTHING
+            ''', (name, (kind or '').strip() or None, int(capacity)))
+            if cursor.rowcount == 0:
+                return False, f"⚠️ Ya existe un recurso llamado {name}"
+        return True, f"✅ Recurso {name} agregado"
+    except Exception as e:
+        return False, f"❌ Error al agregar recurso: {str(e)}"
+
+
+def update_resource(db, resource_id, name, kind, capacity, active):
+    """
+    Actualiza un recurso
+
+    Bajar la capacidad no cancela citas existentes; solo limita las nuevas.
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    name = (name or '').strip()
+    if not name:
+        return False, "⚠️ El nombre es obligatorio"
+    if int(capacity) < 1:
+        return False, "⚠️ La capacidad debe ser al menos 1"
+
+    try:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE resources SET name = %s, kind = %s, capacity = %s, active = %s
+                WHERE id = %s
+            ''', (name, (kind or '').strip() or None, int(capacity), bool(active), resource_id))
+            if cursor.rowcount == 0:
+                return False, "⚠️ Recurso no encontrado"
+        return True, f"✅ Recurso {name} actualizado"
+    except Exception as e:
+        return False, f"❌ Error al actualizar recurso: {str(e)}"
+
+
+def get_catalog(db):
+    """
+    Capacidades de recursos activos y requerimientos por servicio
+
+    Returns:
+        dict: {'capacities': {resource_id: capacity},
+               'requirements': {service_id: {resource_id: quantity}}}
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, capacity FROM resources WHERE active')
+        capacities = {resource_id: capacity for resource_id, capacity in cursor.fetchall()}
+
+        cursor.execute('''
+            SELECT sr.service_id, sr.resource_id, sr.quantity
+            FROM service_resources sr JOIN resources r ON r.id = sr.resource_id
+            WHERE r.active
+        ''')
+        requirements = {}
+        for service_id, resource_id, quantity in cursor.fetchall():
+            requirements.setdefault(service_id, {})[resource_id] = quantity
+
+    return {'capacities': capacities, 'requirements': requirements}
+
+
+def set_service_requirements(db, service_id, requirements):
+    """
+    Reemplaza los recursos que requiere un servicio
+
+    Args:
+        db (Database): Instancia de base de datos
+        service_id (int): ID del servicio
+        requirements (dict): {resource_id: quantity}; vacío quita todos
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    requirements = {int(rid): int(qty) for rid, qty in requirements.items() if int(qty) > 0}
+    try:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM service_resources WHERE service_id = %s', (service_id,))
+            for resource_id, quantity in requirements.items():
+                cursor.execute('''
+                    INSERT INTO service_resources (service_id, resource_id, quantity)
+                    VALUES (%s, %s, %s)
+                ''', (service_id, resource_id, quantity))
+        return True, f"✅ Recursos del servicio actualizados ({len(requirements)})"
+    except Exception as e:
+        return False, f"❌ Error al guardar recursos: {str(e)}"
+
+
+def requirements_for(requirements, service_ids):
+    """
+    Recursos que ocupa una cita con estos servicios
+
+    Args:
+        requirements (dict): {service_id: {resource_id: quantity}} (ver get_catalog)
+        service_ids (iterable): Servicios de la cita
+
+    Returns:
+        dict: {resource_id: quantity}, la cantidad mayor entre los servicios
+    """
+    needed = {}
+    for service_id in service_ids:
+        for resource_id, quantity in requirements.get(service_id, {}).items():
+            needed[resource_id] = max(needed.get(resource_id, 0), quantity)
+    return needed
+
+
+# ==================== OCUPACIÓN ====================
+
+def get_day_usage(db, day):
+    """
+    Uso de recursos activos por las citas activas de una fecha
+
+    Returns:
+        list: Tuplas (booking_id, resource_id, start_minutes, end_minutes, quantity)
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT ru.booking_id, ru.resource_id,
+                   (EXTRACT(EPOCH FROM ru.start_time) / 60)::int,
+                   (EXTRACT(EPOCH FROM ru.end_time) / 60)::int,
+                   ru.quantity
+            FROM resource_usage ru JOIN resources r ON r.id = ru.resource_id
+            WHERE ru.date = %s AND r.active
+        ''', (str(day),))
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+class DayOccupancy:
+    """
+    Ocupación de recursos de un día, indexada para consultas por intervalo
+
+    Por recurso guarda los puntos donde cambia la carga (ordenados) y la carga
+    de cada tramo [points[i], points[i + 1]). `fits` ubica el horario con
+    bisect y solo revisa los tramos que lo cubren.
+    """
+
+    def __init__(self, usage, capacities, exclude_booking_id=None):
+        """
+        Args:
+            usage (list): Tuplas de get_day_usage
+            capacities (dict): {resource_id: capacity} de recursos activos
+            exclude_booking_id (int): Cita a ignorar (al reprogramarla) - opcional
+        """
+        self.capacities = capacities
+        events = {}
+        for booking_id, resource_id, start, end, quantity in usage:
+            if booking_id == exclude_booking_id or end <= start:
+                continue
+            deltas = events.setdefault(resource_id, {})
+            deltas[start] = deltas.get(start, 0) + quantity
+            deltas[end] = deltas.get(end, 0) - quantity
+
+        self._points = {}
+        self._loads = {}
+        for resource_id, deltas in events.items():
+            points = sorted(deltas)
+            loads = []
+            load = 0
+            for point in points:
+                load += deltas[point]
+                loads.append(load)
+            self._points[resource_id] = points
+            self._loads[resource_id] = loads
+
+    def peak(self, resource_id, start, end):
+        """Carga máxima del recurso en [start, end) (minutos desde medianoche)"""
+        points = self._points.get(resource_id)
+        if not points:
+            return 0
+        first = max(bisect_right(points, start) - 1, 0)
+        last = bisect_left(points, end)
+        return max(self._loads[resource_id][first:last], default=0)
+
+    def fits(self, needed, start, end):
+        """
+        Indica si hay capacidad para ocupar los recursos en [start, end)
+
+        Args:
+            needed (dict): {resource_id: quantity} (ver requirements_for)
+            start (int): Inicio en minutos desde medianoche
+            end (int): Fin en minutos desde medianoche
+
+        Returns:
+            bool: True si todos los recursos tienen lugar
+        """
+        for resource_id, quantity in needed.items():
+            capacity = self.capacities.get(resource_id)
+            if capacity is None:
+                continue  # Recurso desactivado: no limita
+            if self.peak(resource_id, start, end) + quantity > capacity:
+                return False
+        return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Recursos compartidos")
+    parser.add_argument('--migrate', action='store_true', help="Crea o actualiza las tablas y triggers de recursos")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de recursos aplicado")
+        else:
+            print("✅ El esquema de recursos ya estaba al día")
+    ensure_schema(database)
@@ -0,0 +1,66 @@
+"""
+Matriz profesional × servicio (o categoría) de ingresos y servicios realizados
+
+Las filas vienen de una sola agregación sobre el resumen diario
+(Database.get_professional_service_revenue) y se acomodan con NumPy en una
+matriz compacta con totales por fila y columna. Ordenar la matriz no vuelve
+a consultar la BD.
+
+Uso:
+    from src import revenue_matrix
+    rows = db.get_professional_service_revenue('2025-01-01', '2025-03-31')
+    matrix = revenue_matrix.build_matrix(rows, value='revenue')
+    revenue_matrix.sort_matrix(matrix, column='Total')
+"""
+
+import numpy as np
+import pandas as pd
+
+TOTAL = 'Total'
+VALUES = ('revenue', 'services')
+
+
+def build_matrix(rows, value='revenue'):
+    """
+    Arma la matriz profesional × servicio con totales
+
+    Args:
+        rows (list): Filas con professional_name, item_name y las columnas de VALUES
+        value (str): 'revenue' o 'services'
+
+    Returns:
+        DataFrame: Profesionales en las filas, servicios en las columnas y
+                   una fila y columna TOTAL al final
+
+    Raises:
+        ValueError: Si el valor no es válido
+    """
+    if value not in VALUES:
+        raise ValueError(f"Valor no válido: {value}")
+
+    professional_codes, professionals = pd.factorize(
+        pd.Series([row['professional_name'] for row in rows], dtype=object), sort=True
+    )
+    item_codes, items = pd.factorize(pd.Series([row['item_name'] for row in rows], dtype=object), sort=True)
+
+    grid = np.zeros((len(professionals), len(items)))
+    np.add.at(grid, (professional_codes, item_codes), np.array([row[value] for row in rows], dtype=float))
+
+    matrix = pd.DataFrame(grid, index=professionals, columns=items)
+    matrix[TOTAL] = matrix.sum(axis=1)
+    matrix.loc[TOTAL] = matrix.sum(axis=0)
+    if value == 'services':
+        matrix = matrix.astype(int)
+    return matrix.rename_axis(index='Profesional', columns=None)
+
+
+def sort_matrix(matrix, column=TOTAL, ascending=False):
+    """
+    Ordena las filas por una columna y las columnas por el total
+
+    La fila y la columna TOTAL se quedan al final.
+    """
+    body = matrix.drop(index=TOTAL)
+    rows = body.sort_values(column, ascending=ascending).index.tolist() + [TOTAL]
+    columns = matrix.loc[TOTAL].drop(TOTAL).sort_values(ascending=ascending).index.tolist() + [TOTAL]
+    return matrix.loc[rows, columns]
@@ -0,0 +1,420 @@
+"""
+Tablas de resumen diario para reportes
+
+`daily_booking_stats` agrega las citas por (fecha, profesional, servicio,
+estado) y `daily_payment_stats` los pagos por (fecha, estado). Los triggers
+de `bookings`, `booking_services` y `payments` las mantienen al día con
+deltas en cada escritura, así que los reportes leen unas cuantas filas por
+día sin importar el volumen de citas.
+
+En `daily_booking_stats` las filas con service_id = 0 guardan los totales
+por cita (una cita con varios servicios cuenta una vez, con su total_price
+y deposit_paid); las filas con service_id > 0 son el desglose por servicio
+(citas que incluyen el servicio y la suma de service_price).
+
+Uso:
+    python -m src.rollups --migrate
+    python -m src.rollups --backfill
+    python -m src.rollups --backfill --start 2024-01-01 --end 2024-12-31
+    python -m src.rollups --check --start 2024-01-01 --end 2024-12-31
+"""
+
+import time
+
+from src import migrations
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_booking_stats (
+        stat_date DATE NOT NULL,
+        professional_id INTEGER NOT NULL DEFAULT 0,
+        service_id INTEGER NOT NULL DEFAULT 0,
+        status VARCHAR(20) NOT NULL DEFAULT '',
+        bookings INTEGER NOT NULL DEFAULT 0,
+        revenue NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        deposits NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (stat_date, professional_id, service_id, status)
+    );
+
+    CREATE TABLE IF NOT EXISTS daily_payment_stats (
+        stat_date DATE NOT NULL,
+        payment_status VARCHAR(40) NOT NULL DEFAULT '',
+        payments INTEGER NOT NULL DEFAULT 0,
+        amounts INTEGER NOT NULL DEFAULT 0,
+        amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+        verified INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (stat_date, payment_status)
+    );
+
+    CREATE OR REPLACE FUNCTION rollup_add_booking(
+        p_date DATE, p_professional_id INTEGER, p_service_id INTEGER, p_status TEXT,
+        p_bookings INTEGER, p_revenue NUMERIC, p_deposits NUMERIC
+    ) RETURNS VOID AS $$
+    BEGIN
+        IF p_date IS NULL THEN
+            RETURN;
+        END IF;
+        INSERT INTO daily_booking_stats AS s
+            (stat_date, professional_id, service_id, status, bookings, revenue, deposits)
+        VALUES (p_date, COALESCE(p_professional_id, 0), p_service_id, COALESCE(p_status, ''),
+                p_bookings, COALESCE(p_revenue, 0), COALESCE(p_deposits, 0))
+        ON CONFLICT (stat_date, professional_id, service_id, status) DO UPDATE SET
+            bookings = s.bookings + EXCLUDED.bookings,
+            revenue = s.revenue + EXCLUDED.revenue,
+            deposits = s.deposits + EXCLUDED.deposits;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Totales por cita; si cambian fecha, profesional o estado también se
+    -- mueve su desglose por servicio. En DELETE corre antes del borrado para
+    -- leer booking_services antes del ON DELETE CASCADE.
+    CREATE OR REPLACE FUNCTION trg_bookings_rollup() RETURNS TRIGGER AS $$
+    DECLARE
+        svc RECORD;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM rollup_add_booking(OLD.date, OLD.professional_id, 0, OLD.status,
+                                       -1, -OLD.total_price, -OLD.deposit_paid);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM rollup_add_booking(NEW.date, NEW.professional_id, 0, NEW.status,
+                                       1, NEW.total_price, NEW.deposit_paid);
+        END IF;
+
+        IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND
+                (OLD.date, OLD.professional_id, OLD.status)
+                IS DISTINCT FROM (NEW.date, NEW.professional_id, NEW.status)) THEN
+            FOR svc IN
+                SELECT service_id, service_price FROM booking_services
+                WHERE booking_id = OLD.id AND service_id IS NOT NULL
+            LOOP
+                PERFORM rollup_add_booking(OLD.date, OLD.professional_id, svc.service_id, OLD.status,
+                                           -1, -svc.service_price, 0);
+                IF TG_OP = 'UPDATE' THEN
+                    PERFORM rollup_add_booking(NEW.date, NEW.professional_id, svc.service_id, NEW.status,
+                                               1, svc.service_price, 0);
+                END IF;
+            END LOOP;
+        END IF;
+
+        IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Desglose por servicio con la fecha, profesional y estado de su cita
+    CREATE OR REPLACE FUNCTION trg_booking_services_rollup() RETURNS TRIGGER AS $$
+    DECLARE
+        b RECORD;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.service_id IS NOT NULL THEN
+            SELECT date, professional_id, status INTO b FROM bookings WHERE id = OLD.booking_id;
+            -- Si la cita ya no existe, su trigger de DELETE descontó este servicio
+            IF FOUND THEN
+                PERFORM rollup_add_booking(b.date, b.professional_id, OLD.service_id, b.status,
+                                           -1, -OLD.service_price, 0);
+            END IF;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.service_id IS NOT NULL THEN
+            SELECT date, professional_id, status INTO b FROM bookings WHERE id = NEW.booking_id;
+            IF FOUND THEN
+                PERFORM rollup_add_booking(b.date, b.professional_id, NEW.service_id, b.status,
+                                           1, NEW.service_price, 0);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION rollup_add_payment(
+        p_date DATE, p_status TEXT, p_payments INTEGER, p_amount NUMERIC, p_verified BOOLEAN
+    ) RETURNS VOID AS $$
+    BEGIN
+        IF p_date IS NULL THEN
+            RETURN;
+        END IF;
+        INSERT INTO daily_payment_stats AS s
+            (stat_date, payment_status, payments, amounts, amount, verified)
+        VALUES (p_date, COALESCE(p_status, ''), p_payments,
+                CASE WHEN p_amount IS NULL THEN 0 ELSE p_payments END,
+                COALESCE(p_amount, 0),
+                CASE WHEN p_verified THEN p_payments ELSE 0 END)
+        ON CONFLICT (stat_date, payment_status) DO UPDATE SET
+            payments = s.payments + EXCLUDED.payments,
+            amounts = s.amounts + EXCLUDED.amounts,
+            amount = s.amount + EXCLUDED.amount,
+            verified = s.verified + EXCLUDED.verified;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION trg_payments_rollup() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM rollup_add_payment(OLD.created_at::date, OLD.payment_status, -1,
+                                       -OLD.amount, OLD.verified);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM rollup_add_payment(NEW.created_at::date, NEW.payment_status, 1,
+                                       NEW.amount, NEW.verified);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS bookings_rollup_write ON bookings;
+    CREATE TRIGGER bookings_rollup_write
+        AFTER INSERT OR UPDATE OF date, professional_id, status, total_price, deposit_paid
+        ON bookings FOR EACH ROW EXECUTE FUNCTION trg_bookings_rollup();
+
+    DROP TRIGGER IF EXISTS bookings_rollup_delete ON bookings;
+    CREATE TRIGGER bookings_rollup_delete
+        BEFORE DELETE ON bookings FOR EACH ROW EXECUTE FUNCTION trg_bookings_rollup();
+
+    DROP TRIGGER IF EXISTS booking_services_rollup ON booking_services;
+    CREATE TRIGGER booking_services_rollup
+        AFTER INSERT OR UPDATE OF booking_id, service_id, service_price OR DELETE
+        ON booking_services FOR EACH ROW EXECUTE FUNCTION trg_booking_services_rollup();
+
+    DROP TRIGGER IF EXISTS payments_rollup ON payments;
+    CREATE TRIGGER payments_rollup
+        AFTER INSERT OR UPDATE OF created_at, payment_status, amount, verified OR DELETE
+        ON payments FOR EACH ROW EXECUTE FUNCTION trg_payments_rollup();
+'''
+
+_schema_ready = False
+
+
+def ensure_schema(db):
+    """
+    Verifica que las tablas de resumen y sus triggers estén instalados
+
+    No ejecuta DDL: recrear los triggers toma locks sobre `bookings`,
+    `booking_services` y `payments`, así que se instalan con
+    `python -m src.rollups --migrate` (ver migrate).
+
+    Raises:
+        RuntimeError: Si las tablas de resumen no existen
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'rollups', SCHEMA_SQL, 'python -m src.rollups --migrate', 'daily_booking_stats')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea o actualiza las tablas de resumen y sus triggers
+
+    Si las tablas no existían se rellenan con el histórico completo.
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    if migrations.is_applied(db, 'rollups', SCHEMA_SQL):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('daily_booking_stats'))")
+        if migrations.applied_checksum(cursor, 'rollups') == migrations.checksum(SCHEMA_SQL):
+            return False
+        cursor.execute("SELECT to_regclass('daily_booking_stats') IS NULL")
+        is_new = cursor.fetchone()[0]
+        cursor.execute(SCHEMA_SQL)
+        if is_new:
+            _backfill(cursor)
+            print("✅ Tablas de resumen diario creadas y rellenadas")
+        migrations.record(cursor, 'rollups', SCHEMA_SQL)
+
+    return True
+
+
+def _date_range(column, start_date, end_date):
+    """Condiciones de rango sobre una columna (usan índices)"""
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append(f"{column} >= %s::date")
+        params.append(start_date)
+    if end_date:
+        conditions.append(f"{column} < %s::date + 1")
+        params.append(end_date)
+    return ' AND '.join(conditions) or 'TRUE', params
+
+
+def _backfill(cursor, start_date=None, end_date=None):
+    # Bloquear escrituras mientras se recalcula para que los triggers
+    # concurrentes no se sumen dos veces al resultado
+    cursor.execute("LOCK TABLE bookings, booking_services, payments IN SHARE MODE")
+
+    stats_where, stats_params = _date_range('stat_date', start_date, end_date)
+    bookings_where, bookings_params = _date_range('b.date', start_date, end_date)
+    payments_where, payments_params = _date_range('created_at', start_date, end_date)
+
+    cursor.execute(f"DELETE FROM daily_booking_stats WHERE {stats_where}", stats_params)
+    cursor.execute(f'''
+        INSERT INTO daily_booking_stats
+            (stat_date, professional_id, service_id, status, bookings, revenue, deposits)
+        SELECT b.date, COALESCE(b.professional_id, 0), 0, COALESCE(b.status, ''),
+               COUNT(*), COALESCE(SUM(b.total_price), 0), COALESCE(SUM(b.deposit_paid), 0)
+        FROM bookings b
+        WHERE b.date IS NOT NULL AND {bookings_where}
+        GROUP BY 1, 2, 4
+    ''', bookings_params)
+    booking_rows = cursor.rowcount
+
+    cursor.execute(f'''
+        INSERT INTO daily_booking_stats
+            (stat_date, professional_id, service_id, status, bookings, revenue, deposits)
+        SELECT b.date, COALESCE(b.professional_id, 0), bs.service_id, COALESCE(b.status, ''),
+               COUNT(*), COALESCE(SUM(bs.service_price), 0), 0
+        FROM bookings b
+        JOIN booking_services bs ON bs.booking_id = b.id
+        WHERE b.date IS NOT NULL AND bs.service_id IS NOT NULL AND {bookings_where}
+        GROUP BY 1, 2, 3, 4
+    ''', bookings_params)
+    service_rows = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM daily_payment_stats WHERE {stats_where}", stats_params)
+    cursor.execute(f'''
+        INSERT INTO daily_payment_stats
+            (stat_date, payment_status, payments, amounts, amount, verified)
+        SELECT created_at::date, COALESCE(payment_status, ''), COUNT(*), COUNT(amount),
+               COALESCE(SUM(amount), 0), COUNT(*) FILTER (WHERE verified)
+        FROM payments
+        WHERE created_at IS NOT NULL AND {payments_where}
+        GROUP BY 1, 2
+    ''', payments_params)
+    payment_rows = cursor.rowcount
+
+    return {'booking_rows': booking_rows, 'service_rows': service_rows, 'payment_rows': payment_rows}
+
+
+def backfill(db, start_date=None, end_date=None):
+    """
+    Recalcula los resúmenes desde las tablas originales en una transacción
+
+    Args:
+        db (Database): Instancia de base de datos
+        start_date (str): Fecha inicial YYYY-MM-DD (incluida) - opcional
+        end_date (str): Fecha final YYYY-MM-DD (incluida) - opcional
+
+    Returns:
+        dict: Filas escritas por tabla y segundos transcurridos
+    """
+    ensure_schema(db)
+    started = time.monotonic()
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        result = _backfill(cursor, start_date, end_date)
+
+    result['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    return result
+
+
+def check(db, start_date=None, end_date=None):
+    """
+    Compara los resúmenes contra una agregación directa de las tablas originales
+
+    Returns:
+        list: Diferencias como (tabla, fecha, llave, valor_resumen, valor_real)
+    """
+    bookings_where, bookings_params = _date_range('b.date', start_date, end_date)
+    stats_where, stats_params = _date_range('stat_date', start_date, end_date)
+    payments_where, payments_params = _date_range('created_at', start_date, end_date)
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            WITH actual AS (
+                SELECT b.date as stat_date, COALESCE(b.status, '') as status,
+                       COUNT(*) as bookings, COALESCE(SUM(b.total_price), 0) as revenue
+                FROM bookings b
+                WHERE b.date IS NOT NULL AND {bookings_where}
+                GROUP BY 1, 2
+            ), rolled AS (
+                SELECT stat_date, status, SUM(bookings) as bookings, SUM(revenue) as revenue
+                FROM daily_booking_stats
+                WHERE service_id = 0 AND {stats_where}
+                GROUP BY 1, 2
+            )
+            SELECT 'daily_booking_stats', COALESCE(r.stat_date, a.stat_date),
+                   COALESCE(r.status, a.status),
+                   COALESCE(r.bookings, 0) || ' / ' || COALESCE(r.revenue, 0),
+                   COALESCE(a.bookings, 0) || ' / ' || COALESCE(a.revenue, 0)
+            FROM rolled r
+            FULL JOIN actual a ON a.stat_date = r.stat_date AND a.status = r.status
+            WHERE COALESCE(r.bookings, 0) <> COALESCE(a.bookings, 0)
+               OR COALESCE(r.revenue, 0) <> COALESCE(a.revenue, 0)
+        ''', bookings_params + stats_params)
+        differences = cursor.fetchall()
+
+        cursor.execute(f'''
+            WITH actual AS (
+                SELECT created_at::date as stat_date, COALESCE(payment_status, '') as payment_status,
+                       COUNT(*) as payments, COALESCE(SUM(amount), 0) as amount
+                FROM payments
+                WHERE created_at IS NOT NULL AND {payments_where}
+                GROUP BY 1, 2
+            ), rolled AS (
+                SELECT stat_date, payment_status, payments, amount
+                FROM daily_payment_stats
+                WHERE {stats_where}
+            )
+            SELECT 'daily_payment_stats', COALESCE(r.stat_date, a.stat_date),
+                   COALESCE(r.payment_status, a.payment_status),
+                   COALESCE(r.payments, 0) || ' / ' || COALESCE(r.amount, 0),
+                   COALESCE(a.payments, 0) || ' / ' || COALESCE(a.amount, 0)
+            FROM rolled r
+            FULL JOIN actual a ON a.stat_date = r.stat_date AND a.payment_status = r.payment_status
+            WHERE COALESCE(r.payments, 0) <> COALESCE(a.payments, 0)
+               OR COALESCE(r.amount, 0) <> COALESCE(a.amount, 0)
+        ''', payments_params + stats_params)
+        differences.extend(cursor.fetchall())
+
+    return differences
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Resúmenes diarios de citas y pagos")
+    parser.add_argument('--migrate', action='store_true', help="Crea o actualiza las tablas de resumen y sus triggers")
+    parser.add_argument('--backfill', action='store_true', help="Recalcula los resúmenes desde las tablas originales")
+    parser.add_argument('--check', action='store_true', help="Compara los resúmenes contra las tablas originales")
+    parser.add_argument('--start', help="Fecha inicial YYYY-MM-DD")
+    parser.add_argument('--end', help="Fecha final YYYY-MM-DD")
+    args = parser.parse_args()
+
+    database = Database()
+
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de resúmenes diarios aplicado")
+        else:
+            print("✅ El esquema de resúmenes diarios ya estaba al día")
+
+    ensure_schema(database)
+
+    if args.backfill:
+        result = backfill(database, args.start, args.end)
+        print(f"✅ Resúmenes recalculados: {result['booking_rows']} filas de citas, "
+              f"{result['service_rows']} de servicios y {result['payment_rows']} de pagos "
+              f"en {result['elapsed_seconds']}s")
+
+    if args.check:
+        differences = check(database, args.start, args.end)
+        for table, stat_date, key, rolled, actual in differences:
+            print(f"⚠️ {table} {stat_date} [{key}]: resumen {rolled}, real {actual}")
+        if differences:
+            print(f"❌ {len(differences)} diferencias encontradas. Ejecuta --backfill para corregirlas")
+        else:
+            print("✅ Los resúmenes coinciden con las tablas originales")
@@ -0,0 +1,474 @@
+"""
+Búsqueda difusa (tolerante a errores de dedo) de servicios, categorías y clientes
+
+Con la extensión `pg_trgm` la búsqueda usa índices GIN de trigramas sobre el
+texto plegado (minúsculas y sin acentos, función SQL `search_fold`), así que
+responde en milisegundos sin recorrer las tablas. Mientras no se aplique la
+migración (`--migrate`, por ejemplo porque la extensión no está disponible),
+se usa un índice de n-gramas en memoria con las mismas reglas, que se
+reconstruye cada INDEX_TTL segundos o al llamar a `invalidate`.
+
+La puntuación es la similitud de trigramas entre la búsqueda y el tramo de
+palabras del texto que mejor coincide (como `word_similarity` de pg_trgm).
+
+Uso:
+    python -m src.search --migrate
+
+    from src import search
+    search.ensure_schema(db)
+    results = search.search(db, 'manicur', kinds=('service',))
+    clusters = search.find_duplicate_categories(db, threshold=0.5)
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+import psycopg2
+
+from src import clients, migrations
+
+SCHEMA_SQL = '''
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+    -- Texto para comparar: minúsculas y sin acentos (translate es inmutable; unaccent no)
+    CREATE OR REPLACE FUNCTION search_fold(p_text TEXT) RETURNS TEXT AS $$
+        SELECT translate(lower(p_text), 'áéíóúàèìòùäëïöüâêîôûñç', 'aeiouaeiouaeiouaeiounc')
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+'''
+
+# Índices GIN de trigramas: (nombre, definición). Se construyen con
+# CREATE INDEX CONCURRENTLY para no bloquear escrituras en clients y el catálogo
+INDEXES = [
+    ('idx_services_name_trgm', 'ON services USING gin (search_fold(name) gin_trgm_ops)'),
+    ('idx_services_description_trgm', 'ON services USING gin (search_fold(description) gin_trgm_ops)'),
+    ('idx_categories_name_trgm', 'ON categories USING gin (search_fold(name) gin_trgm_ops)'),
+    ('idx_clients_name_trgm', 'ON clients USING gin (search_fold(name) gin_trgm_ops)')
+]
+
+# Lo que se registra en schema_migrations: cambia si cambia cualquier parte
+MIGRATION_SQL = SCHEMA_SQL + ''.join(
+    f"\n    CREATE INDEX {name} {definition};" for name, definition in INDEXES
+)
+
+KINDS = ('service', 'category', 'client')
+SIMILARITY_THRESHOLD = 0.3       # Puntuación mínima de un resultado
+DESCRIPTION_WEIGHT = 0.8         # Coincidir en la descripción pesa menos que en el nombre
+DUPLICATE_THRESHOLD = 0.5        # Similitud mínima entre nombres de categoría
+MIN_QUERY_LENGTH = 2
+INDEX_TTL = 300                  # Segundos antes de reconstruir el índice en memoria
+
+_schema_ready = False
+_trigram_available = False
+
+_index_lock = threading.Lock()
+_index = None
+_index_built_at = 0.0
+
+_FOLD = str.maketrans('áéíóúàèìòùäëïöüâêîôûñç', 'aeiouaeiouaeiouaeiounc')
+
+
+def ensure_schema(db):
+    """
+    Decide si las búsquedas usan pg_trgm (una vez por proceso)
+
+    No ejecuta DDL: la extensión, search_fold y los índices de trigramas se
+    instalan con `python -m src.search --migrate`. Mientras no se aplique, se
+    usa el índice de n-gramas en memoria.
+    """
+    global _schema_ready, _trigram_available
+    if _schema_ready:
+        return
+
+    with db.get_connection() as conn:
+        applied = migrations.applied_checksum(conn.cursor(), 'search')
+
+    _trigram_available = applied is not None
+    if applied is None:
+        print("ℹ️ Búsqueda con índice en memoria. Para usar pg_trgm ejecuta: python -m src.search --migrate")
+    elif applied != migrations.checksum(MIGRATION_SQL):
+        print("⚠️ El esquema 'search' no está al día. Ejecuta: python -m src.search --migrate")
+
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Instala pg_trgm, la función de plegado y los índices de trigramas
+
+    Requiere la tabla de clientes (indexa clients.name). Los índices se
+    construyen sin bloquear escrituras.
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+
+    Raises:
+        psycopg2.Error: Si la extensión pg_trgm no está disponible
+    """
+    clients.ensure_schema(db)
+    if migrations.is_applied(db, 'search', MIGRATION_SQL):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('search'))")
+        cursor.execute(SCHEMA_SQL)
+
+    for name, definition in INDEXES:
+        if migrations.create_index_concurrently(db, name, definition):
+            print(f"✅ Índice {name} creado")
+
+    with db.get_connection() as conn:
+        migrations.record(conn.cursor(), 'search', MIGRATION_SQL)
+
+    return True
+
+
+def uses_trigram_index():
+    """True si las búsquedas van a PostgreSQL (pg_trgm), False si al índice en memoria"""
+    return _trigram_available
+
+
+# ==================== TRIGRAMAS ====================
+
+def fold(text):
+    """Equivalente en Python de la función SQL search_fold"""
+    return (text or '').lower().translate(_FOLD)
+
+
+def _words(text):
+    # pg_trgm solo toma letras y dígitos; se quitan los acentos que queden
+    text = unicodedata.normalize('NFKD', fold(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.findall(r'[0-9a-z]+', text)
+
+
+def _word_trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigrams(text):
+    """Trigramas de un texto con las reglas de pg_trgm (dos espacios antes y uno después de cada palabra)"""
+    result = set()
+    for word in _words(text):
+        result |= _word_trigrams(word)
+    return result
+
+
+def similarity(a, b):
+    """Similitud de trigramas entre dos textos (como similarity() de pg_trgm)"""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def _best_window(query_trigrams, span, word_trigrams):
+    # Mejor similitud contra tramos de `span` palabras consecutivas
+    span = min(span, len(word_trigrams))
+    best = 0.0
+    for start in range(len(word_trigrams) - span + 1):
+        window = set().union(*word_trigrams[start:start + span])
+        best = max(best, len(query_trigrams & window) / len(query_trigrams | window))
+    return best
+
+
+def word_similarity(query, text):
+    """
+    Similitud entre la búsqueda y el tramo de palabras del texto que mejor coincide
+
+    Aproxima word_similarity() de pg_trgm comparando contra cada tramo de
+    tantas palabras consecutivas como tenga la búsqueda.
+    """
+    query_trigrams = trigrams(query)
+    words = _words(text)
+    if not query_trigrams or not words:
+        return 0.0
+    return _best_window(query_trigrams, len(_words(query)), [_word_trigrams(word) for word in words])
+
+
+class NgramIndex:
+    """
+    Índice invertido de trigramas en memoria
+
+    Cada documento es un dict con kind, id, label, detail y los campos de
+    texto a comparar (`fields`: lista de (texto, peso)).
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.postings = defaultdict(set)
+        # Trigramas por palabra de cada campo, calculados una sola vez
+        self.fields = []
+        for position, document in enumerate(documents):
+            fields = []
+            for text, weight in document['fields']:
+                word_trigrams = [_word_trigrams(word) for word in _words(text)]
+                if word_trigrams:
+                    fields.append((word_trigrams, weight))
+                for trigram in set().union(*word_trigrams):
+                    self.postings[trigram].add(position)
+            self.fields.append(fields)
+
+    def search(self, query, kinds=KINDS, limit=10, threshold=SIMILARITY_THRESHOLD):
+        """Resultados ordenados por puntuación (ver search)"""
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+        span = len(_words(query))
+
+        # Un documento con menos de `needed` trigramas en común no puede pasar el umbral
+        shared = defaultdict(int)
+        for trigram in query_trigrams:
+            for position in self.postings.get(trigram, ()):
+                shared[position] += 1
+        needed = threshold * len(query_trigrams)
+
+        results = []
+        for position, count in shared.items():
+            document = self.documents[position]
+            if count < needed or document['kind'] not in kinds:
+                continue
+            score = max(
+                _best_window(query_trigrams, span, word_trigrams) * weight
+                for word_trigrams, weight in self.fields[position]
+            )
+            if score >= threshold:
+                results.append({key: document[key] for key in ('kind', 'id', 'label', 'detail', 'category_id')}
+                               | {'score': round(score, 3)})
+
+        results.sort(key=lambda r: (-r['score'], r['label'] or ''))
+        return results[:limit]
+
+
+def _build_index(db):
+    documents = []
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, name, description, category, category_id FROM services WHERE active = TRUE
+        ''')
+        for service_id, name, description, category, category_id in cursor.fetchall():
+            documents.append({
+                'kind': 'service', 'id': service_id, 'label': name, 'detail': category,
+                'category_id': category_id,
+                'fields': [(name, 1.0), (description or '', DESCRIPTION_WEIGHT)]
+            })
+
+        cursor.execute("SELECT id, name, icon FROM categories WHERE active = TRUE")
+        for category_id, name, icon in cursor.fetchall():
+            documents.append({
+                'kind': 'category', 'id': category_id, 'label': name, 'detail': icon,
+                'category_id': category_id, 'fields': [(name, 1.0)]
+            })
+
+        cursor.execute("SELECT id, name, phone FROM clients WHERE name IS NOT NULL AND bookings > 0")
+        for client_id, name, phone in cursor.fetchall():
+            documents.append({
+                'kind': 'client', 'id': client_id, 'label': name, 'detail': phone,
+                'category_id': None, 'fields': [(name, 1.0)]
+            })
+    return NgramIndex(documents)
+
+
+def _get_index(db):
+    global _index, _index_built_at
+    with _index_lock:
+        if _index is None or time.monotonic() - _index_built_at > INDEX_TTL:
+            _index = _build_index(db)
+            _index_built_at = time.monotonic()
+        return _index
+
+
+def invalidate():
+    """Descarta el índice en memoria (tras editar servicios o categorías)"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# ==================== BÚSQUEDA ====================
+
+def _search_trigram(db, query, kinds, limit, threshold):
+    selects = {
+        'service': '''
+            SELECT 'service' AS kind, s.id, s.name AS label, s.category AS detail, s.category_id,
+                   GREATEST(word_similarity(search_fold(%(q)s), search_fold(s.name)),
+                            word_similarity(search_fold(%(q)s), search_fold(s.description)) * %(desc_weight)s) AS score
+            FROM services s
+            WHERE s.active = TRUE
+              AND (search_fold(%(q)s) <%% search_fold(s.name)
+                   OR search_fold(%(q)s) <%% search_fold(s.description))
+        ''',
+        'category': '''
+            SELECT 'category' AS kind, c.id, c.name AS label, c.icon AS detail, c.id AS category_id,
+                   word_similarity(search_fold(%(q)s), search_fold(c.name)) AS score
+            FROM categories c
+            WHERE c.active = TRUE AND search_fold(%(q)s) <%% search_fold(c.name)
+        ''',
+        'client': '''
+            SELECT 'client' AS kind, cl.id, cl.name AS label, cl.phone AS detail, NULL::int AS category_id,
+                   word_similarity(search_fold(%(q)s), search_fold(cl.name)) AS score
+            FROM clients cl
+            WHERE cl.bookings > 0 AND search_fold(%(q)s) <%% search_fold(cl.name)
+        '''
+    }
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        # El operador <% usa este umbral (y así puede usar los índices GIN)
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                       (str(threshold * DESCRIPTION_WEIGHT),))
+        cursor.execute(f'''
+            SELECT * FROM ({' UNION ALL '.join(selects[kind] for kind in kinds)}) hits
+            WHERE score >= %(threshold)s
+            ORDER BY score DESC, label
+            LIMIT %(limit)s
+        ''', {'q': query, 'desc_weight': DESCRIPTION_WEIGHT, 'threshold': threshold, 'limit': limit})
+        columns = [desc[0] for desc in cursor.description]
+        return [
+            dict(zip(columns, row)) | {'score': round(float(row[-1]), 3)}
+            for row in cursor.fetchall()
+        ]
+
+
+def search(db, query, kinds=KINDS, limit=10, threshold=SIMILARITY_THRESHOLD):
+    """
+    Búsqueda difusa ordenada por similitud
+
+    Args:
+        db: Instancia de Database
+        query (str): Texto a buscar (tolera errores de dedo y acentos)
+        kinds (iterable): Subconjunto de KINDS
+        limit (int): Máximo de resultados
+        threshold (float): Puntuación mínima (0-1)
+
+    Returns:
+        list: Dicts con kind, id, label, detail, category_id y score
+
+    Raises:
+        ValueError: Si algún tipo no es válido
+    """
+    kinds = tuple(kinds)
+    invalid = set(kinds) - set(KINDS)
+    if invalid:
+        raise ValueError(f"Tipo de búsqueda no válido: {', '.join(sorted(invalid))}")
+
+    query = (query or '').strip()
+    if len(query) < MIN_QUERY_LENGTH or not kinds:
+        return []
+
+    if _trigram_available:
+        return _search_trigram(db, query, kinds, limit, threshold)
+    return _get_index(db).search(query, kinds, limit, threshold)
+
+
+# ==================== CATEGORÍAS DUPLICADAS ====================
+
+def find_duplicate_categories(db, threshold=DUPLICATE_THRESHOLD):
+    """
+    Agrupa variantes de categoría de services por similitud de nombre
+
+    Extiende Database.get_duplicate_categories (que solo une nombres iguales
+    tras LOWER(TRIM(...))): también une acentos distintos y errores de dedo
+    ("Uñas", "unas ", "Unyas").
+
+    Args:
+        db: Instancia de Database
+        threshold (float): Similitud mínima entre nombres (0-1)
+
+    Returns:
+        list: Mismo formato que get_duplicate_categories, más 'similarity'
+              (la menor similitud que unió al grupo)
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT category, COUNT(*) FROM services
+            WHERE category IS NOT NULL AND TRIM(category) <> ''
+            GROUP BY category
+        ''')
+        variations = cursor.fetchall()
+
+        names = sorted({fold(category.strip()) for category, _ in variations})
+        if _trigram_available:
+            cursor.execute('''
+                SELECT a.name, b.name, similarity(a.name, b.name)
+                FROM unnest(%(names)s::text[]) a(name)
+                JOIN unnest(%(names)s::text[]) b(name)
+                  ON a.name < b.name AND similarity(a.name, b.name) >= %(threshold)s
+            ''', {'names': names, 'threshold': threshold})
+            pairs = cursor.fetchall()
+        else:
+            pairs = [
+                (a, b, score)
+                for i, a in enumerate(names) for b in names[i + 1:]
+                for score in [similarity(a, b)] if score >= threshold
+            ]
+
+    # Unión de nombres similares (union-find)
+    parent = {name: name for name in names}
+
+    def root(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    weakest = {}
+    for a, b, score in pairs:
+        ra, rb = root(a), root(b)
+        merged = min(weakest.get(ra, 1.0), float(score))
+        if ra != rb:
+            merged = min(merged, weakest.pop(rb, 1.0))
+            parent[rb] = ra
+        weakest[ra] = merged
+
+    groups = defaultdict(lambda: {'counts': defaultdict(int), 'variations': []})
+    for category, count in variations:
+        group = groups[root(fold(category.strip()))]
+        group['counts'][category.strip().lower()] += count
+        group['variations'].append(category)
+
+    duplicates = []
+    for name, group in groups.items():
+        if len(group['variations']) < 2:
+            continue
+        duplicates.append({
+            # El nombre más usado del grupo
+            'clean_name': max(group['counts'], key=lambda n: (group['counts'][n], n)),
+            'total_services': sum(group['counts'].values()),
+            'variations': sorted(group['variations']),
+            'num_variations': len(group['variations']),
+            'similarity': round(weakest.get(name, 1.0), 3)
+        })
+
+    duplicates.sort(key=lambda d: -d['total_services'])
+    return duplicates
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Búsqueda difusa")
+    parser.add_argument('--migrate', action='store_true', help="Instala pg_trgm y los índices de trigramas")
+    args = parser.parse_args()
+
+    database = Database()
+    if args.migrate:
+        try:
+            applied = migrate(database)
+        except psycopg2.Error as e:
+            raise SystemExit(f"❌ No se pudo instalar pg_trgm: {str(e).strip()}")
+        if applied:
+            print("✅ Esquema de búsqueda aplicado")
+        else:
+            print("✅ El esquema de búsqueda ya estaba al día")
@@ -0,0 +1,149 @@
+"""
+Motor de utilización: minutos con horario vs minutos reservados
+
+La ocupación real es booked_minutes / capacity_minutes, donde la capacidad
+son los bloques de `schedules` del profesional y lo reservado son las citas
+no canceladas repartidas entre las horas que abarcan. Los datos base vienen
+de una sola consulta (Database.get_utilization_minutes) o, si ya están en
+memoria (por ejemplo, del espejo analítico), de `compute_utilization` con
+NumPy. A partir de ese formato largo se arman las matrices por día y por
+hora para graficar.
+
+Uso:
+    from src import utilization
+    minutes = utilization.load_utilization(db, '2025-01-01', '2025-01-31')
+    utilization.day_matrix(minutes)     # profesional × día (%)
+    utilization.hour_matrix(minutes)    # profesional × hora (%)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Duración de cada bloque de `schedules` (Database.create_professional_schedules crea bloques de una hora)
+SLOT_MINUTES = 60
+
+COLUMNS = ['professional_id', 'professional_name', 'date', 'hour', 'capacity_minutes', 'booked_minutes']
+
+
+def load_utilization(db, start_date, end_date, professional_ids=None, slot_minutes=SLOT_MINUTES):
+    """
+    Minutos de capacidad y reservados por profesional, día y hora (una consulta)
+
+    Returns:
+        DataFrame: Columnas de COLUMNS
+    """
+    rows = db.get_utilization_minutes(start_date, end_date, professional_ids, slot_minutes)
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def _to_minutes(values):
+    """Convierte horas 'HH:MM' (o datetime.time) a minutos desde medianoche"""
+    times = pd.to_datetime(pd.Series(values, dtype=object).astype(str), format='mixed', errors='coerce')
+    return (times.dt.hour * 60 + times.dt.minute).to_numpy(dtype=float)
+
+
+def compute_utilization(schedules, bookings, professional_names=None, slot_minutes=SLOT_MINUTES):
+    """
+    Versión en memoria (NumPy) de Database.get_utilization_minutes
+
+    Args:
+        schedules (list or DataFrame): Filas con professional_id, date, start_time
+        bookings (list or DataFrame): Filas con professional_id, date, start_time,
+                                      end_time y status
+        professional_names (dict): {professional_id: nombre} - opcional
+        slot_minutes (int): Duración de cada bloque de horario
+
+    Returns:
+        DataFrame: Columnas de COLUMNS
+    """
+    schedules = pd.DataFrame(schedules, columns=['professional_id', 'date', 'start_time'])
+    bookings = pd.DataFrame(bookings, columns=['professional_id', 'date', 'start_time', 'end_time', 'status'])
+    bookings = bookings[bookings['status'] != 'cancelled']
+
+    # Capacidad: bloques por (profesional, día, hora)
+    schedule_hours = _to_minutes(schedules['start_time']) // 60
+    capacity = pd.DataFrame({
+        'professional_id': schedules['professional_id'].to_numpy(),
+        'date': schedules['date'].astype(str).to_numpy(),
+        'hour': schedule_hours
+    }).dropna().groupby(['professional_id', 'date', 'hour']).size().mul(slot_minutes).rename('capacity_minutes')
+
+    # Reservado: cada cita se expande a las horas que abarca
+    start = _to_minutes(bookings['start_time'])
+    end = _to_minutes(bookings['end_time'])
+    end = np.where(np.isnan(end), start + slot_minutes, end)
+    valid = ~np.isnan(start) & (end > start)
+    start, end = start[valid], end[valid]
+
+    first_hour = (start // 60).astype(int)
+    last_hour = ((end - 1) // 60).astype(int)
+    spans = last_hour - first_hour + 1
+
+    index = np.repeat(np.arange(len(start)), spans)
+    offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+    hours = first_hour[index] + offsets
+    minutes = np.minimum(end[index], (hours + 1) * 60) - np.maximum(start[index], hours * 60)
+
+    booked = pd.DataFrame({
+        'professional_id': bookings['professional_id'].to_numpy()[valid][index],
+        'date': bookings['date'].astype(str).to_numpy()[valid][index],
+        'hour': hours,
+        'booked_minutes': minutes
+    }).groupby(['professional_id', 'date', 'hour'])['booked_minutes'].sum()
+
+    result = pd.concat([capacity, booked], axis=1).fillna(0).reset_index()
+    result.columns = ['professional_id', 'date', 'hour', 'capacity_minutes', 'booked_minutes']
+    result['hour'] = result['hour'].astype(int)
+    result['capacity_minutes'] = result['capacity_minutes'].astype(int)
+    result['booked_minutes'] = result['booked_minutes'].astype(int)
+
+    names = professional_names or {}
+    result['professional_name'] = result['professional_id'].map(names).fillna('Sin asignar')
+    return result[COLUMNS].sort_values(['professional_id', 'date', 'hour'], ignore_index=True)
+
+
+def _rate(booked, capacity):
+    """Porcentaje de ocupación; NaN donde no hay capacidad"""
+    booked = np.asarray(booked, dtype=float)
+    capacity = np.asarray(capacity, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(capacity > 0, booked / capacity * 100, np.nan)
+
+
+def summary(minutes):
+    """
+    Totales por profesional
+
+    Returns:
+        DataFrame: professional_id, professional_name, capacity_minutes,
+                   booked_minutes, utilization (%)
+    """
+    totals = (minutes.groupby(['professional_id', 'professional_name'], as_index=False)
+              [['capacity_minutes', 'booked_minutes']].sum())
+    totals['utilization'] = _rate(totals['booked_minutes'], totals['capacity_minutes'])
+    return totals
+
+
+def _matrix(minutes, column):
+    booked = minutes.pivot_table(index='professional_name', columns=column,
+                                 values='booked_minutes', aggfunc='sum', fill_value=0)
+    capacity = minutes.pivot_table(index='professional_name', columns=column,
+                                   values='capacity_minutes', aggfunc='sum', fill_value=0)
+    return pd.DataFrame(_rate(booked, capacity), index=booked.index, columns=booked.columns)
+
+
+def day_matrix(minutes):
+    """Matriz profesional × día con la ocupación (%)"""
+    return _matrix(minutes, 'date')
+
+
+def hour_matrix(minutes):
+    """Matriz profesional × hora del día con la ocupación (%) de todo el rango"""
+    return _matrix(minutes, 'hour')
+
+
+def daily_totals(minutes):
+    """Capacidad, reservado y ocupación (%) de todo el equipo por día"""
+    totals = minutes.groupby('date', as_index=False)[['capacity_minutes', 'booked_minutes']].sum()
+    totals['utilization'] = _rate(totals['booked_minutes'], totals['capacity_minutes'])
+    return totals
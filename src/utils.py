@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import json
 
+from src import loyalty
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -118,8 +120,8 @@ def is_business_hours(time_str):
     return Config.OPENING_HOUR <= hour < Config.CLOSING_HOUR
 
 def calculate_points_earned(amount):
-    """Calcula puntos ganados por una compra"""
-    return int(amount * Config.POINTS_PER_PESO)
+    """Calcula puntos ganados por una compra (misma regla que el libro de puntos, ver src/loyalty.py)"""
+    return loyalty.points_for(amount)
 
 def format_services_list(services):
     """Formatea lista de servicios para mensajes"""
@@ -255,26 +257,23 @@ def calculate_discount(services):
         'discount_percentage': (discount / total * 100) if total > 0 else 0
     }
 
-def get_popular_service_combos():
-    """Obtiene combos populares de servicios"""
-    # Esto podría calcularse de la BD en producción
-    return [
-        {
-            'name': 'Paquete Manos Perfectas',
-            'services': ['Manicure Francesa', 'Pedicure Spa'],
-            'discount': 7
-        },
-        {
-            'name': 'Paquete Renovación',
-            'services': ['Facial Hidratante', 'Manicure Francesa'],
-            'discount': 10
-        },
-        {
-            'name': 'Paquete Glam Completo',
-            'services': ['Tinte + Corte', 'Facial Hidratante'],
-            'discount': 20
-        }
-    ]
+def get_popular_service_combos(db, limit=3):
+    """
+    Obtiene los combos de servicios más reservados (minados en src/combos.py)
+    
+    El descuento de cada combo es el de calculate_discount según su tamaño.
+    """
+    from src import combos
+    
+    popular = []
+    for combo in combos.get_frequent_combos(db, limit=limit):
+        discount = calculate_discount([{'price': 1}] * len(combo['services']))
+        popular.append({
+            'name': format_services_list([{'name': name} for name in combo['services']]),
+            'services': combo['services'],
+            'discount': round(discount['discount_percentage'])
+        })
+    return popular
 
 def log_activity(activity_type, details):
     """Registra actividad del sistema"""
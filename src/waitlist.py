@@ -0,0 +1,514 @@
+"""
+Lista de espera con ofertas cuando se libera un espacio
+
+Un cliente se anota para un conjunto de servicios, un rango de fechas y,
+opcionalmente, un profesional. Cuando una cita activa se cancela, se
+reprograma o se borra, un trigger de `bookings` toma el intervalo liberado
+y, en la misma transacción, lo compara solo contra las entradas activas de
+ese profesional (o sin profesional) cuyo rango incluye la fecha: el índice
+parcial (professional_id, date_from) acota la búsqueda a MAX_RANGE_DAYS
+días, así que el costo depende de las entradas relevantes y no del tamaño
+de la lista. Las ofertas quedan en `waitlist_offers` y un proceso aparte las
+envía por correo en lotes (mismo esquema que src/reminders.py).
+
+Una entrada se marca como cumplida cuando el cliente reserva una cita dentro
+de su rango.
+
+Uso:
+    python -m src.waitlist --migrate
+    python -m src.waitlist --once
+    python -m src.waitlist --interval 1
+"""
+
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from dotenv import load_dotenv
+
+from src import clients, migrations, notifications
+
+# Cargar variables de entorno (APP_URL)
+load_dotenv()
+
+APP_URL = os.getenv('APP_URL', 'http://localhost:8501')
+MAX_RANGE_DAYS = 60            # Rango máximo de fechas de una entrada
+OFFERS_PER_SLOT = 3            # Entradas notificadas por espacio liberado (en orden de llegada)
+DEFAULT_SLOT_MINUTES = 60      # Duración supuesta si la cita no tiene hora de fin
+MAX_ATTEMPTS = 3               # Intentos de envío antes de marcar la oferta como fallida
+CLAIM_TIMEOUT_MINUTES = 15     # Ofertas 'sending' más viejas se vuelven a tomar
+BATCH_SIZE = 50
+DEFAULT_INTERVAL_MINUTES = 1
+
+SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS waitlist_entries (
+        id SERIAL PRIMARY KEY,
+        client_id INTEGER REFERENCES clients(id),
+        client_name VARCHAR(100),
+        client_phone VARCHAR(30),
+        client_email VARCHAR(100),
+        service_ids INTEGER[] NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        professional_id INTEGER REFERENCES professionals(id),
+        date_from DATE NOT NULL,
+        date_to DATE NOT NULL,
+        status VARCHAR(20) NOT NULL DEFAULT 'active'
+            CHECK (status IN ('active', 'fulfilled', 'cancelled')),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        CHECK (date_to >= date_from AND date_to - date_from <= {max_range_days})
+    );
+    -- professional_id = X y professional_id IS NULL usan el mismo índice
+    CREATE INDEX IF NOT EXISTS idx_waitlist_match
+        ON waitlist_entries (professional_id, date_from) WHERE status = 'active';
+    CREATE INDEX IF NOT EXISTS idx_waitlist_client
+        ON waitlist_entries (client_id) WHERE status = 'active';
+
+    CREATE TABLE IF NOT EXISTS waitlist_offers (
+        id SERIAL PRIMARY KEY,
+        entry_id INTEGER NOT NULL REFERENCES waitlist_entries(id) ON DELETE CASCADE,
+        booking_id INTEGER,
+        professional_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        start_time TIME NOT NULL,
+        end_time TIME NOT NULL,
+        status VARCHAR(20) NOT NULL DEFAULT 'pending'
+            CHECK (status IN ('pending', 'sending', 'sent', 'failed', 'expired')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        claimed_at TIMESTAMP,
+        sent_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (entry_id, professional_id, date, start_time)
+    );
+    CREATE INDEX IF NOT EXISTS idx_waitlist_offers_queue
+        ON waitlist_offers (id) WHERE status IN ('pending', 'sending');
+
+    -- Crea ofertas para un intervalo libre; devuelve cuántas
+    CREATE OR REPLACE FUNCTION waitlist_match_slot(
+        p_professional_id INTEGER, p_date DATE, p_start TIME, p_end TIME, p_booking_id INTEGER
+    ) RETURNS INTEGER AS $$
+    DECLARE
+        v_offers INTEGER;
+    BEGIN
+        IF p_professional_id IS NULL OR p_date IS NULL OR p_start IS NULL
+                OR p_date + p_start <= LOCALTIMESTAMP THEN
+            RETURN 0;
+        END IF;
+        -- ¿Sigue libre? (otra cita pudo ocupar parte del intervalo)
+        IF EXISTS (
+            SELECT 1 FROM bookings
+            WHERE professional_id = p_professional_id AND date = p_date
+              AND status IS DISTINCT FROM 'cancelled'
+              AND start_time < p_end
+              AND COALESCE(end_time, start_time + interval '{default_slot_minutes} minutes') > p_start
+        ) THEN
+            RETURN 0;
+        END IF;
+
+        INSERT INTO waitlist_offers (entry_id, booking_id, professional_id, date, start_time, end_time)
+        SELECT e.id, p_booking_id, p_professional_id, p_date, p_start, p_end
+        FROM waitlist_entries e
+        WHERE e.status = 'active'
+          AND (e.professional_id = p_professional_id OR e.professional_id IS NULL)
+          AND e.date_from BETWEEN p_date - {max_range_days} AND p_date
+          AND e.date_to >= p_date
+          AND e.duration_minutes <= EXTRACT(EPOCH FROM (p_end - p_start)) / 60
+          AND e.service_ids <@ ARRAY(
+              SELECT service_id FROM professional_services
+              WHERE professional_id = p_professional_id AND active = TRUE
+          )
+        ORDER BY e.created_at, e.id
+        LIMIT {offers_per_slot}
+        ON CONFLICT (entry_id, professional_id, date, start_time) DO NOTHING;
+        GET DIAGNOSTICS v_offers = ROW_COUNT;
+        RETURN v_offers;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION trg_bookings_waitlist() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IS DISTINCT FROM 'cancelled' AND (
+                TG_OP = 'DELETE' OR NEW.status = 'cancelled'
+                OR NEW.date IS DISTINCT FROM OLD.date
+                OR NEW.start_time IS DISTINCT FROM OLD.start_time
+                OR NEW.professional_id IS DISTINCT FROM OLD.professional_id) THEN
+            PERFORM waitlist_match_slot(
+                OLD.professional_id, OLD.date, OLD.start_time,
+                COALESCE(OLD.end_time, OLD.start_time + interval '{default_slot_minutes} minutes'), OLD.id
+            );
+        END IF;
+        IF TG_OP = 'INSERT' AND NEW.client_id IS NOT NULL THEN
+            UPDATE waitlist_entries SET status = 'fulfilled', updated_at = CURRENT_TIMESTAMP
+            WHERE client_id = NEW.client_id AND status = 'active'
+              AND NEW.date BETWEEN date_from AND date_to;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS bookings_waitlist ON bookings;
+    CREATE TRIGGER bookings_waitlist
+        AFTER INSERT OR UPDATE OF status, date, start_time, professional_id OR DELETE
+        ON bookings FOR EACH ROW EXECUTE FUNCTION trg_bookings_waitlist();
+'''
+
+_schema_ready = False
+
+
+def _schema_sql():
+    """SCHEMA_SQL con los límites de este módulo"""
+    return (
+        SCHEMA_SQL
+        .replace('{max_range_days}', str(MAX_RANGE_DAYS))
+        .replace('{offers_per_slot}', str(OFFERS_PER_SLOT))
+        .replace('{default_slot_minutes}', str(DEFAULT_SLOT_MINUTES))
+    )
+
+
+def ensure_schema(db):
+    """
+    Verifica que las tablas de la lista de espera y el trigger de `bookings` estén instalados
+
+    No ejecuta DDL: el trigger se instala con `python -m src.waitlist --migrate`.
+
+    Raises:
+        RuntimeError: Si las tablas de la lista de espera no existen
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+
+    migrations.require(db, 'waitlist', _schema_sql(), 'python -m src.waitlist --migrate', 'waitlist_entries')
+    _schema_ready = True
+
+
+def migrate(db):
+    """
+    Crea o actualiza las tablas de la lista de espera y el trigger de `bookings`
+
+    Requiere la tabla de clientes (usa client_upsert).
+
+    Args:
+        db (Database): Instancia de base de datos
+
+    Returns:
+        bool: True si se aplicó el esquema, False si ya estaba al día
+    """
+    clients.ensure_schema(db)
+    sql = _schema_sql()
+    if migrations.is_applied(db, 'waitlist', sql):
+        return False
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('waitlist'))")
+        if migrations.applied_checksum(cursor, 'waitlist') == migrations.checksum(sql):
+            return False
+        cursor.execute(sql)
+        migrations.record(cursor, 'waitlist', sql)
+
+    return True
+
+
+# ==================== ENTRADAS ====================
+
+def add_entry(db, client_name, client_phone, client_email, service_ids, date_from, date_to,
+              professional_id=None):
+    """
+    Anota a un cliente en la lista de espera
+
+    Si el cliente ya tiene una entrada activa con los mismos servicios y
+    profesional, se amplía su rango en lugar de crear otra.
+
+    Args:
+        db: Instancia de Database
+        client_name (str): Nombre
+        client_phone (str): Teléfono
+        client_email (str): Email (las ofertas se envían por correo)
+        service_ids (list): IDs de los servicios
+        date_from (str or date): Primera fecha aceptable
+        date_to (str or date): Última fecha aceptable
+        professional_id (int): Profesional preferido - opcional
+
+    Returns:
+        tuple: (success: bool, entry_id: int or error_message: str)
+    """
+    date_from = date.fromisoformat(str(date_from))
+    date_to = date.fromisoformat(str(date_to))
+    service_ids = sorted({int(service_id) for service_id in service_ids})
+
+    if not service_ids:
+        return False, "⚠️ Selecciona al menos un servicio"
+    if not (client_email or '').strip():
+        return False, "⚠️ Necesitamos tu email para avisarte"
+    if date_from < date.today() or date_to < date_from:
+        return False, "⚠️ Rango de fechas no válido"
+    if (date_to - date_from).days > MAX_RANGE_DAYS:
+        return False, f"⚠️ El rango no puede pasar de {MAX_RANGE_DAYS} días"
+
+    try:
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COALESCE(SUM(duration), 0), COUNT(*) FROM services
+                WHERE id = ANY(%s) AND active = TRUE
+            ''', (service_ids,))
+            duration, found = cursor.fetchone()
+            if found != len(service_ids):
+                return False, "⚠️ Algún servicio ya no está disponible"
+
+            cursor.execute("SELECT client_upsert(%s, %s, %s)", (client_name, client_phone, client_email))
+            client_id = cursor.fetchone()[0]
+
+            cursor.execute('''
+                UPDATE waitlist_entries SET
+                    date_from = LEAST(date_from, %(date_from)s),
+                    date_to = GREATEST(date_to, %(date_to)s),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM waitlist_entries
+                    WHERE client_id = %(client_id)s AND status = 'active'
+                      AND service_ids = %(service_ids)s
+                      AND professional_id IS NOT DISTINCT FROM %(professional_id)s
+                      AND GREATEST(date_to, %(date_to)s) - LEAST(date_from, %(date_from)s) <= %(max_days)s
+                    LIMIT 1
+                )
+                RETURNING id
+            ''', {'client_id': client_id, 'service_ids': service_ids, 'professional_id': professional_id,
+                  'date_from': date_from, 'date_to': date_to, 'max_days': MAX_RANGE_DAYS})
+            row = cursor.fetchone()
+            if row:
+                return True, row[0]
+
+            cursor.execute('''
+                INSERT INTO waitlist_entries
+                (client_id, client_name, client_phone, client_email, service_ids, duration_minutes,
+                 professional_id, date_from, date_to)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            ''', (client_id, client_name, client_phone, client_email.strip(), service_ids, int(duration),
+                  professional_id, date_from, date_to))
+            return True, cursor.fetchone()[0]
+    except Exception as e:
+        return False, f"❌ Error: {str(e)}"
+
+
+def default_range(start=None, days=7):
+    """Rango de fechas sugerido para anotarse: (start, start + days)"""
+    start = date.fromisoformat(str(start)) if start else date.today() + timedelta(days=1)
+    return start, start + timedelta(days=min(days, MAX_RANGE_DAYS))
+
+
+def cancel_entry(db, entry_id):
+    """Da de baja una entrada activa"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE waitlist_entries SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = 'active'
+        ''', (entry_id,))
+        if cursor.rowcount:
+            return True, "✅ Entrada dada de baja"
+        return False, "⚠️ Entrada no encontrada o ya inactiva"
+
+
+def get_entries(db, status='active', limit=100):
+    """
+    Entradas de la lista de espera con sus servicios, profesional y ofertas
+
+    Returns:
+        list: Entradas ordenadas por llegada
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT e.id, e.client_name, e.client_phone, e.client_email, e.date_from, e.date_to,
+                   e.duration_minutes, e.status, e.created_at,
+                   COALESCE(p.name, 'Cualquiera') as professional_name,
+                   (SELECT string_agg(s.name, ', ' ORDER BY s.name)
+                    FROM services s WHERE s.id = ANY(e.service_ids)) as services,
+                   (SELECT COUNT(*) FROM waitlist_offers o WHERE o.entry_id = e.id) as offers
+            FROM waitlist_entries e
+            LEFT JOIN professionals p ON p.id = e.professional_id
+            WHERE e.status = %s
+            ORDER BY e.created_at, e.id
+            LIMIT %s
+        ''', (status, limit))
+        return [db._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def get_offer_stats(db):
+    """Ofertas por estado: {'pending': n, 'sent': n, ...}"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, COUNT(*) FROM waitlist_offers GROUP BY status")
+        return dict(cursor.fetchall())
+
+
+# ==================== OFERTAS ====================
+
+def match_slot(db, professional_id, slot_date, start_time, end_time, booking_id=None):
+    """
+    Crea ofertas para un intervalo libre (el trigger lo hace solo al cancelar o reprogramar)
+
+    Returns:
+        int: Ofertas creadas
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT waitlist_match_slot(%s, %s, %s, %s, %s)',
+                       (professional_id, slot_date, start_time, end_time, booking_id))
+        return cursor.fetchone()[0]
+
+
+def _claim_offers(db, limit=BATCH_SIZE):
+    """
+    Toma ofertas pendientes (SKIP LOCKED: dos procesos no toman la misma) y
+    expira las de espacios que ya se ocuparon o ya pasaron
+    """
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE waitlist_offers o SET status = 'sending', attempts = o.attempts + 1,
+                                         claimed_at = CURRENT_TIMESTAMP
+            WHERE o.id IN (
+                SELECT id FROM waitlist_offers
+                WHERE status = 'pending'
+                   OR (status = 'sending' AND claimed_at < CURRENT_TIMESTAMP - %s * interval '1 minute')
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING o.id
+        ''', (CLAIM_TIMEOUT_MINUTES, limit))
+        offer_ids = [row[0] for row in cursor.fetchall()]
+        if not offer_ids:
+            return []
+
+        cursor.execute(f'''
+            UPDATE waitlist_offers o SET status = 'expired'
+            FROM waitlist_entries e
+            WHERE o.id = ANY(%s) AND e.id = o.entry_id AND (
+                e.status <> 'active'
+                OR o.date + o.start_time <= LOCALTIMESTAMP
+                OR EXISTS (
+                    SELECT 1 FROM bookings b
+                    WHERE b.professional_id = o.professional_id AND b.date = o.date
+                      AND b.status IS DISTINCT FROM 'cancelled'
+                      AND b.start_time < o.end_time
+                      AND COALESCE(b.end_time, b.start_time + interval '{DEFAULT_SLOT_MINUTES} minutes') > o.start_time
+                )
+            )
+        ''', (offer_ids,))
+
+        cursor.execute('''
+            SELECT o.id as offer_id, o.date, o.start_time, o.end_time, o.attempts,
+                   e.client_name, e.client_email,
+                   COALESCE(p.name, 'Profesional') as professional_name,
+                   (SELECT string_agg(s.name, ', ' ORDER BY s.name)
+                    FROM services s WHERE s.id = ANY(e.service_ids)) as services
+            FROM waitlist_offers o
+            JOIN waitlist_entries e ON e.id = o.entry_id
+            LEFT JOIN professionals p ON p.id = o.professional_id
+            WHERE o.id = ANY(%s) AND o.status = 'sending'
+            ORDER BY o.id
+        ''', (offer_ids,))
+        return [db._row_to_dict(cursor, row) for row in cursor.fetchall()]
+
+
+def _to_offer_data(offer):
+    """Convierte una oferta al formato de notifications.enviar_ofertas_lote"""
+    return {
+        'offer_id': offer['offer_id'],
+        'client': {
+            'name': offer['client_name'],
+            'email': (offer['client_email'] or '').strip()
+        },
+        'slot': {
+            'date': str(offer['date']),
+            'start_time': str(offer['start_time'])[:5],
+            'end_time': str(offer['end_time'])[:5]
+        },
+        'professional': {'name': offer['professional_name']},
+        'services': offer['services'] or '',
+        'app_url': APP_URL
+    }
+
+
+def send_pending_offers(db):
+    """
+    Ejecuta una pasada del envío: toma, envía y marca las ofertas
+
+    Returns:
+        dict: {'claimed': int, 'sent': int, 'failed': int, 'retry': int}
+    """
+    offers = _claim_offers(db)
+    result = {'claimed': len(offers), 'sent': 0, 'failed': 0, 'retry': 0}
+    if not offers:
+        return result
+
+    outcome = notifications.enviar_ofertas_lote([_to_offer_data(offer) for offer in offers])
+
+    sent, failed, retry = [], [], []
+    for offer in offers:
+        if outcome.get(offer['offer_id']):
+            sent.append(offer['offer_id'])
+        elif offer['client_email'] and offer['client_email'].strip() and offer['attempts'] < MAX_ATTEMPTS:
+            # Error de envío: vuelve a la cola para la siguiente pasada
+            retry.append(offer['offer_id'])
+        else:
+            failed.append(offer['offer_id'])
+
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE waitlist_offers SET status = 'sent', sent_at = CURRENT_TIMESTAMP WHERE id = ANY(%s)
+        ''', (sent,))
+        cursor.execute("UPDATE waitlist_offers SET status = 'pending' WHERE id = ANY(%s)", (retry,))
+        cursor.execute("UPDATE waitlist_offers SET status = 'failed' WHERE id = ANY(%s)", (failed,))
+
+    result.update(sent=len(sent), failed=len(failed), retry=len(retry))
+    return result
+
+
+def run_forever(db, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+    """Envía las ofertas pendientes de forma periódica"""
+    ensure_schema(db)
+    print(f"📝 Envío de ofertas de lista de espera iniciado (cada {interval_minutes} min)")
+
+    while True:
+        try:
+            result = send_pending_offers(db)
+            if result['claimed']:
+                print(f"📊 [{datetime.now():%Y-%m-%d %H:%M}] {result['sent']} enviadas, "
+                      f"{result['retry']} por reintentar, {result['failed']} fallidas")
+        except Exception as e:
+            print(f"❌ Error enviando ofertas de lista de espera: {e}")
+
+        time.sleep(interval_minutes * 60)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(description="Envío de ofertas de lista de espera")
+    parser.add_argument('--migrate', action='store_true', help="Crea o actualiza las tablas y el trigger de la lista de espera")
+    parser.add_argument('--once', action='store_true', help="Ejecuta una sola pasada y termina")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL_MINUTES,
+                        help="Minutos entre ejecuciones")
+    args = parser.parse_args()
+
+    database = Database()
+    clients.ensure_schema(database)
+    if args.migrate:
+        if migrate(database):
+            print("✅ Esquema de lista de espera aplicado")
+        else:
+            print("✅ El esquema de lista de espera ya estaba al día")
+    if args.once:
+        ensure_schema(database)
+        print(send_pending_offers(database))
+    elif not args.migrate:
+        run_forever(database, args.interval)
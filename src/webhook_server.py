@@ -0,0 +1,395 @@
+"""
+Receptor local de notificaciones (webhooks) de Mercado Pago
+
+Servidor HTTP asíncrono y ligero (solo asyncio de la librería estándar) que
+corre junto a las apps de Streamlit. Responde 200 de inmediato, deduplica las
+notificaciones por ID de pago, las encola y un worker las aplica en lotes:
+consulta cada pago en Mercado Pago y confirma todas las coincidencias de un
+lote en una sola transacción.
+
+Uso:
+    python -m src.webhook_server --port 8502
+    python -m src.webhook_server --load-test 20000
+
+Configura la notification_url de la preferencia como
+    https://<tu-dominio>/webhook/mercadopago
+"""
+
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+
+from src import mercadopago_client
+
+WEBHOOK_PATH = '/webhook/mercadopago'
+DEFAULT_PORT = int(os.getenv('WEBHOOK_PORT', '8502'))
+
+BATCH_SIZE = 100            # Máximo de pagos por transacción
+FLUSH_INTERVAL = 0.5        # Segundos máximos que un pago espera en la cola
+DEDUPE_TTL = 600            # Segundos que se recuerda un ID ya recibido
+MAX_BODY_BYTES = 64 * 1024
+
+RESPONSES = {
+    200: b'OK',
+    400: b'Bad Request',
+    404: b'Not Found',
+    405: b'Method Not Allowed',
+    413: b'Payload Too Large'
+}
+
+
+def extract_payment_id(query, body):
+    """
+    Obtiene el ID de pago de una notificación de Mercado Pago
+
+    Soporta el formato JSON ({"type": "payment", "data": {"id": ...}}) y el
+    formato por query string (?topic=payment&id=... / ?type=payment&data.id=...).
+
+    Returns:
+        str or None: ID del pago, o None si la notificación no es de pagos
+    """
+    params = {k: v[0] for k, v in parse_qs(query).items()}
+
+    payload = {}
+    if body:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = {}
+
+    topic = payload.get('type') or payload.get('topic') or params.get('type') or params.get('topic')
+    if topic and topic != 'payment':
+        return None
+
+    payment_id = (
+        (payload.get('data') or {}).get('id')
+        or params.get('data.id')
+        or params.get('id')
+    )
+    return str(payment_id) if payment_id else None
+
+
+class NotificationQueue:
+    """
+    Cola deduplicada de IDs de pago pendientes de aplicar
+
+    Un ID es duplicado mientras está en cola o ya confirmó su cita (se
+    recuerda `dedupe_ttl` segundos). Los que no se confirmaron (consulta
+    fallida o pago aún no aprobado) se olvidan, así la notificación
+    posterior de Mercado Pago (por ejemplo, cuando pasa a 'approved') se
+    vuelve a aplicar. Si llega de nuevo mientras su lote se procesa, se
+    encola otra vez al terminar.
+    """
+
+    def __init__(self, dedupe_ttl=DEDUPE_TTL):
+        self.queue = asyncio.Queue()
+        self.recent = mercadopago_client.TTLCache(max_entries=50000)
+        self.dedupe_ttl = dedupe_ttl
+        self.queued = set()
+        self.processing = set()
+        self.renotified = set()
+        self.stats = {'received': 0, 'duplicates': 0, 'queued': 0, 'applied': 0, 'batches': 0, 'errors': 0}
+
+    def offer(self, payment_id):
+        """Encola el pago si no está en cola ni confirmado recientemente"""
+        self.stats['received'] += 1
+        if payment_id in self.queued or self.recent.get(payment_id):
+            self.stats['duplicates'] += 1
+            return False
+        if payment_id in self.processing:
+            self.stats['duplicates'] += 1
+            self.renotified.add(payment_id)
+            return False
+        self._enqueue(payment_id)
+        return True
+
+    def _enqueue(self, payment_id):
+        self.queued.add(payment_id)
+        self.queue.put_nowait(payment_id)
+        self.stats['queued'] += 1
+
+    def done(self, payment_ids):
+        """Marca pagos confirmados: sus notificaciones siguientes son duplicadas"""
+        for payment_id in payment_ids:
+            self.processing.discard(payment_id)
+            self.renotified.discard(payment_id)
+            self.recent.set(payment_id, True, self.dedupe_ttl)
+
+    def forget(self, payment_ids):
+        """Permite volver a recibir pagos que no se confirmaron"""
+        for payment_id in payment_ids:
+            self.processing.discard(payment_id)
+            if payment_id in self.renotified:
+                self.renotified.discard(payment_id)
+                self._enqueue(payment_id)
+
+    async def next_batch(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        """Espera el primer ID y junta más hasta llenar el lote o agotar el intervalo"""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + flush_interval
+        while len(batch) < batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        self.queued.difference_update(batch)
+        self.processing.update(batch)
+        return batch
+
+
+def apply_payment_batch(db, payment_ids, access_token):
+    """
+    Consulta los pagos en Mercado Pago y confirma los aprobados en una transacción
+
+    Se ejecuta en un hilo (psycopg2 y requests son bloqueantes).
+
+    Returns:
+        tuple: (citas confirmadas: int, IDs no confirmados: list) - los no
+               confirmados (consulta fallida, pago no aprobado o sin cita)
+               se pueden volver a recibir
+    """
+    confirmations = []
+    for payment_id in payment_ids:
+        mercadopago_client.invalidate_payment(payment_id, access_token)
+        try:
+            status_code, payment = mercadopago_client.get_payment(payment_id, access_token)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ No se pudo consultar el pago {payment_id}: {e}")
+            continue
+
+        if status_code != 200 or payment.get('status') != 'approved':
+            continue
+
+        booking_code = payment.get('external_reference')
+        if not booking_code:
+            continue
+
+        confirmations.append((booking_code, payment_id, mercadopago_client.payment_summary(payment)))
+
+    confirmed_ids = {payment_id for _, payment_id, _ in confirmations}
+    unconfirmed = [payment_id for payment_id in payment_ids if payment_id not in confirmed_ids]
+    if not confirmations:
+        return 0, unconfirmed
+
+    success, confirmed = db.confirm_payments_bulk(confirmations)
+    if not success:
+        raise RuntimeError(confirmed)
+    return len(confirmed), unconfirmed
+
+
+class WebhookServer:
+    """
+    Servidor HTTP asíncrono para notificaciones de pago
+
+    Args:
+        process_batch (callable): Función bloqueante que recibe una lista de IDs
+                                  y retorna (cuántos se aplicaron, IDs no confirmados)
+    """
+
+    def __init__(self, process_batch, host='0.0.0.0', port=DEFAULT_PORT):
+        self.process_batch = process_batch
+        self.host = host
+        self.port = port
+        self.notifications = NotificationQueue()
+        self._server = None
+        self._worker = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._worker = asyncio.create_task(self._apply_loop())
+        print(f"🔔 Webhook de Mercado Pago escuchando en http://{self.host}:{self.port}{WEBHOOK_PATH}")
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._worker.cancel()
+
+    async def drain(self):
+        """Espera a que la cola quede vacía (útil en pruebas de carga)"""
+        while not self.notifications.queue.empty():
+            await asyncio.sleep(0.01)
+        # Dar tiempo al último lote en curso
+        await asyncio.sleep(FLUSH_INTERVAL + 0.1)
+
+    async def _apply_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.notifications.next_batch()
+            try:
+                applied, unconfirmed = await loop.run_in_executor(None, self.process_batch, batch)
+                self.notifications.stats['applied'] += applied
+                self.notifications.stats['batches'] += 1
+                unconfirmed = set(unconfirmed)
+                self.notifications.done([p for p in batch if p not in unconfirmed])
+                self.notifications.forget(unconfirmed)
+            except Exception as e:
+                self.notifications.stats['errors'] += 1
+                self.notifications.forget(batch)
+                print(f"❌ Error aplicando lote de {len(batch)} pagos: {e}")
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                # Solo dígitos ASCII: int() aceptaría signos y espacios
+                content_length = headers.get('content-length') or '0'
+                if not (content_length.isascii() and content_length.isdigit()):
+                    await self._respond(writer, 400, keep_alive=False)
+                    break
+                length = int(content_length)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = self._route(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, method, target, body):
+        url = urlsplit(target)
+
+        if url.path == '/health':
+            return 200, json.dumps({**self.notifications.stats,
+                                    'queue_size': self.notifications.queue.qsize()}).encode('utf-8')
+
+        if url.path != WEBHOOK_PATH:
+            return 404, None
+
+        if method != 'POST':
+            return 405, None
+
+        payment_id = extract_payment_id(url.query, body)
+        if payment_id:
+            self.notifications.offer(payment_id)
+
+        # Mercado Pago reintenta si no recibe 2xx: siempre confirmar recepción
+        return 200, None
+
+    async def _respond(self, writer, status, payload=None, keep_alive=True):
+        body = payload if payload is not None else RESPONSES[status]
+        writer.write(
+            f"HTTP/1.1 {status} {RESPONSES[status].decode()}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Content-Type: {'application/json' if payload else 'text/plain'}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+
+async def _serve(port):
+    from src import payments_service
+    from src.database import Database
+
+    db = Database()
+    # Solo verifica el esquema: se aplica con python -m src.payments_service --migrate
+    payments_service.ensure_schema(db)
+    access_token = os.getenv("MERCADOPAGO_ACCESS_TOKEN")
+    server = WebhookServer(lambda batch: apply_payment_batch(db, batch, access_token), port=port)
+    await server.start()
+    await asyncio.Event().wait()
+
+
+async def _fake_notifier(port, total, connections, unique_ids):
+    """Envía `total` notificaciones repartidas en conexiones keep-alive concurrentes"""
+    per_connection = total // connections
+
+    async def client(offset):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for i in range(per_connection):
+            payment_id = (offset * per_connection + i) % unique_ids
+            body = json.dumps({'type': 'payment', 'action': 'payment.updated',
+                               'data': {'id': str(payment_id)}}).encode('utf-8')
+            writer.write(
+                f"POST {WEBHOOK_PATH} HTTP/1.1\r\nHost: localhost\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b''):
+                pass
+            await reader.readexactly(2)  # "OK"
+        writer.close()
+
+    await asyncio.gather(*(client(c) for c in range(connections)))
+    return per_connection * connections
+
+
+async def run_load_test(total=20000, connections=50, unique_ids=5000):
+    """
+    Prueba de carga local con un notificador falso y un procesador sin BD
+
+    Mide cuántas notificaciones por segundo acepta el servidor y verifica
+    que cada ID se aplique una sola vez.
+    """
+    applied = []
+
+    def fake_process(batch):
+        time.sleep(0.005)  # Simula la transacción
+        applied.extend(batch)
+        return len(batch), []
+
+    server = WebhookServer(fake_process, host='127.0.0.1', port=0)
+    await server.start()
+
+    started = time.monotonic()
+    sent = await _fake_notifier(server.port, total, connections, unique_ids)
+    elapsed = time.monotonic() - started
+    await server.drain()
+    await server.stop()
+
+    stats = server.notifications.stats
+    print(f"📨 {sent} notificaciones en {elapsed:.2f}s → {sent / elapsed:,.0f} notificaciones/s")
+    print(f"📊 {stats['queued']} únicas, {stats['duplicates']} duplicadas, "
+          f"{stats['applied']} aplicadas en {stats['batches']} lotes")
+
+    assert stats['received'] == sent
+    assert len(applied) == len(set(applied)) == min(unique_ids, sent)
+    print("✅ Prueba de carga completada")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Receptor de webhooks de Mercado Pago")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--load-test', type=int, metavar='N', help="Envía N notificaciones falsas y mide el rendimiento")
+    parser.add_argument('--connections', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.load_test:
+        asyncio.run(run_load_test(args.load_test, args.connections))
+    else:
+        asyncio.run(_serve(args.port))